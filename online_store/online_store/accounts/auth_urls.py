@@ -1,8 +1,6 @@
 from django.urls import path
 
-from rest_framework_simplejwt.views import TokenRefreshView
-
-from .views import SignInView, SignUpView
+from .views import SignInView, SignUpView, TokenRefreshView
 
 
 urlpatterns = [
@@ -0,0 +1,99 @@
+"""
+accounts authentication
+"""
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+# token claim with the manager role of the user
+MANAGER_CLAIM = 'is_manager'
+# token claim with the user name
+USERNAME_CLAIM = 'username'
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built only from the token claims: id, username and role.
+    It can answer role checks, other data needs the database user.
+    """
+
+    @cached_property
+    def username(self):
+        """user name"""
+        return self.token.get(USERNAME_CLAIM, '')
+
+    @cached_property
+    def userprofile(self):
+        """the token user plays the role of its profile"""
+        return self
+
+    def has_manager_permission(self):
+        """
+        Does the user have manager permission ?
+        """
+        return bool(self.token.get(MANAGER_CLAIM, False))
+
+
+class JWTProfileAuthentication(JWTAuthentication):
+    """
+    JWT authentication which loads the user together with the profile
+    by one query and takes the manager role from the token claim,
+    so permission checks do not query the database.
+    The role is fixed when the token is issued.
+    """
+
+    def get_user(self, validated_token):
+        """get user with profile by the token"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = self.user_model.objects.select_related('userprofile').filter(
+            **{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        is_manager = validated_token.get(MANAGER_CLAIM)
+        if is_manager is not None:
+            try:
+                user.userprofile.cache_manager_permission(is_manager)
+            except ObjectDoesNotExist:
+                pass
+
+        return user
+
+
+class JWTClaimsAuthentication(JWTProfileAuthentication):
+    """
+    JWT authentication for read-only endpoints: safe requests get
+    the user from token claims without any query,
+    other requests get the database user.
+    It is turned off by the setting JWT_STATELESS_READS.
+    """
+
+    def authenticate(self, request):
+        """remember the method of the request"""
+        self.method = request.method
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        """get user by the token"""
+        if settings.JWT_STATELESS_READS and self.method in SAFE_METHODS:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(
+                    _("Token contained no recognizable user identification"))
+            return ClaimsUser(validated_token)
+
+        return super().get_user(validated_token)
@@ -0,0 +1,28 @@
+"""
+accounts password hashers with work factors taken from settings.
+The algorithm names are not changed, so stored hashes stay valid
+and are upgraded on login when the parameters change.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, ScryptPasswordHasher, Argon2PasswordHasher)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with configurable iterations"""
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with configurable work factor"""
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """argon2 with configurable costs, requires package argon2-cffi"""
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
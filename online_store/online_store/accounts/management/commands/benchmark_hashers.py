@@ -0,0 +1,47 @@
+"""
+Manage command to measure password hashers throughput
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    This manage command measures how many password checks (logins)
+    per second one process, i.e. one CPU core, can do with every
+    configured hasher
+    """
+    help = """Measure logins per second per core for password hashers."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-n', '--number', type=int, default=20,
+            help='Count of password checks for every hasher')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        number = kwargs['number']
+        password = 'Benchmark-password-123'
+
+        print(f'Preferred hasher: {settings.PASSWORD_HASHER}')
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(password, hasher.salt())
+            except ValueError as exc:
+                # library of the hasher is not installed
+                print(f'{hasher.algorithm:<16} skipped: {exc}')
+                continue
+
+            start = time.perf_counter()
+            for _ in range(number):
+                hasher.verify(password, encoded)
+            duration = time.perf_counter() - start
+
+            print(
+                f'{hasher.algorithm:<16} {number / duration:10.1f} logins/s '
+                f'{duration / number * 1000:10.1f} ms/login')
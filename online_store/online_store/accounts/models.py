@@ -20,6 +20,8 @@ from djmoney.models.fields import MoneyField
 from djmoney.money import Money
 from djmoney.models.validators import MinMoneyValidator
 
+from .authentication import MANAGER_CLAIM, USERNAME_CLAIM
+
 logger = logging.getLogger(__name__)
 
 GENDERS = [
@@ -53,8 +55,17 @@ class UserProfile(models.Model):
     def has_manager_permission(self):
         """
         Does the user have manager permission ?
+        The answer is cached in the instance
+        """
+        if getattr(self, '_is_manager', None) is None:
+            self._is_manager = self.user.has_perm('accounts.manager')
+        return self._is_manager
+
+    def cache_manager_permission(self, value):
+        """
+        set known manager permission, e.g. from the token claim
         """
-        return self.user.has_perm('accounts.manager')
+        self._is_manager = bool(value)
 
     @classmethod
     def users_with_perm(cls, perm_name):
@@ -76,6 +87,7 @@ class UserProfile(models.Model):
             content_type=content_type,
         )
         self.user.user_permissions.add(permission)
+        self._is_manager = None
 
     def remove_manager_permission(self):
         """
@@ -87,6 +99,7 @@ class UserProfile(models.Model):
             content_type=content_type,
         )
         self.user.user_permissions.remove(permission)
+        self._is_manager = None
 
     @receiver(post_save, sender=get_user_model())
     def update_user_profile(sender, instance, created, **kwargs):
@@ -112,9 +125,18 @@ class UserProfile(models.Model):
         refresh = RefreshToken.for_user(self.user)
         return {
             'refresh': str(refresh),
-            'access': str(refresh.access_token),
+            'access': str(self.set_token_claims(refresh.access_token)),
         }
 
+    def set_token_claims(self, token):
+        """
+        put the current role and username into the access token,
+        the refresh token has no role, so it is recomputed on refresh
+        """
+        token[MANAGER_CLAIM] = self.has_manager_permission()
+        token[USERNAME_CLAIM] = self.user.username
+        return token
+
     @property
     def balance_funds(self):
         """
@@ -2,11 +2,15 @@
 accounts serializers
 """
 
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 from rest_framework import exceptions
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from djmoney.money import Money
 
@@ -25,24 +29,45 @@ class SignInSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         username = attrs['username']
-        # check if user with given username exists
+        # one query for user and profile, check_password upgrades an outdated hash
 
-        if not get_user_model().objects.filter(username=username).exists():
+        user = get_user_model().objects.select_related('userprofile').filter(
+            username=username).first()
+        if user is None:
             raise exceptions.ValidationError(_("User with that name does not exist"))
 
-        user = authenticate(username=username, password=attrs['password'])
-
-        if user:
-            if user.is_active:
-                attrs['user'] = user
-            else:
-                raise exceptions.ValidationError(_("User is deactivated"))
-        else:
+        if not user.check_password(attrs['password']):
             raise exceptions.AuthenticationFailed(_("Wrong user name or password"))
+        if not user.is_active:
+            raise exceptions.ValidationError(_("User is deactivated"))
+
+        attrs['user'] = user
 
         return attrs
 
 
+class ProfileRefreshToken(RefreshToken):
+    """
+    Refresh token, its access tokens get the role read from the database
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        profile = UserProfile.objects.select_related('user').filter(
+            user_id=self[api_settings.USER_ID_CLAIM], user__is_active=True).first()
+        if profile is None:
+            raise InvalidToken(_('User not found'))
+        return profile.set_token_claims(access)
+
+
+class ProfileTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh access token with the current role of the user
+    """
+    token_class = ProfileRefreshToken
+
+
 class UserOutSerializer(serializers.ModelSerializer):
     """
     user data
@@ -123,8 +148,6 @@ class SignUpSerializer(serializers.Serializer):
             raise exceptions.ValidationError(
                 _("User name is already used by another user"))
 
-        user = authenticate(username=username, password=attrs['password'])
-
         return attrs
 
 
@@ -9,14 +9,24 @@ from faker import Faker
 # from pprint import pprint
 
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
 from online_store.general.test_utils import (get_test_user, ApiTestCase)
+from online_store.general.throttling import IPTokenBucketThrottle
+from .authentication import (
+    JWTProfileAuthentication, JWTClaimsAuthentication, ClaimsUser, MANAGER_CLAIM,
+    USERNAME_CLAIM)
 from .models import UserProfile
+from .serializers import SignInSerializer
 
 
 class AccountTestCase(unittest.TestCase):
@@ -51,6 +61,13 @@ class AccountTestCase(unittest.TestCase):
         self.assertTrue(token.get('refresh'))
         self.assertTrue(token.get('access'))
 
+    def test_45_token_claim(self):
+        """token contains manager role"""
+        token = self.user.userprofile.create_token()
+        access = AccessToken(token['access'])
+        self.assertEqual(
+            access[MANAGER_CLAIM], self.user.userprofile.has_manager_permission())
+
     def test_50_has_manager_permission(self):
         """user has manager permission"""
         self.assertTrue(self.user.userprofile.has_manager_permission())
@@ -66,6 +83,69 @@ class AccountTestCase(unittest.TestCase):
         self.assertTrue(isinstance(profile, UserProfile))
 
 
+class ThrottleTestCase(unittest.TestCase):
+    """ unittest test case for token bucket throttling"""
+
+    class View:
+        """view with throttle scope"""
+        throttle_scope = 'test'
+
+    def test_00_token_bucket(self):
+        """bucket is emptied and refilled"""
+        throttle = IPTokenBucketThrottle()
+        throttle.THROTTLE_RATES = {'test_ip': '2/m'}
+        now = throttle.timer()
+        throttle.timer = lambda: now
+        request = APIRequestFactory().post('/', REMOTE_ADDR='10.1.2.3')
+        throttle.cache.clear()
+
+        self.assertTrue(throttle.allow_request(request, self.View))
+        self.assertTrue(throttle.allow_request(request, self.View))
+        self.assertFalse(throttle.allow_request(request, self.View))
+        self.assertTrue(throttle.wait() > 0)
+
+        throttle.timer = lambda: now + 30
+        self.assertTrue(throttle.allow_request(request, self.View))
+        self.assertFalse(throttle.allow_request(request, self.View))
+        throttle.cache.clear()
+
+    def test_05_locked_bucket(self):
+        """request is rejected while a parallel one holds the bucket"""
+        throttle = IPTokenBucketThrottle()
+        throttle.THROTTLE_RATES = {'test_ip': '2/m'}
+        throttle.LOCK_WAIT = 0
+        request = APIRequestFactory().post('/', REMOTE_ADDR='10.1.2.4')
+        throttle.cache.clear()
+
+        self.assertTrue(throttle.allow_request(request, self.View))
+        throttle.cache.add(f'{throttle.key}:lock', 1)
+        self.assertFalse(throttle.allow_request(request, self.View))
+        throttle.cache.delete(f'{throttle.key}:lock')
+        self.assertTrue(throttle.allow_request(request, self.View))
+        throttle.cache.clear()
+
+    def test_07_forwarded_for(self):
+        """rotated X-Forwarded-For shares the bucket of the peer address"""
+        throttle = IPTokenBucketThrottle()
+        throttle.THROTTLE_RATES = {'test_ip': '2/m'}
+        throttle.cache.clear()
+
+        results = []
+        for i in range(3):
+            request = APIRequestFactory().post(
+                '/', REMOTE_ADDR='10.1.2.5', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}')
+            results.append(throttle.allow_request(request, self.View))
+        self.assertEqual(results, [True, True, False])
+        throttle.cache.clear()
+
+    def test_10_not_throttled(self):
+        """views without rate are not throttled"""
+        throttle = IPTokenBucketThrottle()
+        request = APIRequestFactory().post('/')
+        for _ in range(100):
+            self.assertTrue(throttle.allow_request(request, object()))
+
+
 class ApiAccountsTestCase(ApiTestCase):
     """
     Test case to test end-points of Mapster accounts API
@@ -152,3 +232,92 @@ class ApiAccountsTestCase(ApiTestCase):
         # pprint(data)
         self.assertTrue(data['user'])
         self.assertTrue(data['amount'])
+
+    def test_0040_authentication(self):
+        """user, profile and role are loaded by one query"""
+        request = APIRequestFactory().get(
+            reverse('profile'), HTTP_AUTHORIZATION=f'Bearer {self.user_token}')
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = JWTProfileAuthentication().authenticate(request)
+            self.assertFalse(user.userprofile.has_manager_permission())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(user.id, self.user_client.id)
+
+    def test_0050_stateless_authentication(self):
+        """read requests get the user from token claims"""
+        factory = APIRequestFactory()
+        auth = f'Bearer {self.user_token}'
+
+        request = factory.get(reverse('products'), HTTP_AUTHORIZATION=auth)
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = JWTClaimsAuthentication().authenticate(request)
+            self.assertFalse(user.userprofile.has_manager_permission())
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(isinstance(user, ClaimsUser))
+        self.assertEqual(user.id, self.user_client.id)
+        self.assertEqual(user.username, self.user_client.username)
+
+        request = factory.post(reverse('products'), {}, HTTP_AUTHORIZATION=auth)
+        user, _ = JWTClaimsAuthentication().authenticate(request)
+        self.assertTrue(isinstance(user, get_user_model()))
+
+    def test_0060_signin(self):
+        """sign in needs one query and upgrades outdated password hash"""
+        user = self.user_client
+        password = settings.API_TEST_CLIENT_PASSWORD
+        data = {'username': user.username, 'password': password}
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(SignInSerializer(data=data).is_valid())
+        self.assertEqual(len(queries), 1)
+
+        outdated = 'scrypt' if settings.PASSWORD_HASHER != 'scrypt' else 'pbkdf2_sha256'
+        user.password = make_password(password, hasher=outdated)
+        user.save()
+
+        serializer = SignInSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(get_hasher().algorithm))
+
+    def test_0070_signin_throttle(self):
+        """too many attempts to sign in are rejected"""
+        throttle = IPTokenBucketThrottle()
+        limit = min(
+            throttle.parse_rate(throttle.THROTTLE_RATES[scope])[0]
+            for scope in ('signin_ip', 'signin_username'))
+        data = {'username': f'unknown-{Faker().user_name()}', 'password': 'password'}
+
+        throttle.cache.clear()
+        for _ in range(limit):
+            response = self.client.post(reverse('signin'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('signin'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        throttle.cache.clear()
+
+        for data in ([data], 'username'):
+            response = self.client.post(reverse('signin'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        throttle.cache.clear()
+
+    def test_0080_refresh_role(self):
+        """refreshed access token gets the current role, not the one of the sign in"""
+        profile = UserProfile.objects.get(user=self.user_client)
+        profile.set_manager_permission()
+        try:
+            token = UserProfile.objects.get(user=self.user_client).create_token()
+            self.assertTrue(AccessToken(token['access'])[MANAGER_CLAIM])
+            self.assertNotIn(MANAGER_CLAIM, RefreshToken(token['refresh']))
+        finally:
+            profile.remove_manager_permission()
+
+        IPTokenBucketThrottle().cache.clear()
+        response = self.client.post(
+            reverse('token_refresh'), {'refresh': token['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = AccessToken(json.loads(response.content)['access'])
+        self.assertFalse(access[MANAGER_CLAIM])
+        self.assertEqual(access[USERNAME_CLAIM], self.user_client.username)
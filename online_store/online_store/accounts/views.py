@@ -14,15 +14,18 @@ from rest_framework.response import Response
 
 from rest_framework.views import APIView
 from rest_framework import status
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
 from drf_spectacular.utils import extend_schema
 
 from online_store.general.permissions import IsManager
+from online_store.general.throttling import (
+    IPTokenBucketThrottle, UsernameTokenBucketThrottle)
 from online_store.general.utils import get_gender
 from .models import UserProfile
 from .serializers import (
     SignInSerializer, UserProfileSerializer, SignUpSerializer,
-    TopUpAccountSerializer, TopUpAccountItemSerializer)
+    TopUpAccountSerializer, TopUpAccountItemSerializer, ProfileTokenRefreshSerializer)
 
 logger = getLogger(__name__)
 
@@ -32,6 +35,8 @@ class SignInView(CreateAPIView):
     sign in user
     """
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'signin'
 
     def post(self, request):
         """sign in new user"""
@@ -55,6 +60,8 @@ class SignUpView(CreateAPIView):
     sign up user
     """
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'signup'
 
     def post(self, request):
         """ sign up new user """
@@ -87,6 +94,15 @@ class SignUpView(CreateAPIView):
         return SignUpSerializer
 
 
+class TokenRefreshView(BaseTokenRefreshView):
+    """
+    refresh access token
+    """
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'token_refresh'
+    serializer_class = ProfileTokenRefreshSerializer
+
+
 class ProfileView(RetrieveUpdateAPIView):
     """
     update user profile
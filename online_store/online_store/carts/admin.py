@@ -0,0 +1,30 @@
+"""
+There are Admin Classes to present in admin interface objects related to carts
+"""
+
+from django.contrib import admin
+
+from .models import Cart, CartItem
+
+
+class CartItemInline(admin.TabularInline):
+    """
+    Inline admin class to present Cart Item
+    """
+    model = CartItem
+    raw_id_fields = ('product', )
+    verbose_name = 'Cart Item'
+    verbose_name_plural = 'Cart Items'
+
+
+class CartAdmin(admin.ModelAdmin):
+    """
+    An CartAdmin object encapsulates an instance of the Cart
+    with additional list of CartItem
+    """
+    list_display = ('id', 'client', 'updated_at')
+    raw_id_fields = ('client', )
+    inlines = (CartItemInline, )
+
+
+admin.site.register(Cart, CartAdmin)
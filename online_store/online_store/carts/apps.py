@@ -0,0 +1,12 @@
+"""
+app carts
+"""
+
+from django.apps import AppConfig
+
+
+class CartsConfig(AppConfig):
+    """carts config"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'online_store.carts'
+    verbose_name = 'carts'
@@ -0,0 +1,60 @@
+"""
+carts ORM models
+"""
+
+import logging
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from online_store.products.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class Cart(models.Model):
+    """
+    User cart, one for every user
+    """
+    uuid = models.UUIDField(_("uuid"), default=uuid.uuid4, editable=False)
+    client = models.OneToOneField(
+        get_user_model(), on_delete=models.CASCADE,
+        related_name='cart', verbose_name=_('client'))
+
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Cart")
+        verbose_name_plural = _("Carts")
+        db_table = 'carts_cart'
+
+    def __str__(self) -> str:
+        return f'{self.uuid}-{self.client_id}'
+
+
+class CartItem(models.Model):
+    """
+    Cart item with product and count
+    """
+    cart = models.ForeignKey(
+        Cart, on_delete=models.CASCADE,
+        related_name='items', verbose_name=_('cart'))
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE,
+        related_name='+', verbose_name=_('product'))
+    count = models.PositiveIntegerField(_('count'))
+
+    class Meta:
+        verbose_name = _("Cart Item")
+        verbose_name_plural = _("Cart Items")
+        db_table = 'carts_cart_item'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cart', 'product'], name='carts_cart_item_unique_product'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cart_id}-{self.product_id}"
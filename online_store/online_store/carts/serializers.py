@@ -0,0 +1,28 @@
+"""
+carts serializers
+"""
+
+from rest_framework import serializers
+
+from online_store.products.models import Product
+
+
+class CartItemSerializer(serializers.Serializer):
+    """
+    Product and its count in the cart, count 0 removes the product
+    """
+    product = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=0)
+
+    def validate_product(self, value):
+        """the product is visible"""
+        if not Product.live.visible().filter(pk=value).exists():
+            raise serializers.ValidationError(f"Product {value} does not exist")
+        return value
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Data to create an order from the cart
+    """
+    price_currency = serializers.CharField(required=False)
@@ -0,0 +1,116 @@
+"""
+carts services
+
+The cart is stored in the database. The hot copy of its items
+({product id: count}) is kept in the cache 'shared' by all workers,
+it is filled by the next read after a change.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import ValidationError
+
+from djmoney.money import Money
+
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish
+from online_store.orders import pricing
+from online_store.orders.models import Order, OrderItem
+from online_store.products.models import PriceAction, Product
+from .models import Cart, CartItem
+
+
+def cache_key(user_id):
+    """cache key of the cart items"""
+    return f'cart_{user_id}'
+
+
+def invalidate(user_id):
+    """remove the hot copy after the transaction"""
+    transaction.on_commit(lambda: caches['shared'].delete(cache_key(user_id)))
+
+
+def get_items(user):
+    """
+    items of the user cart {product id: count}
+    """
+    cache = caches['shared']
+    key = cache_key(user.id)
+    items = cache.get(key)
+    if items is None:
+        items = dict(CartItem.objects.filter(
+            cart__client_id=user.id).order_by('id').values_list('product_id', 'count'))
+        cache.set(key, items, settings.CART_CACHE_SECONDS)
+    return items
+
+
+def set_item(user, product_id, count):
+    """
+    set count of the product in the user cart, 0 removes the product
+    """
+    with transaction.atomic():
+        cart, _created = Cart.objects.get_or_create(client_id=user.id)
+        if count:
+            CartItem.objects.update_or_create(
+                cart=cart, product_id=product_id, defaults={'count': count})
+        else:
+            CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+        cart.save(update_fields=['updated_at'])
+        invalidate(user.id)
+
+
+def clear(user):
+    """remove all items from the user cart"""
+    with transaction.atomic():
+        CartItem.objects.filter(cart__client_id=user.id).delete()
+        invalidate(user.id)
+
+
+def quote(items, price_currency=None):
+    """
+    price of cart items {product id: count} with the actual price action,
+    products and their stock are read by one query.
+    Lines with errors can't be ordered
+    """
+    return pricing.quote(
+        items.items(), price_currency, PriceAction.actual_action(), check_stock=True)
+
+
+def checkout(user, price_currency=None):
+    """
+    create the order from the user cart and empty the cart,
+    the products are locked before the stock check, so parallel
+    checkouts can't sell the same units
+    """
+    with transaction.atomic():
+        items = dict(CartItem.objects.select_for_update().filter(
+            cart__client_id=user.id).order_by('id').values_list('product_id', 'count'))
+        if not items:
+            raise ValidationError({'cart': _('The cart is empty')})
+
+        products = Product.live.filter(pk__in=list(items))
+        list(products.select_for_update().order_by('pk').values_list('pk', flat=True))
+        cart_quote = quote(items, price_currency)
+        if not cart_quote['valid']:
+            raise ValidationError({'items': pricing.line_errors(cart_quote)})
+
+        currency = cart_quote['price_currency']
+        order = Order.objects.create(
+            client=user, amount=Money(cart_quote['amount'], currency))
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, product_id=line['product'], count=line['count'],
+                amount=Money(line['amount'], currency))
+            for line in cart_quote['items']])
+
+        products.refresh_stock()
+        CartItem.objects.filter(cart__client_id=user.id).delete()
+        invalidate(user.id)
+
+        publish(OutboxEvent.Topics.ORDER_CREATED, order.id, {
+            'product_ids': list(items)})
+
+    return order
@@ -0,0 +1,135 @@
+"""
+Test case to test the cart
+"""
+
+import datetime
+from decimal import Decimal
+import json
+
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from online_store.orders.models import Order
+from online_store.products.models import Product, Invoice, InvoiceItem
+from online_store.general.test_utils import (get_test_user, ApiTestCase)
+from .models import CartItem
+from . import service
+
+
+class ApiCartTestCase(ApiTestCase):
+    """
+    Test case to test end-points of the cart
+    """
+
+    def setUp(self):
+        """set up data"""
+        self.client = APIClient()
+
+        self.user_client = get_test_user(role='client')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='client')
+        self.set_headers()
+        self.client.delete(reverse('cart'))
+
+        self.products = list(Product.objects.filter(
+            moderation_status=Product.Statuses.APPROVED,
+            price_currency='UAH').order_by('id')[:2])
+        self.invoice = Invoice.objects.create(date=datetime.date.today())
+        for product in self.products:
+            InvoiceItem.objects.create(
+                invoice=self.invoice, product=product, amount=10, price=product.price)
+
+    def tearDown(self):
+        """tear down"""
+        InvoiceItem.objects.filter(invoice=self.invoice).delete()
+        self.invoice.delete()
+        self.client.logout()
+
+    def test_0010_cart_items(self):
+        """
+        end-points cart, cart-items
+        POST, GET, DELETE
+        """
+        for product in self.products:
+            response = self.client.post(
+                reverse('cart-items'), {'product': product.id, 'count': 2}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('cart'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(
+            data['items'],
+            [{'product': product.id, 'count': 2} for product in self.products])
+        # the copy is shared by all workers
+        self.assertEqual(
+            caches['shared'].get(service.cache_key(self.user_client.id)),
+            {product.id: 2 for product in self.products})
+
+        # count 0 removes the product, the cached copy is refreshed
+        response = self.client.post(
+            reverse('cart-items'), {'product': self.products[0].id, 'count': 0},
+            format='json')
+        data = json.loads(response.content)
+        self.assertEqual(data['items'], [{'product': self.products[1].id, 'count': 2}])
+
+        response = self.client.post(
+            reverse('cart-items'), {'product': 0, 'count': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.delete(reverse('cart'))
+        self.assertEqual(json.loads(response.content)['items'], [])
+
+    def test_0020_quote(self):
+        """
+        end-point cart-quote
+        GET
+        """
+        items = {product.id: 3 for product in self.products}
+        for product_id, count in items.items():
+            self.client.post(
+                reverse('cart-items'), {'product': product_id, 'count': count},
+                format='json')
+
+        response = self.client.get(reverse('cart-quote') + '?price_currency=UAH')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertTrue(data['valid'])
+        self.assertEqual([line['product'] for line in data['items']], list(items))
+        self.assertEqual(
+            Decimal(str(data['amount'])),
+            sum(Decimal(str(line['amount'])) for line in data['items']))
+
+        # more than in stock
+        quote = service.quote({self.products[0].id: 11}, 'UAH')
+        self.assertFalse(quote['valid'])
+        self.assertTrue(quote['items'][0]['error'])
+
+        quote = service.quote({0: 1}, 'UAH')
+        self.assertFalse(quote['valid'])
+
+    def test_0030_checkout(self):
+        """
+        end-point cart-checkout
+        POST
+        """
+        response = self.client.post(reverse('cart-checkout'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for product in self.products:
+            self.client.post(
+                reverse('cart-items'), {'product': product.id, 'count': 1}, format='json')
+        quote = service.quote(service.get_items(self.user_client), 'UAH')
+
+        response = self.client.post(
+            reverse('cart-checkout'), {'price_currency': 'UAH'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = json.loads(response.content)
+        self.assertEqual(len(data['items']), len(self.products))
+
+        order = Order.objects.get(pk=data['id'])
+        self.assertEqual(order.amount.amount, quote['amount'])
+        self.assertFalse(CartItem.objects.filter(cart__client=self.user_client).exists())
+        self.assertEqual(service.get_items(self.user_client), {})
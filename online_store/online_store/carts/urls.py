@@ -0,0 +1,14 @@
+"""
+carts urls
+"""
+
+from django.urls import path
+
+from .views import CartView, CartItemView, CartQuoteView, CheckoutView
+
+urlpatterns = [
+    path('', CartView.as_view(), name='cart'),
+    path('items', CartItemView.as_view(), name='cart-items'),
+    path('quote', CartQuoteView.as_view(), name='cart-quote'),
+    path('checkout', CheckoutView.as_view(), name='cart-checkout'),
+]
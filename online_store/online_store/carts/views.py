@@ -0,0 +1,100 @@
+"""
+carts views
+"""
+from logging import getLogger
+
+from django.utils.translation import gettext as _
+
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+
+from online_store.general.db_routers import mark_sticky
+from online_store.orders.serializers import OrderSerializer, items_prefetch
+from online_store.orders.models import Order
+from . import service
+from .serializers import CartItemSerializer, CheckoutSerializer
+
+logger = getLogger(__name__)
+
+
+def cart_data(user):
+    """items of the user cart"""
+    return {'items': [
+        {'product': product_id, 'count': count}
+        for product_id, count in service.get_items(user).items()]}
+
+
+class CartView(APIView):
+    """
+    get: Items of the user cart
+    delete: Remove all items from the cart
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """GET the cart"""
+        return Response(cart_data(request.user))
+
+    def delete(self, request, *args, **kwargs):
+        """empty the cart"""
+        service.clear(request.user)
+        return Response(cart_data(request.user))
+
+
+class CartItemView(APIView):
+    """
+    post: Set count of a product in the cart, count 0 removes the product
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """set count of the product"""
+        serializer = CartItemSerializer(data=request.data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        service.set_item(
+            request.user, serializer.validated_data['product'],
+            serializer.validated_data['count'])
+
+        return Response(cart_data(request.user))
+
+
+class CartQuoteView(APIView):
+    """
+    get: Prices of the cart items with the actual price action and stock,
+    ?price_currency=UAH
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """GET quote of the cart"""
+        return Response(service.quote(
+            service.get_items(request.user),
+            request.query_params.get('price_currency')))
+
+
+class CheckoutView(APIView):
+    """
+    post: Create an order from the cart
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """create the order"""
+        serializer = CheckoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        order = service.checkout(
+            request.user, serializer.validated_data.get('price_currency'))
+        mark_sticky(request.user)
+
+        order = Order.objects.prefetch_related(items_prefetch()).get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,3 @@
+"""
+MySQL backend with a pool of connections.
+"""
@@ -0,0 +1,82 @@
+"""
+MySQL backend which keeps a bounded pool of open connections
+in every worker process. Closing a connection returns it to the pool,
+opening takes a checked connection from the pool, so requests do not
+pay for TCP and authentication handshakes.
+
+Settings of the database:
+POOL_SIZE - max count of idle connections kept by the process
+POOL_RECYCLE - seconds after which a connection is reopened
+"""
+
+import os
+import queue
+import time
+
+from django.db.backends.mysql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """MySQL connection wrapper with pool"""
+    # idle connections by (process id, database alias)
+    pools = {}
+    pool_created_at = None
+
+    @property
+    def pool(self):
+        """pool of this process and database"""
+        key = (os.getpid(), self.alias)
+        if key not in self.pools:
+            self.pools[key] = queue.LifoQueue(
+                maxsize=self.settings_dict.get('POOL_SIZE', 10))
+        return self.pools[key]
+
+    def get_new_connection(self, conn_params):
+        """take a live connection from the pool or open a new one"""
+        recycle = self.settings_dict.get('POOL_RECYCLE', 3600)
+        while True:
+            try:
+                connection, created_at = self.pool.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - created_at < recycle and self._ping(connection):
+                self.pool_created_at = created_at
+                return connection
+            self._discard(connection)
+
+        self.pool_created_at = time.monotonic()
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        """return the connection to the pool"""
+        connection = self.connection
+        if connection is None:
+            return
+        try:
+            # drop unfinished transaction
+            connection.rollback()
+        except base.Database.Error:
+            self._discard(connection)
+            return
+
+        try:
+            self.pool.put_nowait((connection, self.pool_created_at))
+        except queue.Full:
+            self._discard(connection)
+
+    @staticmethod
+    def _ping(connection):
+        """health check of the idle connection"""
+        try:
+            connection.ping()
+        except base.Database.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _discard(connection):
+        """really close the connection"""
+        try:
+            connection.close()
+        except base.Database.Error:
+            pass
@@ -0,0 +1,84 @@
+"""
+Database routers
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.permissions import SAFE_METHODS
+
+# database alias for reading in the current request
+read_database = ContextVar('read_database', default=None)
+
+
+def mark_sticky(user):
+    """
+    the user has written data, read from the primary database
+    for some time to see own changes, the flag is kept in the cache
+    shared by all workers
+    """
+    if settings.REPLICA_DATABASE and user.is_authenticated:
+        caches['shared'].set(
+            f'replica_sticky_{user.id}', True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    """must the user read from the primary database ?"""
+    if not settings.REPLICA_DATABASE or not user.is_authenticated:
+        return False
+    return bool(caches['shared'].get(f'replica_sticky_{user.id}'))
+
+
+async def ais_sticky(user):
+    """must the user read from the primary database ? for async views"""
+    if not settings.REPLICA_DATABASE or not user.is_authenticated:
+        return False
+    return bool(await caches['shared'].aget(f'replica_sticky_{user.id}'))
+
+
+class ReplicaRouter:
+    """
+    Send reads of views with ReplicaReadMixin to the replica database.
+    Other queries use the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        """database for reading"""
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        """database for writing"""
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """replica has the same data"""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """replica is migrated by replication"""
+        if db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Mixin for API views: read-only requests read from the replica,
+    unless the user has recently changed own orders or payments
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """restore the database for reading after the request"""
+        token = read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        """choose the database after authentication"""
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_sticky(request.user):
+            read_database.set(settings.REPLICA_DATABASE)
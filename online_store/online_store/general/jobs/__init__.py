@@ -0,0 +1,3 @@
+"""
+Lightweight database backed queue of background jobs.
+"""
@@ -0,0 +1,29 @@
+"""
+There are Admin Classes to present in admin interface background jobs
+"""
+
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+
+from .models import Job
+
+
+@admin.action(description=_("Restart jobs"))
+def restart_jobs(modeladmin, request, queryset):
+    """action restart_jobs"""
+    queryset.update(status=Job.Statuses.PENDING, attempts=0)
+
+
+class JobAdmin(admin.ModelAdmin):
+    """
+    An JobAdmin object encapsulates an instance of the Job
+    """
+    verbose_name = _('Job')
+    verbose_name_plural = _('Jobs')
+    list_display = (
+        'id', 'name', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ['status', 'name']
+    actions = [restart_jobs]
+
+
+admin.site.register(Job, JobAdmin)
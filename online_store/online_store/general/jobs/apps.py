@@ -0,0 +1,19 @@
+"""
+app jobs
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+from django.utils.translation import gettext_lazy as _
+
+
+class JobsConfig(AppConfig):
+    """config for jobs"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'online_store.general.jobs'
+    label = 'jobs'
+    verbose_name = _('jobs')
+
+    def ready(self):
+        """register job handlers from tasks.py of every application"""
+        autodiscover_modules('tasks')
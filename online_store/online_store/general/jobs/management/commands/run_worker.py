@@ -0,0 +1,45 @@
+"""
+Manage command to run worker of background jobs
+"""
+
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from online_store.general.jobs.service import release_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    """
+    This manage command polls the jobs table and executes ready jobs.
+    Several workers can be started at once.
+    """
+    help = """Run worker of background jobs."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Execute ready jobs and exit')
+        parser.add_argument(
+            '--batch', type=int, default=settings.JOBS_BATCH_SIZE,
+            help='Count of jobs claimed at once')
+        parser.add_argument(
+            '--sleep', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        worker_id = f'{socket.gethostname()}-{os.getpid()}'
+        print(f'Worker {worker_id} is started.')
+
+        while True:
+            release_stale_jobs()
+            count = run_pending(worker_id, limit=kwargs['batch'])
+            if kwargs['once'] and count < kwargs['batch']:
+                break
+            if not count:
+                time.sleep(kwargs['sleep'])
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=128, verbose_name='name')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='payload')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16, verbose_name='status')),
+                ('attempts', models.IntegerField(default=0, verbose_name='attempts')),
+                ('max_attempts', models.IntegerField(default=5, verbose_name='max attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='run after')),
+                ('locked_by', models.CharField(blank=True, max_length=64, null=True, verbose_name='locked by')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'db_table': 'general_job',
+                'indexes': [models.Index(fields=['status', 'run_after'], name='general_job_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+"""
+jobs ORM models
+"""
+
+import logging
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+
+class Job(models.Model):
+    """
+    Background job waiting to be executed by a worker
+    """
+
+    class Statuses(models.TextChoices):
+        PENDING = ("pending", _("Pending"))
+        RUNNING = ("running", _("Running"))
+        DONE = ("done", _("Done"))
+        FAILED = ("failed", _("Failed"))
+
+    name = models.CharField(_("name"), max_length=128, db_index=True)
+    payload = models.JSONField(_("payload"), default=dict, blank=True)
+    status = models.CharField(
+        _("status"), choices=Statuses.choices,
+        max_length=16, default=Statuses.PENDING)
+    attempts = models.IntegerField(_("attempts"), default=0)
+    max_attempts = models.IntegerField(_("max attempts"), default=5)
+    run_after = models.DateTimeField(_("run after"), default=timezone.now)
+    locked_by = models.CharField(
+        _("locked by"), max_length=64, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(_("last error"), null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        db_table = 'general_job'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'], name='general_job_queue_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.id}-{self.name}-{self.status}'
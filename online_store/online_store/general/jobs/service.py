@@ -0,0 +1,119 @@
+"""
+jobs services: registry of handlers, enqueueing and execution
+"""
+
+from datetime import timedelta
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def register(name):
+    """
+    decorator to register function as handler of jobs with this name
+    """
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """
+    put new job into the queue, delay in seconds
+    """
+    if name not in HANDLERS:
+        raise ValueError(f"Job handler {name} is not registered")
+
+    job = Job(
+        name=name,
+        payload=payload or {},
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    job.save()
+
+    return job
+
+
+def claim_jobs(worker_id, limit=None):
+    """
+    lock a batch of ready jobs for this worker.
+    Rows locked by other workers are skipped, so several workers
+    can poll the same table without waiting for each other.
+    """
+    limit = limit or settings.JOBS_BATCH_SIZE
+    now = timezone.now()
+
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.Statuses.PENDING, run_after__lte=now,
+            ).order_by('run_after', 'id')[:limit])
+        if jobs:
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=Job.Statuses.RUNNING, locked_by=worker_id, locked_at=now)
+
+    return jobs
+
+
+def release_stale_jobs():
+    """
+    return to the queue jobs of workers that died while running them
+    """
+    expired = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.Statuses.RUNNING, locked_at__lt=expired,
+    ).update(status=Job.Statuses.PENDING, locked_by=None, locked_at=None)
+
+
+def run_job(job):
+    """
+    execute one claimed job, reschedule it with exponential backoff on error
+    """
+    job.attempts += 1
+    job.locked_by = None
+    job.locked_at = None
+    try:
+        handler = HANDLERS[job.name]
+        with transaction.atomic():
+            handler(**job.payload)
+    except Exception:
+        logger.exception('Job %s failed', job)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.Statuses.FAILED
+        else:
+            job.status = Job.Statuses.PENDING
+            backoff = settings.JOBS_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            job.run_after = timezone.now() + timedelta(seconds=backoff)
+    else:
+        job.status = Job.Statuses.DONE
+        job.last_error = None
+
+    job.save(update_fields=[
+        'status', 'attempts', 'locked_by', 'locked_at', 'last_error',
+        'run_after', 'updated_at'])
+
+    return job
+
+
+def run_pending(worker_id='inline', limit=None):
+    """
+    claim and execute one batch of jobs, return count of executed jobs
+    """
+    jobs = claim_jobs(worker_id, limit=limit)
+    for job in jobs:
+        run_job(job)
+
+    return len(jobs)
@@ -0,0 +1,70 @@
+"""
+Test case to test background jobs
+"""
+
+import unittest
+
+from django.utils import timezone
+
+from .models import Job
+from .service import register, enqueue, run_job, run_pending
+
+CALLS = []
+
+
+@register('tests.append')
+def append_job(value):
+    """test handler"""
+    CALLS.append(value)
+
+
+@register('tests.fail')
+def fail_job():
+    """test handler which always fails"""
+    raise RuntimeError('failed')
+
+
+class JobTestCase(unittest.TestCase):
+    """ unittest test case for jobs"""
+
+    def tearDown(self):
+        """tear down"""
+        Job.objects.filter(name__startswith='tests.').delete()
+
+    def test_00_enqueue(self):
+        """enqueue job"""
+        job = enqueue('tests.append', {'value': 1})
+        self.assertTrue(job.id)
+        self.assertEqual(job.status, Job.Statuses.PENDING)
+
+    def test_10_unknown_job(self):
+        """enqueue job without handler"""
+        with self.assertRaises(ValueError):
+            enqueue('tests.unknown')
+
+    def test_20_run_pending(self):
+        """run ready jobs"""
+        job = enqueue('tests.append', {'value': 'run'})
+        delayed = enqueue('tests.append', {'value': 'later'}, delay=3600)
+
+        self.assertTrue(run_pending(limit=1000))
+        job.refresh_from_db()
+        delayed.refresh_from_db()
+        self.assertEqual(job.status, Job.Statuses.DONE)
+        self.assertEqual(delayed.status, Job.Statuses.PENDING)
+        self.assertIn('run', CALLS)
+        self.assertNotIn('later', CALLS)
+
+    def test_30_retry(self):
+        """failed job is rescheduled and finally marked as failed"""
+        job = enqueue('tests.fail', max_attempts=2)
+
+        run_job(job)
+        self.assertEqual(job.status, Job.Statuses.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue(job.run_after > timezone.now())
+        self.assertTrue(job.last_error)
+
+        run_job(job)
+        self.assertEqual(job.status, Job.Statuses.FAILED)
+        self.assertEqual(job.attempts, 2)
@@ -0,0 +1,56 @@
+"""
+Manage command to compare JSON renderers
+"""
+
+from itertools import cycle, islice
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from online_store.general.renderers import FastJSONRenderer
+from online_store.products.models import Product, PriceAction
+from online_store.products.serializers import ProductListItemSerializer
+
+
+class Command(BaseCommand):
+    """
+    This manage command renders a list of products
+    (ProductListItemSerializer data, products are repeated up to the size)
+    with JSONRenderer and FastJSONRenderer and prints renders/second
+    """
+    help = """Compare JSON renderers on a list of products."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-s', '--size', type=int, default=1000,
+            help='Count of products in the list')
+        parser.add_argument(
+            '-n', '--number', type=int, default=50,
+            help='Count of renders')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        products = list(Product.live.with_available_quantity().select_related(
+            'subcategory').order_by('id'))
+        if not products:
+            print('There are no products')
+            return
+
+        products = list(islice(cycle(products), kwargs['size']))
+        context = {'action': PriceAction.actual_action()}
+        data = ProductListItemSerializer(products, context=context, many=True).data
+
+        results = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            name = renderer.__class__.__name__
+            start = time.perf_counter()
+            for _ in range(kwargs['number']):
+                results[name] = renderer.render(data)
+            rate = kwargs['number'] / (time.perf_counter() - start)
+            print(f"{name}: {rate:.1f} renders/s, {len(results[name])} bytes")
+
+        if len(set(results.values())) != 1:
+            print('The outputs are different')
@@ -0,0 +1,144 @@
+"""
+Manage command to measure throughput of an API end-point
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """
+    This manage command sends GET requests to an end-point through
+    the whole WSGI (or ASGI) stack in this process, including request signals
+    which close or keep database connections, and prints requests/second.
+    With --concurrency WSGI requests are sent by threads
+    like a threaded server, ASGI requests are run by one event loop.
+    """
+    help = """Measure requests per second of an API end-point."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-u', '--url', type=str, default='/products/',
+            help='Path with query string')
+        parser.add_argument(
+            '-n', '--number', type=int, default=200,
+            help='Count of requests')
+        parser.add_argument(
+            '-t', '--token', type=str, help='Access token of user')
+        parser.add_argument(
+            '--compare-persistent', action='store_true',
+            help='Run also with a new database connection per request')
+        parser.add_argument(
+            '-c', '--concurrency', type=int, default=1,
+            help='Count of concurrent requests')
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Send requests through the ASGI handler (async views)')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        if kwargs['asgi']:
+            self.handle_asgi(**kwargs)
+            return
+
+        handler = WSGIHandler()
+        environ = {}
+        setup_testing_defaults(environ)
+        path, _, query = kwargs['url'].partition('?')
+        environ.update({'PATH_INFO': path, 'QUERY_STRING': query})
+        if kwargs['token']:
+            environ['HTTP_AUTHORIZATION'] = f"Bearer {kwargs['token']}"
+
+        settings_dict = connections['default'].settings_dict
+        configured_max_age = settings_dict['CONN_MAX_AGE']
+        runs = [configured_max_age]
+        if kwargs['compare_persistent']:
+            runs = [0, configured_max_age]
+
+        for max_age in runs:
+            settings_dict['CONN_MAX_AGE'] = max_age
+            connections.close_all()
+            rate = self.run(
+                handler, environ, kwargs['number'], kwargs['concurrency'])
+            print(
+                f"{settings_dict['ENGINE']} CONN_MAX_AGE={max_age}: "
+                f"WSGI concurrency={kwargs['concurrency']}: "
+                f"{rate:.1f} requests/s")
+
+        settings_dict['CONN_MAX_AGE'] = configured_max_age
+
+    def handle_asgi(self, **kwargs):
+        """measure requests through the ASGI handler"""
+        path, _, query = kwargs['url'].partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'root_path': '',
+            'query_string': query.encode(), 'headers': [(b'host', b'127.0.0.1')],
+            'server': ('127.0.0.1', 80), 'client': ('127.0.0.1', 50000),
+        }
+        if kwargs['token']:
+            scope['headers'].append(
+                (b'authorization', f"Bearer {kwargs['token']}".encode()))
+
+        rate = asyncio.run(self.run_asgi(
+            ASGIHandler(), scope, kwargs['number'], kwargs['concurrency']))
+        print(
+            f"{connections['default'].settings_dict['ENGINE']} "
+            f"ASGI concurrency={kwargs['concurrency']}: {rate:.1f} requests/s")
+
+    @staticmethod
+    def run(handler, environ, number, concurrency=1):
+        """send requests, return requests per second"""
+        def start_response(status, headers):
+            if not status.startswith('200'):
+                raise RuntimeError(f'Response status {status}')
+
+        def send(_):
+            response = handler(dict(environ), start_response)
+            b''.join(response)
+            # fires request_finished, it closes obsolete connections
+            response.close()
+
+        start = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(concurrency) as executor:
+                list(executor.map(send, range(number)))
+        else:
+            for _ in range(number):
+                send(None)
+
+        return number / (time.perf_counter() - start)
+
+    @staticmethod
+    async def run_asgi(handler, scope, number, concurrency=1):
+        """send requests by the event loop, return requests per second"""
+        requests = iter(range(number))
+
+        async def send(message):
+            if message['type'] == 'http.response.start' and message['status'] != 200:
+                raise RuntimeError(f"Response status {message['status']}")
+
+        async def client():
+            for _ in requests:
+                messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+                async def receive():
+                    if messages:
+                        return messages.pop()
+                    # the client never disconnects
+                    return await asyncio.Event().wait()
+
+                await handler(dict(scope), receive, send)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+        return number / (time.perf_counter() - start)
@@ -0,0 +1,3 @@
+"""
+Transactional outbox of domain events.
+"""
@@ -0,0 +1,22 @@
+"""
+There are Admin Classes to present in admin interface outbox events
+"""
+
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+
+from .models import OutboxEvent
+
+
+class OutboxEventAdmin(admin.ModelAdmin):
+    """
+    An OutboxEventAdmin object encapsulates an instance of the OutboxEvent
+    """
+    verbose_name = _('Outbox event')
+    verbose_name_plural = _('Outbox events')
+    list_display = (
+        'id', 'topic', 'object_id', 'created_at', 'dispatched_at', 'attempts', 'failed_at')
+    list_filter = ['topic', 'created_at', 'failed_at']
+
+
+admin.site.register(OutboxEvent, OutboxEventAdmin)
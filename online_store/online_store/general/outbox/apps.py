@@ -0,0 +1,19 @@
+"""
+app outbox
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxConfig(AppConfig):
+    """config for outbox"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'online_store.general.outbox'
+    label = 'outbox'
+    verbose_name = _('outbox')
+
+    def ready(self):
+        """register event consumers from consumers.py of every application"""
+        autodiscover_modules('consumers')
@@ -0,0 +1,39 @@
+"""
+Manage command to deliver outbox events to consumers
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from online_store.general.outbox.service import dispatch_events
+
+
+class Command(BaseCommand):
+    """
+    This manage command polls the outbox table
+    and delivers new events to registered consumers
+    """
+    help = """Deliver outbox events to consumers."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Deliver ready events and exit')
+        parser.add_argument(
+            '--batch', type=int, default=settings.OUTBOX_BATCH_SIZE,
+            help='Count of events delivered in one transaction')
+        parser.add_argument(
+            '--sleep', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help='Seconds to wait when there are no new events')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        while True:
+            count = dispatch_events(limit=kwargs['batch'])
+            if kwargs['once'] and count < kwargs['batch']:
+                break
+            if not count:
+                time.sleep(kwargs['sleep'])
@@ -0,0 +1,26 @@
+"""
+Manage command to delete old dispatched outbox events
+"""
+
+from django.core.management.base import BaseCommand
+
+from online_store.general.outbox.service import prune_events
+
+
+class Command(BaseCommand):
+    """
+    This manage command deletes events dispatched more than
+    OUTBOX_RETENTION_DAYS ago, failed events are kept,
+    run it periodically (cron)
+    """
+    help = """Delete old dispatched outbox events."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-d', '--days', type=int,
+            help='Days after dispatching, OUTBOX_RETENTION_DAYS by default')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        print(f'Deleted: {prune_events(kwargs["days"])}')
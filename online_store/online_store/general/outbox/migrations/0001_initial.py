@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('order.created', 'Order created'), ('order.paid', 'Order paid'), ('order.rejected', 'Order rejected'), ('stock.changed', 'Stock changed'), ('product.price_changed', 'Product price changed'), ('price_action.changed', 'Price action changed')], db_index=True, max_length=64, verbose_name='topic')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='object id')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='payload')),
+                ('attempts', models.IntegerField(default=0, verbose_name='attempts')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbox event',
+                'verbose_name_plural': 'Outbox events',
+                'db_table': 'general_outbox_event',
+            },
+        ),
+    ]
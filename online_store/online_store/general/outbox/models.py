@@ -0,0 +1,44 @@
+"""
+outbox ORM models
+"""
+
+import logging
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event, stored in the same transaction as the change itself
+    """
+
+    class Topics(models.TextChoices):
+        ORDER_CREATED = ("order.created", _("Order created"))
+        ORDER_PAID = ("order.paid", _("Order paid"))
+        ORDER_REJECTED = ("order.rejected", _("Order rejected"))
+        STOCK_CHANGED = ("stock.changed", _("Stock changed"))
+        PRICE_CHANGED = ("product.price_changed", _("Product price changed"))
+        PRICE_ACTION_CHANGED = ("price_action.changed", _("Price action changed"))
+
+    topic = models.CharField(
+        _("topic"), choices=Topics.choices, max_length=64, db_index=True)
+    object_id = models.BigIntegerField(_("object id"), null=True, blank=True)
+    payload = models.JSONField(_("payload"), default=dict, blank=True)
+    attempts = models.IntegerField(_("attempts"), default=0)
+    last_error = models.TextField(_("last error"), null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # not delivered after OUTBOX_MAX_ATTEMPTS, skipped by the dispatcher
+    failed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Outbox event")
+        verbose_name_plural = _("Outbox events")
+        db_table = 'general_outbox_event'
+
+    def __str__(self) -> str:
+        return f'{self.id}-{self.topic}-{self.object_id}'
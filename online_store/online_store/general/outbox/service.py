@@ -0,0 +1,104 @@
+"""
+outbox services: publishing of events and delivering them to consumers
+"""
+
+from datetime import timedelta
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+CONSUMERS = {}
+
+
+def subscribe(*topics):
+    """
+    decorator to register function as consumer of events with these topics
+    """
+    def decorator(func):
+        for topic in topics:
+            CONSUMERS.setdefault(topic, []).append(func)
+        return func
+    return decorator
+
+
+def publish(topic, object_id=None, payload=None):
+    """
+    store event, call it inside the transaction which changes the data
+    """
+    return OutboxEvent.objects.create(
+        topic=topic, object_id=object_id, payload=payload or {})
+
+
+def publish_many(topic, items):
+    """
+    store events for list of pairs (object_id, payload) by one insert
+    """
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, object_id=object_id, payload=payload or {})
+        for object_id, payload in items])
+
+
+def dispatch_events(limit=None):
+    """
+    deliver one batch of events to consumers in the order of publishing.
+    The batch is locked, so concurrent dispatchers do not interleave.
+    Delivery stops at the first failed event, it is retried next time.
+    After OUTBOX_MAX_ATTEMPTS the event is marked failed and skipped.
+    Return count of delivered events.
+    """
+    limit = limit or settings.OUTBOX_BATCH_SIZE
+    delivered = []
+
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update().filter(
+                dispatched_at__isnull=True, failed_at__isnull=True).order_by('id')[:limit])
+
+        for event in events:
+            try:
+                with transaction.atomic():
+                    for consumer in CONSUMERS.get(event.topic, []):
+                        consumer(event)
+            except Exception:
+                logger.exception('Event %s is not delivered', event)
+                attempts = event.attempts + 1
+                failed = attempts >= settings.OUTBOX_MAX_ATTEMPTS
+                OutboxEvent.objects.filter(pk=event.pk).update(
+                    attempts=attempts,
+                    last_error=traceback.format_exc(),
+                    failed_at=timezone.now() if failed else None)
+                if failed:
+                    logger.error('Event %s is skipped after %s attempts', event, attempts)
+                    continue
+                break
+            delivered.append(event.id)
+
+        if delivered:
+            OutboxEvent.objects.filter(id__in=delivered).update(
+                dispatched_at=timezone.now())
+
+    return len(delivered)
+
+
+def prune_events(days=None, batch_size=1000):
+    """
+    delete events dispatched more than days (OUTBOX_RETENTION_DAYS) ago
+    in batches, failed events are kept.
+    Return count of deleted events
+    """
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    queryset = OutboxEvent.objects.filter(
+        dispatched_at__lt=timezone.now() - timedelta(days=days))
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,105 @@
+"""
+Test case to test outbox events
+"""
+
+from datetime import timedelta
+import unittest
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .models import OutboxEvent
+from .service import CONSUMERS, subscribe, publish, dispatch_events, prune_events
+
+TEST_TOPIC = 'tests.event'
+FAILED_TOPIC = 'tests.failed'
+RECEIVED = []
+
+
+@subscribe(TEST_TOPIC)
+def receive_event(event):
+    """test consumer"""
+    RECEIVED.append(event.object_id)
+
+
+@subscribe(FAILED_TOPIC)
+def fail_event(event):
+    """test consumer which always fails"""
+    raise RuntimeError('failed')
+
+
+class OutboxTestCase(unittest.TestCase):
+    """ unittest test case for outbox"""
+
+    def setUp(self):
+        """set up"""
+        # deliver events published by other tests
+        while dispatch_events():
+            pass
+        RECEIVED.clear()
+
+    def tearDown(self):
+        """tear down"""
+        OutboxEvent.objects.filter(topic__startswith='tests.').delete()
+
+    def test_00_consumers(self):
+        """consumers are registered"""
+        self.assertIn(receive_event, CONSUMERS[TEST_TOPIC])
+        # consumers.py of applications
+        for topic in (
+                OutboxEvent.Topics.STOCK_CHANGED, OutboxEvent.Topics.ORDER_CREATED,
+                OutboxEvent.Topics.ORDER_REJECTED):
+            self.assertTrue(CONSUMERS[topic])
+
+    def test_10_dispatch_in_order(self):
+        """events are delivered in the order of publishing"""
+        for object_id in range(5):
+            publish(TEST_TOPIC, object_id)
+
+        self.assertEqual(dispatch_events(limit=1000), 5)
+        self.assertEqual(RECEIVED, list(range(5)))
+        self.assertFalse(OutboxEvent.objects.filter(
+            topic=TEST_TOPIC, dispatched_at__isnull=True).exists())
+
+    def test_20_stop_on_failure(self):
+        """delivery stops at the failed event"""
+        publish(TEST_TOPIC, 1)
+        failed = publish(FAILED_TOPIC, 2)
+        publish(TEST_TOPIC, 3)
+
+        self.assertEqual(dispatch_events(limit=1000), 1)
+        self.assertEqual(RECEIVED, [1])
+        failed.refresh_from_db()
+        self.assertEqual(failed.attempts, 1)
+        self.assertTrue(failed.last_error)
+        self.assertIsNone(failed.dispatched_at)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_30_skip_failed(self):
+        """the failed event is skipped after max attempts"""
+        failed = publish(FAILED_TOPIC, 1)
+        publish(TEST_TOPIC, 2)
+
+        self.assertEqual(dispatch_events(limit=1000), 0)
+        self.assertEqual(RECEIVED, [])
+        self.assertEqual(dispatch_events(limit=1000), 1)
+        self.assertEqual(RECEIVED, [2])
+        failed.refresh_from_db()
+        self.assertEqual(failed.attempts, 2)
+        self.assertTrue(failed.failed_at)
+        self.assertIsNone(failed.dispatched_at)
+
+    def test_40_prune(self):
+        """old dispatched events are deleted, failed and new ones are kept"""
+        old = publish(TEST_TOPIC, 1)
+        new = publish(TEST_TOPIC, 2)
+        failed = publish(FAILED_TOPIC, 3)
+        long_ago = timezone.now() - timedelta(days=30)
+        OutboxEvent.objects.filter(pk=old.pk).update(dispatched_at=long_ago)
+        OutboxEvent.objects.filter(pk=new.pk).update(dispatched_at=timezone.now())
+        OutboxEvent.objects.filter(pk=failed.pk).update(failed_at=long_ago)
+
+        self.assertGreaterEqual(prune_events(days=7), 1)
+        self.assertEqual(
+            set(OutboxEvent.objects.filter(topic__startswith='tests.').values_list('id', flat=True)),
+            {new.pk, failed.pk})
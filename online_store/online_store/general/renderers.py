@@ -0,0 +1,58 @@
+"""
+API renderers
+"""
+
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from djmoney.money import Money
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    """
+    types unknown to orjson, the same values as the DRF encoder gives
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Money):
+        return float(obj.amount)
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer on orjson: Decimal, Money, UUID and datetimes
+    are encoded without the python JSONEncoder.
+    The output is the same as the output of JSONRenderer.
+    It falls back to JSONRenderer if orjson is not installed,
+    for indented or not compact or ascii output and for data orjson can't encode.
+    Set it in renderer_classes of a view or in DEFAULT_RENDERER_CLASSES
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """render data into JSON bytes"""
+        if (orjson is None or not self.compact or self.ensure_ascii or self.get_indent(
+                accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escape \u2028 and \u2029 like JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
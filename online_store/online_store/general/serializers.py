@@ -0,0 +1,189 @@
+"""
+general serializers
+"""
+
+from functools import lru_cache
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
+from rest_framework import serializers
+
+DATETIME_FIELD = serializers.DateTimeField()
+
+# columns which are big to transfer and slow to decode
+HEAVY_FIELD_TYPES = (models.TextField, models.JSONField, models.BinaryField)
+
+
+def datetime_representation(value):
+    """datetime like DateTimeField of DRF"""
+    return DATETIME_FIELD.to_representation(value)
+
+
+def get_query_list(request, param):
+    """
+    names from comma separated query param, e.g. ?fields=id,name
+    """
+    value = request.query_params.get(param)
+    if not value or value == 'undefined':
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+@lru_cache(maxsize=None)
+def get_heavy_fields(serializer_class, prefix=''):
+    """
+    heavy columns of the serializer model which the serializer doesn't output:
+    its declared fields and Meta.field_sources are checked.
+    prefix is the lookup of the model in a queryset, e.g. 'product__'
+    """
+    meta = serializer_class.Meta
+    used = set()
+    for name, field in serializer_class().fields.items():
+        used.update((name, field.source))
+    for lookups in getattr(meta, 'field_sources', {}).values():
+        used.update(lookup.split('__', 1)[0] for lookup in lookups)
+
+    return tuple(
+        f'{prefix}{field.name}' for field in meta.model._meta.concrete_fields
+        if isinstance(field, HEAVY_FIELD_TYPES) and field.name not in used)
+
+
+def defer_heavy_fields(queryset, serializer_class, prefix=''):
+    """
+    defer heavy columns which the serializer doesn't output,
+    e.g. defer_heavy_fields(OrderItem.objects.select_related('product'),
+    ProductShortSerializer, 'product__')
+    """
+    heavy_fields = get_heavy_fields(serializer_class, prefix)
+    if heavy_fields:
+        return queryset.defer(*heavy_fields)
+    return queryset
+
+
+class ValuesListSerializer:
+    """
+    Read-only serializer for lists: it builds dicts from rows of
+    queryset.values() without model instances and DRF fields.
+    Subclasses give the same data as their model serializers.
+
+    fields: output field name -> lookups of queryset.values() it needs.
+    A field is the value of its first lookup, or the result
+    of the method get_<field name>(row).
+    annotations: output field name -> queryset method which annotates it
+    """
+    fields = {}
+    annotations = {}
+
+    def __init__(self, rows, context=None, many=True, fields=None):
+        self.rows = rows
+        self.context = context or {}
+        self.getters = [
+            (name, getattr(self, f'get_{name}', None) or itemgetter(self.fields[name][0]))
+            for name in self.get_field_names(fields)]
+
+    @classmethod
+    def get_field_names(cls, fields=None):
+        """output fields, all or the requested ones"""
+        if not fields:
+            return list(cls.fields)
+        return [name for name in cls.fields if name in fields]
+
+    @classmethod
+    def values_queryset(cls, queryset, fields=None):
+        """queryset of rows for this serializer"""
+        names = cls.get_field_names(fields)
+        for name in names:
+            if name in cls.annotations:
+                queryset = getattr(queryset, cls.annotations[name])()
+        lookups = dict.fromkeys(lookup for name in names for lookup in cls.fields[name])
+        return queryset.values(*lookups)
+
+    def to_representation(self, row):
+        """dict for one row"""
+        return {name: getter(row) for name, getter in self.getters}
+
+    @property
+    def data(self):
+        """list of dicts"""
+        to_representation = self.to_representation
+        return [to_representation(row) for row in self.rows]
+
+
+class SparseFieldsMixin:
+    """
+    Mixin for model serializers, arguments:
+    fields - names of fields to keep (?fields=),
+    expand - names of fields to replace by nested objects (?expand=).
+
+    Meta options:
+    expandable - field name -> callable which returns the nested serializer,
+    field_sources - field name -> model fields which a method field reads,
+    field_annotations - field name -> queryset method which annotates it,
+    field_prefetch - field name -> lookup or callable which returns
+    a Prefetch for prefetch_related
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, 'expandable', {})
+        expand = [name for name in expand or () if name in expandable]
+        for name in expand:
+            self.fields[name] = expandable[name]()
+
+        if fields:
+            keep = set(fields) | set(expand)
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=None, required=()):
+        """
+        queryset which loads only the model columns and relations
+        which the kept fields use, and the required model fields
+        """
+        meta = cls.Meta
+        opts = meta.model._meta
+        sources = getattr(meta, 'field_sources', {})
+        annotations = getattr(meta, 'field_annotations', {})
+        prefetch = getattr(meta, 'field_prefetch', {})
+
+        expand = expand or ()
+        only = [opts.pk.name, *required]
+        related = []
+        narrow = True
+        for name, field in cls(fields=fields, expand=expand).fields.items():
+            if name in annotations:
+                queryset = getattr(queryset, annotations[name])()
+                continue
+            if name in sources and name not in expand:
+                for lookup in sources[name]:
+                    only.append(lookup)
+                    if '__' in lookup:
+                        related.append(lookup.rsplit('__', 1)[0])
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                # it is not known which columns the field reads
+                narrow = False
+                continue
+            if model_field.one_to_many or model_field.many_to_many:
+                lookup = prefetch.get(name, name)
+                queryset = queryset.prefetch_related(lookup() if callable(lookup) else lookup)
+                continue
+            only.append(model_field.name)
+            if model_field.many_to_one and name in expand:
+                related.append(model_field.name)
+            currency_field = f'{model_field.name}_currency'
+            if any(f.name == currency_field for f in opts.concrete_fields):
+                only.append(currency_field)
+
+        if narrow:
+            # related objects which the kept fields don't use are not joined
+            return queryset.select_related(None).select_related(*related).only(*only)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
@@ -10,6 +10,7 @@ import unittest
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.urls import reverse
 
 from rest_framework import status
@@ -39,6 +40,8 @@ class ApiTestCase(unittest.TestCase):
                 username = self.user_admin.username
                 password = settings.API_TEST_ADMIN_PASSWORD
 
+        # tests sign in much more often than sign in throttling allows
+        caches['throttle'].clear()
         response = self.client.post(
             reverse('signin'),
             {
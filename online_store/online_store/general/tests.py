@@ -0,0 +1,170 @@
+"""
+Test case to test general utilities
+"""
+
+import datetime
+from decimal import Decimal
+import importlib.util
+import time
+import unittest
+from unittest import mock
+import uuid
+
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.renderers import JSONRenderer
+
+from djmoney.money import Money
+
+from online_store.products.models import Product, PriceAction
+from online_store.products.serializers import ProductListItemSerializer
+from .renderers import FastJSONRenderer
+
+
+class RendererTestCase(unittest.TestCase):
+    """ unittest test case for JSON renderers"""
+
+    def test_00_types(self):
+        """the same output as JSONRenderer"""
+        data = {
+            'decimal': Decimal('10.50'),
+            'uuid': uuid.uuid4(),
+            'datetime': datetime.datetime(2024, 6, 1, 10, 5, 3, 12, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2024, 6, 1, 10, 5),
+            'date': datetime.date(2024, 6, 1),
+            'lazy': _('name'),
+            'text': 'Каска\u2028\u2029',
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_10_money(self):
+        """Money is rendered as its amount"""
+        self.assertEqual(
+            FastJSONRenderer().render({'price': Money('12.30', 'UAH')}),
+            b'{"price":12.3}')
+
+    def test_20_indent(self):
+        """indented output by JSONRenderer"""
+        data = {'id': 1}
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_30_products(self):
+        """list of products"""
+        products = Product.objects.with_available_quantity().select_related('subcategory')
+        context = {'action': PriceAction.actual_action()}
+        data = ProductListItemSerializer(products, context=context, many=True).data
+        self.assertTrue(data)
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class FakeConnection:
+    """MySQL connection which only records the calls"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self):
+        """fails if the connection is broken"""
+        if self.error:
+            raise self.error
+
+    def rollback(self):
+        """fails if the connection is broken"""
+        self.rollbacks += 1
+        if self.error:
+            raise self.error
+
+    def close(self):
+        """really closed"""
+        self.closed = True
+
+
+@unittest.skipUnless(importlib.util.find_spec('MySQLdb'), 'mysqlclient is not installed')
+class PoolTestCase(unittest.TestCase):
+    """ unittest test case for MySQL backend with pool"""
+
+    def setUp(self):
+        """wrapper with its own pool and no real connections"""
+        # pylint: disable=import-outside-toplevel
+        from .db_backends.mysql_pool import base
+
+        self.base = base
+        self.opened = []
+        settings_dict = {
+            'NAME': 'test', 'POOL_SIZE': 1, 'POOL_RECYCLE': 60,
+            'OPTIONS': {}, 'TIME_ZONE': None, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True}
+        alias = f'pool-{uuid.uuid4()}'
+        self.wrappers = [
+            base.DatabaseWrapper(settings_dict, alias) for _ in range(2)]
+        patcher = mock.patch.object(
+            base.base.DatabaseWrapper, 'get_new_connection', self.open_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_connection(self, conn_params):  # pylint: disable=unused-argument
+        """new connection instead of MySQLdb.connect"""
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def checkout(self, wrapper):
+        """connection taken by the wrapper"""
+        wrapper.connection = wrapper.get_new_connection({})
+        return wrapper.connection
+
+    def test_00_checkout_return(self):
+        """closed connection is reused by the next checkout"""
+        wrapper = self.wrappers[0]
+        connection = self.checkout(wrapper)
+        wrapper._close()  # pylint: disable=protected-access
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertFalse(connection.closed)
+
+        self.assertIs(self.checkout(self.wrappers[1]), connection)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_10_recycle(self):
+        """old connection is closed and reopened"""
+        wrapper = self.wrappers[0]
+        connection = self.checkout(wrapper)
+        wrapper.pool_created_at = time.monotonic() - 61
+        wrapper._close()  # pylint: disable=protected-access
+
+        self.assertIsNot(self.checkout(wrapper), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_20_broken(self):
+        """broken connection is not returned and not reused"""
+        wrapper = self.wrappers[0]
+        connection = self.checkout(wrapper)
+        connection.error = self.base.base.Database.OperationalError()
+        wrapper._close()  # pylint: disable=protected-access
+        self.assertTrue(connection.closed)
+        self.assertTrue(wrapper.pool.empty())
+
+        connection = self.checkout(wrapper)
+        wrapper._close()  # pylint: disable=protected-access
+        connection.error = self.base.base.Database.OperationalError()
+        self.assertIsNot(self.checkout(wrapper), connection)
+        self.assertTrue(connection.closed)
+
+    def test_30_exhaustion(self):
+        """empty pool opens new connections, full pool closes the extra ones"""
+        first, second = [self.checkout(wrapper) for wrapper in self.wrappers]
+        self.assertIsNot(first, second)
+
+        for wrapper in self.wrappers:
+            wrapper._close()  # pylint: disable=protected-access
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(self.wrappers[0].pool.qsize(), 1)
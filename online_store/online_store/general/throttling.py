@@ -0,0 +1,119 @@
+"""
+Throttling of expensive endpoints with token buckets
+"""
+
+import hashlib
+import time
+
+from django.core.cache import caches
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket kept in the cache 'throttle'.
+    The rate 'N/period' means a bucket of N tokens, refilled with
+    N tokens per period. A check reads and writes one cache key,
+    it does not depend on the count of previous requests.
+    The read and write of the bucket are done under a lock key made
+    by the atomic cache.add, a client which holds the lock with parallel
+    requests for longer than LOCK_WAIT seconds is rejected.
+
+    The rate is taken from DEFAULT_THROTTLE_RATES by the key
+    '<view.throttle_scope>_<scope_suffix>', views without
+    the scope or without the rate are not throttled.
+    """
+    cache = caches['throttle']
+    scope_suffix = None
+    LOCK_SECONDS = 5
+    LOCK_WAIT = 0.2
+
+    def __init__(self):
+        """the rate is known only when the view is known"""
+        self.tokens = None
+
+    def get_ident_value(self, request):
+        """value identifying the client, must be overridden"""
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_cache_key(self, request, view):
+        """cache key of the bucket"""
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        ident = hashlib.sha1(ident.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        """take one token from the bucket"""
+        view_scope = getattr(view, 'throttle_scope', None)
+        if not view_scope:
+            return True
+
+        self.scope = f'{view_scope}_{self.scope_suffix}'
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock = f'{self.key}:lock'
+        if not self.acquire(lock):
+            self.tokens = 0
+            return False
+        try:
+            self.now = self.timer()
+            tokens, updated = self.cache.get(self.key, (self.num_requests, self.now))
+            refill = (self.now - updated) * self.num_requests / self.duration
+            self.tokens = min(self.num_requests, tokens + refill)
+
+            allowed = self.tokens >= 1
+            if allowed:
+                self.tokens -= 1
+            self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        finally:
+            self.cache.delete(lock)
+
+        return allowed
+
+    def acquire(self, lock):
+        """wait for the lock of the bucket"""
+        deadline = time.monotonic() + self.LOCK_WAIT
+        while not self.cache.add(lock, 1, self.LOCK_SECONDS):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def wait(self):
+        """seconds until the next token"""
+        if self.tokens is None or self.tokens >= 1:
+            return None
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """bucket per client IP address"""
+    scope_suffix = 'ip'
+
+    def get_ident_value(self, request):
+        """client IP address"""
+        return self.get_ident(request)
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """bucket per user name from the request data"""
+    scope_suffix = 'username'
+
+    def get_ident_value(self, request):
+        """user name from the request data"""
+        if not isinstance(request.data, dict):
+            return None
+        username = request.data.get('username')
+        if isinstance(username, str):
+            return username.strip().lower()
+        return None
@@ -5,7 +5,8 @@ There are Admin Classes to present in admin interface objects related to product
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Order, OrderItem, Payment
+from online_store.products.models import Product
+from .models import Order, OrderItem, Payment, ProductValuation
 
 
 class PaymentAdmin(admin.ModelAdmin):
@@ -41,5 +42,38 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = (OrderItemInline, )
     list_filter = ['moderation_status', 'created_at']
 
+    def save_related(self, request, form, formsets, change):
+        """recalculate the stock of products of the order before and after the change"""
+        items = OrderItem.objects.filter(order=form.instance)
+        product_ids = set(items.values_list('product_id', flat=True))
+        super().save_related(request, form, formsets, change)
+        product_ids.update(items.values_list('product_id', flat=True))
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
+    def delete_model(self, request, obj):
+        """items of the deleted order are not ordered anymore"""
+        product_ids = list(obj.items.values_list('product_id', flat=True))
+        super().delete_model(request, obj)
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
+    def delete_queryset(self, request, queryset):
+        """items of the deleted orders are not ordered anymore"""
+        product_ids = list(OrderItem.objects.filter(
+            order__in=queryset).values_list('product_id', flat=True))
+        super().delete_queryset(request, queryset)
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
 
 admin.site.register(Order, OrderAdmin)
+
+
+class ProductValuationAdmin(admin.ModelAdmin):
+    """
+    An ProductValuationAdmin object encapsulates an instance of the ProductValuation
+    """
+    list_display = (
+        'id', 'product', 'quantity', 'sold_count', 'revenue', 'cogs_fifo', 'cogs_average')
+    raw_id_fields = ('product',)
+
+
+admin.site.register(ProductValuation, ProductValuationAdmin)
@@ -0,0 +1,33 @@
+"""
+Manage command to update the cost of goods sold
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from online_store.orders.valuation import update_valuation
+
+
+class Command(BaseCommand):
+    """
+    This manage command processes purchases and sales after
+    the last run and updates FIFO and average cost of goods sold,
+    run it periodically (cron) or with --loop
+    """
+    help = """Update the cost of goods sold of products."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help='Repeat every LOOP seconds')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        while True:
+            purchases, sales = update_valuation()
+            print(f'Purchases: {purchases}, sales: {sales}')
+            if not kwargs['loop']:
+                break
+            time.sleep(kwargs['loop'])
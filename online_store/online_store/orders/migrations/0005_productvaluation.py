@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_alter_order_moderation_status'),
+        ('products', '0010_productpricehistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoices_until', models.DateTimeField(blank=True, null=True)),
+                ('last_invoice_item_id', models.BigIntegerField(default=0)),
+                ('orders_until', models.DateTimeField(blank=True, null=True)),
+                ('last_order_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Valuation checkpoint',
+                'verbose_name_plural': 'Valuation checkpoints',
+                'db_table': 'orders_valuation_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0, verbose_name='quantity')),
+                ('layers', models.JSONField(blank=True, default=list, verbose_name='FIFO layers')),
+                ('average_cost', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='average cost')),
+                ('sold_count', models.IntegerField(default=0, verbose_name='sold count')),
+                ('uncosted_count', models.IntegerField(default=0, verbose_name='uncosted count')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='revenue')),
+                ('cogs_fifo', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='cost of goods sold by FIFO')),
+                ('cogs_average', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='cost of goods sold by average cost')),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='products.product', verbose_name='product')),
+            ],
+            options={
+                'verbose_name': 'Product valuation',
+                'verbose_name_plural': 'Product valuations',
+                'db_table': 'orders_product_valuation',
+            },
+        ),
+    ]
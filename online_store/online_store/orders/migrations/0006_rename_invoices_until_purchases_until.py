@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_productvaluation'),
+        ('products', '0014_invoiceitem_created_at'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='valuationcheckpoint',
+            old_name='invoices_until',
+            new_name='purchases_until',
+        ),
+    ]
@@ -108,3 +108,58 @@ class Payment(models.Model):
 
     def __str__(self) -> str:
         return f'{self.uuid}-{self.client.username}'
+
+
+class ProductValuation(models.Model):
+    """
+    Cost of goods sold of a product by FIFO and by the moving average
+    cost, amounts are in settings.BASE_CURRENCY.
+    It is updated by orders.valuation.update_valuation
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE,
+        related_name='valuation', verbose_name=_('product'))
+    # quantity in stock and FIFO layers [[quantity, unit cost]]
+    quantity = models.IntegerField(_('quantity'), default=0)
+    layers = models.JSONField(_('FIFO layers'), default=list, blank=True)
+    average_cost = models.DecimalField(
+        _('average cost'), max_digits=20, decimal_places=6, default=0)
+    sold_count = models.IntegerField(_('sold count'), default=0)
+    # sold without purchases, valued by the average cost
+    uncosted_count = models.IntegerField(_('uncosted count'), default=0)
+    revenue = models.DecimalField(_('revenue'), max_digits=18, decimal_places=2, default=0)
+    cogs_fifo = models.DecimalField(
+        _('cost of goods sold by FIFO'), max_digits=18, decimal_places=2, default=0)
+    cogs_average = models.DecimalField(
+        _('cost of goods sold by average cost'), max_digits=18, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Product valuation")
+        verbose_name_plural = _("Product valuations")
+        db_table = 'orders_product_valuation'
+
+    def __str__(self) -> str:
+        return f'{self.product_id}-{self.quantity}'
+
+
+class ValuationCheckpoint(models.Model):
+    """
+    Last purchase (invoice item created_at and id) and the last sale
+    (order paid_at and id) processed by the valuation, one row
+    """
+    purchases_until = models.DateTimeField(null=True, blank=True)
+    last_invoice_item_id = models.BigIntegerField(default=0)
+    orders_until = models.DateTimeField(null=True, blank=True)
+    last_order_id = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Valuation checkpoint")
+        verbose_name_plural = _("Valuation checkpoints")
+        db_table = 'orders_valuation_checkpoint'
+
+    def __str__(self) -> str:
+        return f'{self.purchases_until}-{self.orders_until}'
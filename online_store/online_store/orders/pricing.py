@@ -0,0 +1,99 @@
+"""
+orders pricing
+
+Prices of order lines and their total in exact decimals.
+The unit price is the catalogue price with the discount
+of the price action (products.serializers.actual_price),
+the line amount is the unit price multiplied by the count.
+Used by order creation and by the cart quote.
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.utils.translation import gettext as _
+
+from online_store.products.models import Product
+from online_store.products.serializers import actual_price
+
+
+def price_items(items, products, price_currency=None, action=None, check_stock=False):
+    """
+    price of items [(product id, count)] in one pass.
+    products: product id -> product with price, price_currency,
+    moderation_status and, for check_stock, available_quantity.
+    price_currency: currency of the order, by default the currency
+    of the first product; products priced in another currency are errors.
+    Lines with errors are not added to the amount
+    """
+    items = list(items)
+    if price_currency is None:
+        price_currency = next(
+            (products[pk].price_currency for pk, _count in items if pk in products), None)
+
+    # the stock is checked for the total count of a product
+    totals = Counter()
+    for product_id, count in items:
+        totals[product_id] += count
+
+    lines = []
+    amount = Decimal(0)
+    for product_id, count in items:
+        line = {'product': product_id, 'count': count, 'error': None}
+        lines.append(line)
+        product = products.get(product_id)
+        if product is None:
+            line['error'] = _('Product does not exist')
+            continue
+        if product.price is None:
+            line['error'] = _('Product is not available')
+            continue
+
+        price = product.price.amount
+        line.update({
+            'name': product.name,
+            'price': price,
+            'actual_price': actual_price(price, action),
+        })
+        line['amount'] = line['actual_price'] * count
+        if check_stock:
+            line['available_quantity'] = product.available_quantity
+
+        if product.moderation_status != Product.Statuses.APPROVED:
+            line['error'] = _('Product is not available')
+        elif product.price_currency != price_currency:
+            line['error'] = _('Price of the product is in %s') % product.price_currency
+        elif check_stock and totals[product_id] > product.available_quantity:
+            line['error'] = _('Not enough products in stock')
+        else:
+            amount += line['amount']
+
+    return {
+        'items': lines,
+        'amount': amount,
+        'price_currency': price_currency,
+        'discount': action.discount if action else 0,
+        'valid': bool(lines) and not any(line['error'] for line in lines),
+    }
+
+
+def quote(items, price_currency=None, action=None, check_stock=False):
+    """
+    price of items [(product id, count)],
+    the products and their stock are read by one query
+    """
+    items = list(items)
+    queryset = Product.live.all()
+    if check_stock:
+        queryset = queryset.with_available_quantity()
+    products = queryset.only(
+        'id', 'name', 'price', 'price_currency', 'moderation_status').in_bulk(
+            {product_id for product_id, _count in items})
+    return price_items(items, products, price_currency, action, check_stock)
+
+
+def line_errors(pricing):
+    """errors of the lines for ValidationError"""
+    return [
+        f"{line['product']}: {line['error']}"
+        for line in pricing['items'] if line['error']]
@@ -2,9 +2,11 @@
 orders serializers
 """
 
-from decimal import Decimal
+from functools import partial
 # from pprint import pprint
 
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.utils import timezone
 # from django.utils.translation import gettext as _
 
@@ -12,8 +14,13 @@ from rest_framework import serializers
 
 from djmoney.money import Money
 
-from online_store.products.serializers import ProductShortSerializer
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish
+from online_store.general.serializers import (
+    SparseFieldsMixin, ValuesListSerializer, datetime_representation)
+from online_store.products.serializers import ProductShortSerializer, with_short_products
 from online_store.products.models import Product
+from . import pricing
 from .models import Order, OrderItem, Payment
 
 
@@ -22,7 +29,7 @@ class OrderItemSerializer(serializers.Serializer):
     Order item
     """
     product = serializers.IntegerField()
-    count = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=1)
 
 
 class CreateOrderSerializer(serializers.Serializer):
@@ -37,42 +44,39 @@ class CreateOrderSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         """custom creating"""
+        order_pricing = pricing.quote(
+            [(item['product'], item['count']) for item in validated_data['items']],
+            validated_data['price_currency'], self.context.get('action'))
+        if not order_pricing['valid']:
+            raise serializers.ValidationError({'items': pricing.line_errors(order_pricing)})
+        currency = order_pricing['price_currency']
 
         order = Order.objects.create(
             client=self.context['user'],
+            amount=Money(order_pricing['amount'], currency),
         )
-        currency = validated_data['price_currency']
-        amount = 0
-        for item in validated_data['items']:
-            product = Product.objects.get(pk=item['product'])
-            count = item['count']
-
-            action = self.context.get('action')
-            product_amount = product.price.amount
-            if action:
-                discount = action.discount
-                product_amount = amount * Decimal((100.0 - discount) / 100.0)
-            product_amount = product_amount * Decimal(count)
-            amount += product_amount
-
-            OrderItem.objects.create(
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
-                product=product,
-                count=count,
-                amount=Money(product_amount, currency)
-            )
+                product_id=line['product'],
+                count=line['count'],
+                amount=Money(line['amount'], currency))
+            for line in order_pricing['items']])
+        product_ids = [item['product'] for item in validated_data['items']]
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
+        publish(OutboxEvent.Topics.ORDER_CREATED, order.id, {
+            'product_ids': product_ids})
 
-            order.amount = Money(amount, currency)
-            order.save()
         return order
 
     def validate(self, attrs):
         """custom validating"""
-        for item in attrs['items']:
-            product = Product.objects.filter(pk=item['product']).first()
-            if product is None:
-                raise serializers.ValidationError(
-                    {'product': f"Product {item['product']} does not exist"})
+        product_ids = {item['product'] for item in attrs['items']}
+        existing = set(Product.live.filter(pk__in=product_ids).values_list('id', flat=True))
+        for product_id in product_ids - existing:
+            raise serializers.ValidationError(
+                {'product': f"Product {product_id} does not exist"})
 
         return attrs
 
@@ -86,6 +90,28 @@ class OrderItemOutSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'amount']
 
 
+class ClientShortSerializer(serializers.ModelSerializer):
+    """Client short data"""
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+
+ORDER_EXPANDABLE = {
+    'client': partial(ClientShortSerializer, read_only=True),
+    'items': partial(OrderItemOutSerializer, many=True, read_only=True),
+}
+
+
+def items_prefetch():
+    """order items with short products"""
+    return Prefetch('items', queryset=with_short_products(OrderItem.objects.all()))
+
+
+ORDER_ITEMS_PREFETCH = {'items': items_prefetch}
+
+
 class OrderSerializer(serializers.ModelSerializer):
     """Order"""
     items = OrderItemOutSerializer(many=True)
@@ -95,12 +121,49 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'uuid', 'created_at', 'items']
 
 
-class OrderListItemSerializer(serializers.ModelSerializer):
+class OrderListItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Order"""
 
     class Meta:
         model = Order
         fields = '__all__'
+        expandable = ORDER_EXPANDABLE
+        field_prefetch = ORDER_ITEMS_PREFETCH
+
+
+class OrderListItemValuesSerializer(ValuesListSerializer):
+    """Order like OrderListItemSerializer"""
+    fields = {
+        'id': ('id',),
+        'uuid': ('uuid',),
+        'amount_currency': ('amount_currency',),
+        'amount': ('amount',),
+        'moderation_status': ('moderation_status',),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+        'paid_at': ('paid_at',),
+        'client': ('client_id',),
+    }
+
+    @staticmethod
+    def get_uuid(row):
+        """getter for uuid"""
+        return str(row['uuid'])
+
+    @staticmethod
+    def get_created_at(row):
+        """getter for created at"""
+        return datetime_representation(row['created_at'])
+
+    @staticmethod
+    def get_updated_at(row):
+        """getter for updated at"""
+        return datetime_representation(row['updated_at'])
+
+    @staticmethod
+    def get_paid_at(row):
+        """getter for paid at"""
+        return datetime_representation(row['paid_at'])
 
 
 class SoldProductListSerializer(serializers.ModelSerializer):
@@ -146,13 +209,89 @@ class SoldProductListSerializer(serializers.ModelSerializer):
             return obj.order.paid_at.strftime('%Y-%m-%d')
 
 
-class OrderFullSerializer(serializers.ModelSerializer):
+class SoldProductListValuesSerializer(ValuesListSerializer):
+    """Sold Product like SoldProductListSerializer"""
+    fields = {
+        'id': ('id',),
+        'product': ('product_id',),
+        'amount': ('amount',),
+        'count': ('count',),
+        'client': ('order__client__username',),
+        'client_id': ('order__client_id',),
+        'order_id': ('order_id',),
+        'paid_at': ('order__paid_at',),
+    }
+
+    @staticmethod
+    def get_paid_at(row):
+        """getter for paid date"""
+        paid_at = row['order__paid_at']
+        return paid_at.strftime('%Y-%m-%d') if paid_at else None
+
+
+class MarginValuesMixin:
+    """margins from revenue and cost of goods sold"""
+
+    @staticmethod
+    def get_margin_fifo(row):
+        """getter for margin by FIFO"""
+        return row['revenue'] - row['cogs_fifo']
+
+    @staticmethod
+    def get_margin_average(row):
+        """getter for margin by average cost"""
+        return row['revenue'] - row['cogs_average']
+
+    @staticmethod
+    def get_margin_percent(row):
+        """getter for margin by FIFO in percents of revenue"""
+        if not row['revenue']:
+            return None
+        return round((row['revenue'] - row['cogs_fifo']) * 100 / row['revenue'], 2)
+
+
+MARGIN_FIELDS = {
+    'sold_count': ('sold_count',),
+    'uncosted_count': ('uncosted_count',),
+    'revenue': ('revenue',),
+    'cogs_fifo': ('cogs_fifo',),
+    'cogs_average': ('cogs_average',),
+    'margin_fifo': ('revenue', 'cogs_fifo'),
+    'margin_average': ('revenue', 'cogs_average'),
+    'margin_percent': ('revenue', 'cogs_fifo'),
+}
+
+
+class ProductMarginValuesSerializer(MarginValuesMixin, ValuesListSerializer):
+    """Margin of a product"""
+    fields = {
+        'product': ('product_id',),
+        'name': ('product__name',),
+        'subcategory': ('product__subcategory__slug',),
+        **MARGIN_FIELDS,
+    }
+
+
+class CategoryMarginValuesSerializer(MarginValuesMixin, ValuesListSerializer):
+    """
+    Margin of a category, rows are categories annotated
+    with sums of valuations of their products
+    """
+    fields = {
+        'category': ('slug',),
+        **MARGIN_FIELDS,
+    }
+
+
+class OrderFullSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Order full data"""
     items = OrderItemOutSerializer(many=True)
 
     class Meta:
         model = Order
         fields = '__all__'
+        expandable = {'client': ORDER_EXPANDABLE['client']}
+        field_prefetch = ORDER_ITEMS_PREFETCH
 
 
 class PaymentListItemSerializer(serializers.ModelSerializer):
@@ -183,6 +322,11 @@ class CreatePaymentSerializer(serializers.Serializer):
         order.paid_at = timezone.now()
         order.save()
 
+        publish(OutboxEvent.Topics.ORDER_PAID, order.id, {
+            'payment_id': payment.id,
+            'amount': str(payment.amount.amount),
+            'currency': payment.amount.currency.code})
+
         return payment
 
     def validate(self, attrs):
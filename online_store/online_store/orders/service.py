@@ -2,6 +2,9 @@
 orders services
 """
 
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish_many
+from online_store.products.models import Product
 from .models import Order, OrderItem
 
 
@@ -9,7 +12,16 @@ def cancel_orders_by_product(product):
     """
     cancel new orders for deleted product
     """
-    for order_item in OrderItem.objects.filter(product=product).filter(
-            order__moderation_status=Order.Statuses.NEW):
-        order_item.order.status = Order.Statuses.REJECTED_BY_MANAGER
-        order_item.order.save()
+    orders = Order.objects.filter(
+        items__product=product, moderation_status=Order.Statuses.NEW)
+    order_ids = list(orders.values_list('id', flat=True).distinct())
+
+    Order.objects.filter(id__in=order_ids).update(
+        moderation_status=Order.Statuses.REJECTED_BY_MANAGER)
+    Product.all_objects.filter(pk__in=OrderItem.objects.filter(
+        order__in=order_ids).values('product_id')).refresh_stock()
+    publish_many(OutboxEvent.Topics.ORDER_REJECTED, [
+        (order_id, {'status': Order.Statuses.REJECTED_BY_MANAGER})
+        for order_id in order_ids])
+
+    return len(order_ids)
@@ -0,0 +1,17 @@
+"""
+orders background jobs
+"""
+
+from online_store.general.jobs.service import register
+from online_store.products.models import Product
+from .service import cancel_orders_by_product
+
+
+@register('orders.cancel_orders_by_product')
+def cancel_orders_by_product_job(product_id):
+    """
+    cancel new orders for deleted product
+    """
+    product = Product.all_objects.filter(pk=product_id).first()
+    if product is not None:
+        cancel_orders_by_product(product)
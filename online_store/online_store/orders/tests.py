@@ -2,20 +2,164 @@
 Test case to test models related to orders
 """
 
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
 import json
 from pprint import pprint
 import random
+from types import SimpleNamespace
+import unittest
 
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from online_store.products.models import Product
-from .models import Order
+from djmoney.money import Money
+
+from online_store.general.db_routers import ReplicaRouter, is_sticky
+from online_store.products.models import (
+    Invoice, InvoiceItem, Product, PriceAction, SubCategory)
+from . import pricing, valuation
+from .models import Order, OrderItem, ProductValuation
+from .serializers import (
+    OrderListItemSerializer, OrderListItemValuesSerializer,
+    SoldProductListSerializer, SoldProductListValuesSerializer)
 from online_store.general.test_utils import (get_test_user, ApiTestCase)
 
 
+class PricingTestCase(unittest.TestCase):
+    """
+    Properties of the pricing on random carts
+    """
+
+    def random_products(self, rnd, count):
+        """products with random prices"""
+        return {
+            product_id: SimpleNamespace(
+                name=f'product {product_id}',
+                price=Money(Decimal(rnd.randint(1, 10 ** 8)) / 100, 'UAH'),
+                price_currency='UAH',
+                moderation_status=Product.Statuses.APPROVED,
+                available_quantity=rnd.randint(0, 20))
+            for product_id in range(1, count + 1)}
+
+    def test_0010_exact_amounts(self):
+        """
+        unit prices are exact discounted prices rounded half up,
+        the amount is the sum of the lines
+        """
+        rnd = random.Random(42)
+        for _ in range(300):
+            products = self.random_products(rnd, 10)
+            items = [(rnd.randint(1, 10), rnd.randint(1, 50)) for _ in range(rnd.randint(1, 8))]
+            discount = rnd.choice([0, 1, 3, 15, 33, 50, 99, 100])
+            action = PriceAction(discount=discount) if discount else None
+
+            result = pricing.price_items(items, products, 'UAH', action)
+            self.assertTrue(result['valid'])
+            self.assertEqual(result['amount'], sum(line['amount'] for line in result['items']))
+            self.assertEqual([(line['product'], line['count']) for line in result['items']], items)
+            for line in result['items']:
+                price = products[line['product']].price.amount
+                exact = Fraction(price) * (100 - discount) / 100
+                expected = Decimal(exact.numerator) / Decimal(exact.denominator)
+                expected = expected.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                self.assertEqual(line['actual_price'], expected)
+                self.assertLessEqual(line['actual_price'], price)
+                self.assertEqual(line['amount'], line['actual_price'] * line['count'])
+                self.assertIsInstance(line['amount'], Decimal)
+
+    def test_0020_errors(self):
+        """lines with errors are not added to the amount"""
+        rnd = random.Random(7)
+        for _ in range(100):
+            products = self.random_products(rnd, 5)
+            products[2].price_currency = 'USD'
+            products[3].moderation_status = Product.Statuses.PENDING
+            items = [(rnd.randint(1, 6), rnd.randint(1, 30)) for _ in range(rnd.randint(1, 8))]
+
+            result = pricing.price_items(items, products, 'UAH', check_stock=True)
+            totals = {}
+            for product_id, count in items:
+                totals[product_id] = totals.get(product_id, 0) + count
+            for line in result['items']:
+                product = products.get(line['product'])
+                bad = (product is None or line['product'] in (2, 3)
+                       or totals[line['product']] > product.available_quantity)
+                self.assertEqual(bool(line['error']), bad)
+            self.assertEqual(result['amount'], sum(
+                line['amount'] for line in result['items'] if not line['error']))
+            self.assertEqual(result['valid'], not any(line['error'] for line in result['items']))
+
+    def test_0030_currency(self):
+        """the currency of the first product is the default currency"""
+        products = self.random_products(random.Random(1), 2)
+        products[1].price_currency = 'USD'
+        result = pricing.price_items([(1, 1), (2, 1)], products)
+        self.assertEqual(result['price_currency'], 'USD')
+        self.assertFalse(result['valid'])
+        self.assertEqual(pricing.line_errors(result), ['2: Price of the product is in UAH'])
+
+
+class ValuationTestCase(unittest.TestCase):
+    """
+    Cost of goods sold by FIFO and by the average cost
+    """
+
+    def test_0010_fifo_and_average(self):
+        """sales take the oldest layers, the average cost is moving"""
+        state = ProductValuation()
+        moment = timezone.now()
+        valuation.apply_events(state, [
+            (moment, valuation.SALE, 1, 12, Decimal('1800')),
+            (moment, valuation.PURCHASE, 1, 10, Decimal('100')),
+            (moment, valuation.PURCHASE, 2, 5, Decimal('130')),
+        ])
+        self.assertEqual(state.cogs_fifo, Decimal('1260'))
+        self.assertEqual(state.cogs_average, Decimal('1320'))
+        self.assertEqual(state.revenue, Decimal('1800'))
+        self.assertEqual((state.quantity, state.sold_count, state.uncosted_count), (3, 12, 0))
+        self.assertEqual(state.layers, [[3, '130']])
+
+        # two products are sold without purchases
+        valuation.apply_events(state, [
+            (moment + timedelta(seconds=1), valuation.SALE, 2, 5, Decimal('750'))])
+        self.assertEqual(state.cogs_fifo, Decimal('1260') + 3 * 130 + 2 * 110)
+        self.assertEqual(state.cogs_average, Decimal('1320') + 5 * 110)
+        self.assertEqual((state.quantity, state.uncosted_count), (0, 2))
+        self.assertEqual(state.layers, [])
+
+    def test_0020_random_events(self):
+        """FIFO cost of sold products is the cost of the oldest purchases"""
+        rnd = random.Random(7)
+        moment = timezone.now()
+        for _ in range(100):
+            events = []
+            units = []
+            for index in range(rnd.randint(1, 30)):
+                count = rnd.randint(1, 10)
+                if rnd.random() < 0.5:
+                    cost = Decimal(rnd.randint(1, 10 ** 5)) / 100
+                    events.append((moment, valuation.PURCHASE, index, count, cost))
+                    units.extend([cost] * count)
+                else:
+                    events.append((moment, valuation.SALE, index, count, Decimal(count)))
+            state = ProductValuation()
+            valuation.apply_events(state, events)
+
+            sold = min(state.sold_count, len(units))
+            self.assertEqual(state.uncosted_count, state.sold_count - sold)
+            self.assertEqual(state.quantity, len(units) - sold)
+            self.assertEqual(sum(count for count, _cost in state.layers), state.quantity)
+            if not state.uncosted_count:
+                self.assertEqual(state.cogs_fifo, sum(units[:sold], Decimal(0)))
+
+
 class ApiOrdersTestCase(ApiTestCase):
     """
     Test case to test end-points of Mapster orders API
@@ -163,3 +307,165 @@ class ApiOrdersTestCase(ApiTestCase):
         result = results[0]
         self.assertTrue(result['id'])
         self.assertTrue(result['amount'])
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_0070_read_your_writes(self):
+        """
+        the client reads from the primary database after own order
+        """
+        self.assertIsNone(ReplicaRouter().db_for_read(Order))
+
+        data = self.order_data()
+        response = self.client.post(reverse('orders'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_sticky(self.user_client))
+
+    def test_0080_values_serializers(self):
+        """values serializers give the same JSON as model serializers"""
+        renderer = JSONRenderer()
+        cases = (
+            (Order.objects.order_by('-id'),
+             OrderListItemSerializer, OrderListItemValuesSerializer),
+            (OrderItem.objects.filter(order__paid_at__isnull=False).order_by('id'),
+             SoldProductListSerializer, SoldProductListValuesSerializer),
+        )
+        for queryset, serializer_class, values_serializer_class in cases:
+            expected = serializer_class(queryset, many=True).data
+            self.assertTrue(expected)
+            data = values_serializer_class(
+                values_serializer_class.values_queryset(queryset)).data
+            self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_0090_sparse_fields(self):
+        """
+        end-points orders and order by id
+        GET with ?fields= and ?expand=
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        response = self.client.get(reverse('orders') + '?fields=id,amount')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(set(data[0]), {'id', 'amount'})
+
+        response = self.client.get(reverse('orders') + '?fields=id&expand=items,client')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(set(data[0]), {'id', 'items', 'client'})
+        self.assertTrue(data[0]['client']['username'])
+
+        response = self.client.post(reverse('orders'), self.order_data(), format='json')
+        order_id = json.loads(response.content)['id']
+        response = self.client.get(
+            reverse('get_order_by_id', args=[order_id]) + '?fields=id,items&expand=client')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(set(data), {'id', 'items', 'client'})
+        self.assertTrue(data['items'][0]['product']['name'])
+
+    def test_0100_order_amount(self):
+        """
+        end-point orders
+        POST with an active price action, amounts of the order and its items
+        """
+        action = PriceAction.objects.create(
+            date='2100-01-01', discount=15, active=True)
+        try:
+            products = list(Product.objects.visible().order_by('id')[:2])
+            data = {'items': [
+                {'product': products[0].id, 'count': 3},
+                {'product': products[1].id, 'count': 1},
+                {'product': products[0].id, 'count': 2},
+            ], 'price_currency': 'UAH'}
+            response = self.client.post(reverse('orders'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            order = Order.objects.get(pk=json.loads(response.content)['id'])
+        finally:
+            action.delete()
+
+        expected = pricing.price_items(
+            [(item['product'], item['count']) for item in data['items']],
+            {product.id: product for product in products}, 'UAH', action)
+        self.assertEqual(order.amount.amount, expected['amount'])
+        self.assertEqual(
+            sorted(order.items.values_list('amount', flat=True)),
+            sorted(line['amount'] for line in expected['items']))
+
+        data['price_currency'] = 'USD'
+        response = self.client.post(reverse('orders'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_0110_margin(self):
+        """
+        end-point margin
+        GET margins after update_valuation
+        """
+        product = Product.objects.create(
+            name='Каска маржа', subcategory=SubCategory.objects.get(slug='kaski'),
+            price=Money(150, 'UAH'), moderation_status=Product.Statuses.APPROVED)
+        invoice = Invoice.objects.create(date=timezone.now().date())
+        order = None
+        try:
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem(invoice=invoice, product=product, amount=10, price=Money(100, 'UAH')),
+                InvoiceItem(invoice=invoice, product=product, amount=5, price=Money(130, 'UAH')),
+            ])
+            order = Order.objects.create(
+                client=self.user_client, amount=Money(1800, 'UAH'),
+                moderation_status=Order.Statuses.PAID, paid_at=timezone.now())
+            OrderItem.objects.create(
+                order=order, product=product, count=12, amount=Money(1800, 'UAH'))
+
+            # events of the last VALUATION_DELAY_SECONDS are not processed
+            with override_settings(VALUATION_DELAY_SECONDS=3600):
+                valuation.update_valuation()
+            self.assertFalse(ProductValuation.objects.filter(product=product).exists())
+
+            purchases, sales = valuation.update_valuation(until=timezone.now())
+            self.assertGreaterEqual((purchases, sales), (2, 1))
+            state = ProductValuation.objects.get(product=product)
+            self.assertEqual(state.revenue, Decimal('1800'))
+            self.assertEqual(state.cogs_fifo, Decimal('1260'))
+            self.assertEqual(state.cogs_average, Decimal('1320'))
+            self.assertEqual(valuation.update_valuation(until=timezone.now()), (0, 0))
+
+            # an item added later to the invoice is valued,
+            # an item without the exchange rate stops the run before it
+            InvoiceItem.objects.create(
+                invoice=invoice, product=product, amount=2, price=Money(110, 'UAH'))
+            unrated = InvoiceItem.objects.create(
+                invoice=invoice, product=product, amount=1, price=Money(1, 'XTS'))
+            with self.assertLogs(valuation.logger, 'WARNING'):
+                self.assertEqual(valuation.update_valuation(until=timezone.now()), (1, 0))
+            self.assertEqual(valuation.update_valuation(until=timezone.now()), (0, 0))
+            state.refresh_from_db()
+            self.assertEqual(state.quantity, 5)
+            unrated.delete()
+
+            response = self.client.get(reverse('margin'))
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+            self.user_manager = get_test_user(role='manager')
+            self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+            self.set_headers()
+
+            response = self.client.get(reverse('margin') + '?subcategory=kaski&limit=100')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows = {row['product']: row for row in json.loads(response.content)['results']}
+            self.assertEqual(rows[product.id]['margin_fifo'], 540)
+            self.assertEqual(rows[product.id]['margin_average'], 480)
+
+            response = self.client.get(reverse('margin') + '?group=category&category=alpinism')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)['results']
+            self.assertEqual([row['category'] for row in data], ['alpinism'])
+            self.assertGreaterEqual(data[0]['revenue'], 1800)
+        finally:
+            if order:
+                order.items.all().delete()
+                order.delete()
+            invoice.items.all().delete()
+            invoice.delete()
+            product.delete()
@@ -0,0 +1,194 @@
+"""
+orders valuation
+
+Cost of goods sold of products by FIFO and by the moving average cost.
+Purchases are invoice items (InvoiceItem.price is the unit cost),
+sales are items of paid orders, amounts are converted to
+settings.BASE_CURRENCY. A run reads only purchases and sales after
+the checkpoint, one query for each, and applies them in memory
+product by product, the states are saved in bulk.
+Purchases follow the creation of invoice items, so items added
+to an old invoice are valued too.
+Events of the last VALUATION_DELAY_SECONDS are left for the next run,
+so transactions which commit late are not skipped. Events in a currency
+without a rate are not valued at zero: the run stops before the first
+of them and logs the currency, the next run goes on after the rate is set.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+import logging
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from online_store.products.models import InvoiceItem
+from online_store.products.rates import CENT, to_base
+from .models import Order, OrderItem, ProductValuation, ValuationCheckpoint
+
+logger = logging.getLogger(__name__)
+
+PURCHASE, SALE = 0, 1
+ZERO = Decimal(0)
+AVERAGE_COST_PLACES = Decimal('0.000001')
+
+VALUATION_FIELDS = (
+    'quantity', 'layers', 'average_cost', 'sold_count', 'uncosted_count',
+    'revenue', 'cogs_fifo', 'cogs_average', 'updated_at')
+
+
+def new_purchases(checkpoint, until):
+    """invoice items created after the checkpoint in the order of processing"""
+    queryset = InvoiceItem.objects.filter(
+        product__isnull=False, invoice__isnull=False, created_at__lte=until)
+    if checkpoint.purchases_until:
+        queryset = queryset.filter(
+            Q(created_at__gt=checkpoint.purchases_until)
+            | Q(created_at=checkpoint.purchases_until,
+                id__gt=checkpoint.last_invoice_item_id))
+    return list(queryset.order_by('created_at', 'id').values_list(
+        'id', 'created_at', 'product_id', 'amount', 'price', 'price_currency'))
+
+
+def new_sales(checkpoint, until):
+    """items of orders paid after the checkpoint in the order of processing"""
+    queryset = OrderItem.objects.filter(
+        product__isnull=False, order__moderation_status=Order.Statuses.PAID,
+        order__paid_at__lte=until)
+    if checkpoint.orders_until:
+        queryset = queryset.filter(
+            Q(order__paid_at__gt=checkpoint.orders_until)
+            | Q(order__paid_at=checkpoint.orders_until,
+                order_id__gt=checkpoint.last_order_id))
+    return list(queryset.order_by('order__paid_at', 'order_id', 'id').values_list(
+        'order_id', 'order__paid_at', 'product_id', 'count', 'amount', 'amount_currency'))
+
+
+def base_events(rows, kind):
+    """
+    events [(product id, (moment, kind, id, count, value))] with values
+    in the base currency, they end before the first row in a currency
+    without a rate, which is returned as (moment, currency) or None
+    """
+    events = []
+    for row_id, moment, product_id, count, amount, currency in rows:
+        value = to_base(amount, currency)
+        if value is None and amount is not None:
+            return events, (moment, currency)
+        events.append((product_id, (moment, kind, row_id, count, value or ZERO)))
+    return events, None
+
+
+def purchase(state, layers, count, unit_cost):
+    """add purchased products to the stock"""
+    quantity = state.quantity + count
+    state.average_cost = (
+        (state.quantity * state.average_cost + count * unit_cost) / quantity
+    ).quantize(AVERAGE_COST_PLACES)
+    state.quantity = quantity
+    layers.append([count, unit_cost])
+
+
+def sale(state, layers, count, revenue):
+    """
+    take sold products from the oldest layers, products
+    sold without purchases are valued by the average cost
+    """
+    cogs = ZERO
+    remaining = count
+    while remaining and layers:
+        layer = layers[0]
+        taken = min(remaining, layer[0])
+        cogs += taken * layer[1]
+        layer[0] -= taken
+        remaining -= taken
+        if not layer[0]:
+            layers.pop(0)
+    if remaining:
+        state.uncosted_count += remaining
+        cogs += remaining * state.average_cost
+
+    state.cogs_fifo += cogs.quantize(CENT)
+    state.cogs_average += (count * state.average_cost).quantize(CENT)
+    state.revenue += revenue
+    state.sold_count += count
+    state.quantity = max(state.quantity - count, 0)
+
+
+def apply_events(state, events):
+    """apply purchases and sales of one product in the order of time"""
+    layers = [[quantity, Decimal(cost)] for quantity, cost in state.layers]
+    # defaults of a new state are not decimals
+    state.average_cost = Decimal(state.average_cost)
+    # purchases go before sales of the same moment
+    for _moment, kind, _id, count, value in sorted(events, key=itemgetter(0, 1, 2)):
+        if count <= 0:
+            continue
+        if kind == PURCHASE:
+            purchase(state, layers, count, value)
+        else:
+            sale(state, layers, count, value)
+    state.layers = [[quantity, str(cost)] for quantity, cost in layers]
+
+
+def update_valuation(until=None):
+    """
+    process purchases and sales after the checkpoint,
+    till now - VALUATION_DELAY_SECONDS by default.
+    Concurrent runs wait for each other on the checkpoint row.
+    Return counts of processed purchases and sales
+    """
+    if until is None:
+        until = timezone.now() - timedelta(seconds=settings.VALUATION_DELAY_SECONDS)
+
+    with transaction.atomic():
+        ValuationCheckpoint.objects.get_or_create(pk=1)
+        checkpoint = ValuationCheckpoint.objects.select_for_update().get(pk=1)
+
+        purchases, missing_purchase = base_events(new_purchases(checkpoint, until), PURCHASE)
+        sales, missing_sale = base_events(new_sales(checkpoint, until), SALE)
+        missing = min(filter(None, (missing_purchase, missing_sale)), default=None)
+        if missing:
+            # both streams stop at the same moment to keep the order of events
+            moment, currency = missing
+            logger.warning(
+                'No exchange rate for %s, valuation waits from %s', currency, moment)
+            purchases = [event for event in purchases if event[1][0] < moment]
+            sales = [event for event in sales if event[1][0] < moment]
+        if not purchases and not sales:
+            return 0, 0
+
+        events = defaultdict(list)
+        for product_id, event in purchases + sales:
+            events[product_id].append(event)
+
+        states = {
+            state.product_id: state
+            for state in ProductValuation.objects.filter(product_id__in=list(events))}
+        created = []
+        now = timezone.now()
+        for product_id, product_events in events.items():
+            state = states.get(product_id)
+            if state is None:
+                state = ProductValuation(product_id=product_id)
+                created.append(state)
+            apply_events(state, product_events)
+            state.updated_at = now
+
+        ProductValuation.objects.bulk_create(created)
+        ProductValuation.objects.bulk_update(
+            [state for state in states.values()], VALUATION_FIELDS, batch_size=1000)
+
+        if purchases:
+            moment, _kind, checkpoint.last_invoice_item_id = purchases[-1][1][:3]
+            checkpoint.purchases_until = moment
+        if sales:
+            moment, _kind, checkpoint.last_order_id = sales[-1][1][:3]
+            checkpoint.orders_until = moment
+        checkpoint.save()
+
+    return len(purchases), len(sales)
@@ -6,6 +6,7 @@ from logging import getLogger
 # from pprint import pprint
 
 from django.db import transaction
+from django.db.models import Sum
 from django.utils.translation import gettext as _
 #
 from rest_framework.exceptions import ValidationError, MethodNotAllowed
@@ -17,15 +18,21 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 
+from online_store.general.db_routers import ReplicaReadMixin, mark_sticky
 from online_store.general.error_messages import ORDER_NOT_FOUND, ACCESS_DENIED
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish
 from online_store.general.permissions import IsManager
-from online_store.products.models import PriceAction
-from .models import Order, OrderItem, Payment
+from online_store.general.serializers import get_query_list
+from online_store.products.models import Category, PriceAction, Product
+from .models import Order, OrderItem, Payment, ProductValuation
 from .serializers import (
+    ProductMarginValuesSerializer, CategoryMarginValuesSerializer,
     OrderSerializer, OrderListItemSerializer,
     CreateOrderSerializer, OrderFullSerializer, PaymentSerializer,
     PaymentListItemSerializer, CreatePaymentSerializer, SoldProductListSerializer,
-    FilterPaidProductsSerializer,
+    FilterPaidProductsSerializer, OrderListItemValuesSerializer,
+    SoldProductListValuesSerializer, items_prefetch,
 )
 
 logger = getLogger(__name__)
@@ -65,9 +72,18 @@ class OrderView(APIView, LimitOffsetPagination):
         if not user.userprofile.has_manager_permission():
             qs = qs.filter(client=user)
 
+        # ?fields=id,amount&expand=items,client
+        fields = get_query_list(request, 'fields')
+        expand = get_query_list(request, 'expand')
         context = {'user': user}
-        data = OrderListItemSerializer(
-            qs, context=context, many=True).data
+        if expand:
+            data = OrderListItemSerializer(
+                OrderListItemSerializer.optimize_queryset(qs, fields, expand),
+                context=context, many=True, fields=fields, expand=expand).data
+        else:
+            data = OrderListItemValuesSerializer(
+                OrderListItemValuesSerializer.values_queryset(qs, fields),
+                context=context, fields=fields).data
 
         return Response(data)
 
@@ -89,10 +105,12 @@ class OrderView(APIView, LimitOffsetPagination):
         order = None
         with transaction.atomic():
             order = serializer.save()
+        mark_sticky(user)
 
         if order:
             return Response(
-                OrderSerializer(order).data,
+                OrderSerializer(Order.objects.prefetch_related(
+                    items_prefetch()).get(pk=order.pk)).data,
                 status=status.HTTP_201_CREATED)
         else:
             raise ValidationError(
@@ -125,8 +143,14 @@ class OrderByIdView(RetrieveUpdateDestroyAPIView):
     def get(self, request, *args, **kwargs):
         """get one order by id """
         user = self.request.user
-        order = Order.objects.filter(
-            pk=kwargs['pk']).exclude(
+        # ?fields=id,amount,items&expand=client
+        fields = get_query_list(request, 'fields')
+        expand = get_query_list(request, 'expand')
+        serializer_class = self.get_serializer_class()
+
+        order = serializer_class.optimize_queryset(
+            Order.objects.filter(pk=kwargs['pk']), fields, expand,
+            required=('moderation_status', 'client')).exclude(
                 moderation_status=Order.Statuses.REJECTED).first()
         if order is None:
             return Response(ORDER_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
@@ -138,9 +162,9 @@ class OrderByIdView(RetrieveUpdateDestroyAPIView):
         if order.client != user and not user.userprofile.has_manager_permission():
             return Response(ACCESS_DENIED, status=status.HTTP_403_FORBIDDEN)
 
-        serializer_class = self.get_serializer_class()
         context = self.get_serializer_context()
-        return Response(serializer_class(order, context=context).data)
+        return Response(serializer_class(
+            order, context=context, fields=fields, expand=expand).data)
 
     def delete(self, request, pk):
         """delete (set status) one order by id """
@@ -160,7 +184,12 @@ class OrderByIdView(RetrieveUpdateDestroyAPIView):
             if user.userprofile.has_manager_permission():
                 order.moderation_status = Order.Statuses.REJECTED_BY_MANAGER
 
-        order.save()
+        with transaction.atomic():
+            order.save()
+            Product.all_objects.filter(pk__in=order.items.values('product_id')).refresh_stock()
+            publish(OutboxEvent.Topics.ORDER_REJECTED, order.id, {
+                'status': order.moderation_status})
+        mark_sticky(order.client)
 
         return Response("Success")
 
@@ -223,6 +252,7 @@ class PaymentView(APIView, LimitOffsetPagination):
         payment = None
         with transaction.atomic():
             payment = serializer.save()
+        mark_sticky(user)
 
         if payment:
             return Response(
@@ -233,7 +263,7 @@ class PaymentView(APIView, LimitOffsetPagination):
                 _("Something went wrong"), status=status.HTTP_400_BAD_REQUEST)
 
 
-class SoldProductView(APIView, LimitOffsetPagination):
+class SoldProductView(ReplicaReadMixin, APIView, LimitOffsetPagination):
     """
     GET sold products
     """
@@ -315,15 +345,53 @@ class SoldProductView(APIView, LimitOffsetPagination):
             orderby = '-' + orderby
 
         filtered_queryset = filtered_queryset.distinct()
-        # paginate the filtered queryset
-        filtered_queryset = self.paginate_queryset(
-            filtered_queryset, request, view=self)
+        # paginate the filtered queryset, rows are dicts, not models
+        rows = self.paginate_queryset(
+            SoldProductListValuesSerializer.values_queryset(filtered_queryset),
+            request, view=self)
 
         # serialize the filtered queryset
         context = {'user': user}
-        data = SoldProductListSerializer(
-            filtered_queryset, context=context, many=True).data
+        data = SoldProductListValuesSerializer(rows, context=context).data
 
         response = self.get_paginated_response(data)
 
         return response
+
+
+class MarginView(ReplicaReadMixin, APIView, LimitOffsetPagination):
+    """
+    GET margin of sold products by FIFO and average cost,
+    ?group=category for categories, ?category=alpinism&subcategory=kaski.
+    The cost of goods sold is updated by the command update_valuation
+    """
+    permission_classes = [IsManager]
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        """GET margins"""
+        categories = get_query_list(request, 'category')
+        subcategories = get_query_list(request, 'subcategory')
+
+        if request.query_params.get('group') == 'category':
+            serializer_class = CategoryMarginValuesSerializer
+            prefix = 'sub_categories__products__valuation__'
+            queryset = Category.objects.annotate(**{
+                name: Sum(prefix + name) for name in (
+                    'sold_count', 'uncosted_count', 'revenue', 'cogs_fifo', 'cogs_average')
+            }).filter(sold_count__gt=0).order_by('-revenue', 'slug')
+            if categories:
+                queryset = queryset.filter(slug__in=categories)
+        else:
+            serializer_class = ProductMarginValuesSerializer
+            queryset = ProductValuation.objects.filter(
+                sold_count__gt=0).order_by('-revenue', 'product_id')
+            if categories:
+                queryset = queryset.filter(product__subcategory__category__slug__in=categories)
+            if subcategories:
+                queryset = queryset.filter(product__subcategory__slug__in=subcategories)
+
+        rows = self.paginate_queryset(
+            serializer_class.values_queryset(queryset), request, view=self)
+
+        return self.get_paginated_response(serializer_class(rows).data)
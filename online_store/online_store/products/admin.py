@@ -5,7 +5,10 @@ There are Admin Classes to present in admin interface objects related to product
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import SubCategory, Category, Product, Invoice, InvoiceItem, PriceAction
+from .models import (
+    SubCategory, Category, Product, Invoice, InvoiceItem, PriceAction, ExchangeRate,
+    ProductPriceHistory, ArchivedProduct)
+from .rates import set_rates
 
 
 @admin.action(description=_("Approve moderation"))
@@ -27,7 +30,7 @@ class ProductAdmin(admin.ModelAdmin):
     verbose_name = _('Product')
     verbose_name_plural = _('Products')
     list_display = (
-        'id', 'name', 'moderation_status')
+        'id', 'name', 'moderation_status', 'stock')
     search_fields = ('name', 'description')
     list_filter = ['subcategory', 'moderation_status']
     actions = [approve_moderation, reject_moderation]
@@ -57,7 +60,7 @@ class SubCategoryAdmin(admin.ModelAdmin):
     verbose_name = _('Subcategory')
     verbose_name_plural = _('Subcategories')
     list_display = (
-        'id', 'slug', 'name', 'category')
+        'id', 'slug', 'name', 'category', 'low_stock_threshold')
     search_fields = ('name', 'slug')
     list_filter = ['category']
 
@@ -67,11 +70,18 @@ admin.site.register(SubCategory, SubCategoryAdmin)
 
 class InvoiceItemInline(admin.StackedInline):
     """
-    Inline admin class to present Invoice Item
+    Inline admin class to present Invoice Item.
+    Saved items are read-only, they may be valued already,
+    corrections are added as new items
     """
     model = InvoiceItem
     verbose_name = 'Invoice Item'
     verbose_name_plural = 'Invoice Items'
+    readonly_fields = ('created_at',)
+
+    def has_change_permission(self, request, obj=None):
+        """saved items are not changed"""
+        return False
 
 
 class InvoiceAdmin(admin.ModelAdmin):
@@ -83,6 +93,14 @@ class InvoiceAdmin(admin.ModelAdmin):
         'id', 'date', 'uuid')
     inlines = (InvoiceItemInline, )
 
+    def save_related(self, request, form, formsets, change):
+        """recalculate the stock of products of the invoice before and after the change"""
+        items = InvoiceItem.objects.filter(invoice=form.instance)
+        product_ids = set(items.values_list('product_id', flat=True))
+        super().save_related(request, form, formsets, change)
+        product_ids.update(items.values_list('product_id', flat=True))
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
 
 admin.site.register(Invoice, InvoiceAdmin)
 
@@ -100,3 +118,70 @@ class PriceActionAdmin(admin.ModelAdmin):
 
 
 admin.site.register(PriceAction, PriceActionAdmin)
+
+
+class ExchangeRateAdmin(admin.ModelAdmin):
+    """
+    An ExchangeRateAdmin object encapsulates an instance of the ExchangeRate
+    """
+    verbose_name = _('Exchange rate')
+    verbose_name_plural = _('Exchange rates')
+    list_display = (
+        'id', 'currency', 'rate', 'updated_at')
+    search_fields = ('currency',)
+
+    def save_model(self, request, obj, form, change):
+        """save the rate and recalculate prices in the base currency"""
+        super().save_model(request, obj, form, change)
+        set_rates({obj.currency: obj.rate})
+
+
+admin.site.register(ExchangeRate, ExchangeRateAdmin)
+
+
+class ProductPriceHistoryAdmin(admin.ModelAdmin):
+    """
+    An ProductPriceHistoryAdmin object encapsulates an instance of the ProductPriceHistory,
+    the history is read-only
+    """
+    verbose_name = _('Product price history')
+    verbose_name_plural = _('Product price history')
+    list_display = (
+        'id', 'product', 'price', 'valid_from')
+    raw_id_fields = ('product',)
+    ordering = ['-valid_from', '-id']
+
+    def has_add_permission(self, request):
+        """read-only"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """read-only"""
+        return False
+
+
+admin.site.register(ProductPriceHistory, ProductPriceHistoryAdmin)
+
+
+class ArchivedProductAdmin(admin.ModelAdmin):
+    """
+    An ArchivedProductAdmin object encapsulates an instance of the ArchivedProduct,
+    the archive is read-only
+    """
+    verbose_name = _('Archived product')
+    verbose_name_plural = _('Archived products')
+    list_display = (
+        'id', 'name', 'sku', 'deleted_at', 'archived_at')
+    search_fields = ('name', 'sku')
+    ordering = ['-archived_at', '-id']
+
+    def has_add_permission(self, request):
+        """read-only"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """read-only"""
+        return False
+
+
+admin.site.register(ArchivedProduct, ArchivedProductAdmin)
@@ -0,0 +1,155 @@
+"""
+products async views
+
+Read-only catalogue end-points for an ASGI server
+(uvicorn or daphne with online_store.asgi:application).
+They use the async ORM and don't hold a worker thread
+while waiting for the database. The responses are the same
+as the responses of the sync views.
+Authentication is not needed: the end-points are public
+and the serializers don't use the user. The bearer token, if any,
+is only read to send the user who has recently written data
+to the primary database, as the sync views do.
+"""
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+
+from rest_framework import status
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from online_store.accounts.authentication import ClaimsUser
+from online_store.general.db_routers import ais_sticky, read_database
+from online_store.general.error_messages import PRODUCT_NOT_FOUND
+from online_store.general.renderers import FastJSONRenderer
+from .filters import PRICE_RANGE, filter_products, price_range
+from .models import Category, Product, PriceAction
+from .serializers import (
+    CategorySerializer, ProductListItemValuesSerializer, ProductFullSerializer)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """response rendered like a DRF response"""
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status_code,
+        content_type='application/json')
+
+
+async def actual_action():
+    """last active price action"""
+    return await PriceAction.objects.filter(
+        active=True).order_by('date').alast()
+
+
+class AsyncCatalogueView(View):
+    """
+    Base async view: GET only, reads from the replica
+    """
+    http_method_names = ['get', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        """read from the replica database, if it is configured"""
+        token = read_database.set(await self.get_read_database(request))
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(token)
+
+    @staticmethod
+    def get_token_user(request):
+        """user from the claims of a valid bearer token, without a query"""
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        try:
+            validated_token = authentication.get_validated_token(raw_token)
+        except InvalidToken:
+            return None
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return None
+        return ClaimsUser(validated_token)
+
+    async def get_read_database(self, request):
+        """replica, unless the user has recently written data"""
+        if not settings.REPLICA_DATABASE:
+            return None
+        user = self.get_token_user(request)
+        if user is not None and await ais_sticky(user):
+            return None
+        return settings.REPLICA_DATABASE
+
+    @staticmethod
+    async def paginate(request, queryset, serializer_class, context):
+        """
+        paginated data in the format of LimitOffsetPagination
+        """
+        paginator = LimitOffsetPagination()
+        drf_request = Request(request)
+        paginator.request = drf_request
+        paginator.limit = paginator.get_limit(drf_request)
+        paginator.offset = paginator.get_offset(drf_request)
+        paginator.count = await queryset.acount()
+
+        if paginator.limit is None:
+            page = queryset
+        else:
+            page = queryset[paginator.offset:paginator.offset + paginator.limit]
+        objects = [obj async for obj in page]
+
+        data = serializer_class(objects, context=context, many=True).data
+        return paginator.get_paginated_response(data).data
+
+
+class AsyncCategoriesView(AsyncCatalogueView):
+    """List of categories"""
+
+    async def get(self, request, *args, **kwargs):
+        """get list of categories"""
+        queryset = Category.objects.with_subcategories().order_by('id')
+
+        data = await self.paginate(request, queryset, CategorySerializer, {})
+
+        return json_response(data)
+
+
+class AsyncProductView(AsyncCatalogueView):
+    """List of products"""
+
+    async def get(self, request, *args, **kwargs):
+        """
+        GET list of products with filtration
+        """
+        queryset = Product.live.visible()
+        filtered_queryset, price_queryset = filter_products(queryset, request.GET)
+
+        # min and max prices for the queryset, filtered without price filters
+        prices = price_range(await price_queryset.aaggregate(**PRICE_RANGE))
+
+        context = {'action': await actual_action()}
+        data = await self.paginate(
+            request, ProductListItemValuesSerializer.values_queryset(filtered_queryset),
+            ProductListItemValuesSerializer, context)
+        data.update(prices)
+
+        return json_response(data)
+
+
+class AsyncProductByIdView(AsyncCatalogueView):
+    """Retrieve product by id"""
+
+    async def get(self, request, *args, **kwargs):
+        """GET one product by id"""
+        product = await Product.live.with_available_quantity().select_related(
+            'subcategory').filter(pk=kwargs['pk']).afirst()
+        if product is None:
+            return json_response(PRODUCT_NOT_FOUND, status.HTTP_404_NOT_FOUND)
+
+        context = {'action': await actual_action()}
+        return json_response(ProductFullSerializer(product, context=context).data)
@@ -0,0 +1,27 @@
+"""
+products consumers of outbox events
+"""
+
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import subscribe
+from .models import Product
+
+
+@subscribe(OutboxEvent.Topics.STOCK_CHANGED, OutboxEvent.Topics.ORDER_CREATED)
+def reconcile_stock(event):
+    """
+    recalculate Product.stock of the products of the invoice or the order
+    after the commit, the stock is also kept by the change itself,
+    so this repairs only changes of the ledger the writer didn't see
+    """
+    product_ids = event.payload.get('product_ids') or []
+    Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+
+
+@subscribe(OutboxEvent.Topics.ORDER_REJECTED)
+def reconcile_stock_of_rejected_order(event):
+    """recalculate Product.stock of the products of the rejected order"""
+    from online_store.orders.models import OrderItem
+
+    Product.all_objects.filter(pk__in=OrderItem.objects.filter(
+        order_id=event.object_id).values('product_id')).refresh_stock()
@@ -2,19 +2,33 @@
 products filters
 """
 
+import math
+
 from django_filters import rest_framework as filters
 
+from django.db.models import Min, Max
 from django.db.models.query import QuerySet
 
 from .models import Product
 
+PRICE_FILTERS = ('min_price', 'max_price')
+# prices are compared in the base currency (Product.price_base, indexed),
+# the stock is the stored available quantity (Product.stock, indexed)
+PRODUCT_ORDERING = {
+    'price': 'price_base', '-price': '-price_base',
+    'stock': 'stock', '-stock': '-stock',
+}
+PRICE_RANGE = {'min_price': Min('price_base'), 'max_price': Max('price_base')}
+
 
 class ProductFilters(filters.FilterSet):
     """
-    Filter for list of products
+    Filter for list of products, min_price and max_price
+    are in the base currency, in_stock=true hides sold out products
     """
     min_price = filters.NumberFilter(method='filter_min_price')
     max_price = filters.NumberFilter(method='filter_max_price')
+    in_stock = filters.BooleanFilter(method='filter_in_stock')
 
     class Meta:
         model = Product
@@ -23,9 +37,78 @@ class ProductFilters(filters.FilterSet):
     @staticmethod
     def filter_min_price(queryset: QuerySet, _, value: float | int) -> QuerySet:
         """filter by min price"""
-        return queryset.filter(price__gte=value)
+        return queryset.filter(price_base__gte=value)
 
     @staticmethod
     def filter_max_price(queryset: QuerySet, _, value: float | int) -> QuerySet:
         """filter by max price"""
-        return queryset.filter(price__lte=value)
+        return queryset.filter(price_base__lte=value)
+
+    @staticmethod
+    def filter_in_stock(queryset: QuerySet, _, value: bool) -> QuerySet:
+        """filter by the stored available quantity"""
+        if value:
+            return queryset.filter(stock__gt=0)
+        return queryset.filter(stock=0)
+
+
+def get_list(params, field_name):
+    """
+    list of values from comma separated query param
+    """
+    items = params.get(field_name)
+    if items:
+        if items == 'undefined':
+            items = []
+        else:
+            items = [s.strip() for s in items.split(',') if s]
+    else:
+        items = []
+    return items
+
+
+def filter_products(queryset, query_params):
+    """
+    filter products by query params: category, subcategory, prices, in_stock, ordering.
+    Return the filtered queryset and the queryset filtered
+    without price filters to calculate min and max prices
+    """
+    filters_from_request = query_params.dict()
+
+    categories = get_list(query_params, 'category')
+    subcategories = get_list(query_params, 'subcategory')
+
+    query_params_without_price_filters = {
+        key: value for key, value in filters_from_request.items()
+        if key not in PRICE_FILTERS}
+    price_queryset = ProductFilters(
+        query_params_without_price_filters, queryset=queryset).qs
+
+    filtered_queryset = ProductFilters(filters_from_request, queryset=queryset).qs
+    if categories:
+        filtered_queryset = filtered_queryset.filter(
+            subcategory__category__slug__in=categories)
+
+    if subcategories:
+        filtered_queryset = filtered_queryset.filter(
+            subcategory__slug__in=subcategories)
+
+    # order the filtered queryset if ordering param was provided
+    order_by = query_params.get('ordering')
+    if order_by in PRODUCT_ORDERING:
+        filtered_queryset = filtered_queryset.order_by(PRODUCT_ORDERING[order_by])
+
+    return filtered_queryset.distinct(), price_queryset
+
+
+def price_range(aggregated):
+    """
+    rounded min and max prices from aggregated PRICE_RANGE
+    """
+    result = {}
+    for key in ('min_price', 'max_price'):
+        value = aggregated[key]
+        if value:
+            value = math.ceil(value)
+        result[key] = value
+    return result
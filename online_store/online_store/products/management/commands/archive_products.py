@@ -0,0 +1,31 @@
+"""
+Manage command to move long deleted products to the archive
+"""
+
+from django.core.management.base import BaseCommand
+
+from online_store.products.service import BULK_BATCH_SIZE, archive_deleted_products
+
+
+class Command(BaseCommand):
+    """
+    This manage command moves products deleted more than
+    PRODUCTS_ARCHIVE_DAYS ago and their price history to the archive
+    tables, so the table of products and its indexes stay small,
+    run it periodically (cron)
+    """
+    help = """Move long deleted products to the archive tables."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-d', '--days', type=int,
+            help='Days after deletion, PRODUCTS_ARCHIVE_DAYS by default')
+        parser.add_argument(
+            '-b', '--batch-size', type=int, default=BULK_BATCH_SIZE,
+            help='Count of products in one transaction')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        archived = archive_deleted_products(kwargs['days'], kwargs['batch_size'])
+        print(f'Archived: {archived}')
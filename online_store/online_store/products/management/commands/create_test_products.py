@@ -188,9 +188,9 @@ class Command(BaseCommand):
 
         for item in PRODUCT_DATA:
             print(f"NAME: {item['name']}")
-            product = Product.objects.filter(name=item['name']).first()
+            product = Product.all_objects.filter(name=item['name']).first()
             if product is None:
-                product = Product.objects.create(
+                product = Product.all_objects.create(
                     name=item['name'],
                     description=item['description'],
                     details=item['details'],
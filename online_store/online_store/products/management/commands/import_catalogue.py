@@ -0,0 +1,82 @@
+"""
+Manage command to import products
+"""
+
+import csv
+from itertools import islice
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from online_store.products.service import (
+    BULK_BATCH_SIZE, get_subcategories, product_from_row, upsert_products)
+
+
+def read_rows(path):
+    """
+    rows of a JSONL or CSV file one by one with their line numbers
+    """
+    with open(path, newline='', encoding='utf-8') as catalogue_file:
+        if path.endswith('.csv'):
+            for line, row in enumerate(csv.DictReader(catalogue_file), start=2):
+                yield line, row
+            return
+        for line, text in enumerate(catalogue_file, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except json.JSONDecodeError as exc:
+                    yield line, exc
+
+
+class Command(BaseCommand):
+    """
+    This manage command creates products or updates them by SKU
+    from a JSONL or CSV file (columns sku, name, subcategory, price,
+    price_currency, description, details, features, technical_features).
+    The file is read as a stream, products are saved in batches
+    by bulk inserts and updates, each batch in its transaction.
+    Empty cells don't change existing products
+    """
+    help = """Import products from a JSONL or CSV file."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument('file', help='JSONL or CSV file')
+        parser.add_argument(
+            '-b', '--batch-size', type=int, default=BULK_BATCH_SIZE,
+            help='Count of products in one INSERT')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        subcategories = get_subcategories()
+        rows = read_rows(kwargs['file'])
+        created = updated = failed = 0
+        started = time.perf_counter()
+
+        try:
+            while batch := list(islice(rows, kwargs['batch_size'])):
+                products = []
+                for line, row in batch:
+                    try:
+                        if isinstance(row, Exception):
+                            raise ValueError(str(row))
+                        products.append(product_from_row(row, subcategories))
+                    except ValueError as exc:
+                        failed += 1
+                        print(f'Line {line}: {exc}')
+                if products:
+                    batch_created, batch_updated = upsert_products(products)
+                    created += batch_created
+                    updated += batch_updated
+                if kwargs['verbosity'] > 1:
+                    print(f'Created: {created}, updated: {updated}, failed: {failed}')
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+
+        seconds = time.perf_counter() - started
+        total = created + updated
+        print(
+            f'Created: {created}, updated: {updated}, failed: {failed}, '
+            f'{seconds:.1f} s, {total / seconds if seconds else 0:.0f} products/s')
@@ -0,0 +1,56 @@
+"""
+Manage command to load exchange rates
+"""
+
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from online_store.products.rates import set_rates
+
+
+class Command(BaseCommand):
+    """
+    This manage command saves exchange rates to the base currency
+    from a CSV file with columns currency,rate and from --rate options,
+    e.g. load_exchange_rates rates.csv --rate USD=41.25,
+    and recalculates prices of products in the base currency
+    """
+    help = """Load exchange rates from a CSV file (currency,rate) or --rate options."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            'file', nargs='?',
+            help='CSV file with columns currency,rate')
+        parser.add_argument(
+            '-r', '--rate', action='append', default=[],
+            help='Rate as CURRENCY=RATE, can be repeated')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        pairs = []
+        if kwargs['file']:
+            with open(kwargs['file'], newline='', encoding='utf-8') as rates_file:
+                pairs.extend(
+                    (row['currency'], row['rate']) for row in csv.DictReader(rates_file))
+        pairs.extend(value.split('=', 1) for value in kwargs['rate'] if '=' in value)
+        if not pairs:
+            raise CommandError('There are no rates')
+
+        rates = {}
+        for currency, rate in pairs:
+            currency = currency.strip().upper()
+            try:
+                rate = Decimal(rate.strip())
+            except InvalidOperation as exc:
+                raise CommandError(f'Invalid rate of {currency}: {rate}') from exc
+            if len(currency) != 3 or rate <= 0:
+                raise CommandError(f'Invalid rate of {currency}: {rate}')
+            if currency != settings.BASE_CURRENCY:
+                rates[currency] = rate
+
+        updated = set_rates(rates)
+        print(f'Rates: {len(rates)}, products updated: {updated}')
@@ -0,0 +1,42 @@
+"""
+Manage command to report products low in stock
+"""
+
+from django.core.management.base import BaseCommand
+
+from online_store.products.service import low_stock_products
+
+
+class Command(BaseCommand):
+    """
+    This manage command prints approved products with the stock below
+    the threshold with their sales per day and days of cover,
+    the shortest cover goes first, run it periodically (cron) for alerts
+    """
+    help = """Report products low in stock."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument(
+            '-t', '--threshold', type=int,
+            help='Default threshold, LOW_STOCK_THRESHOLD by default')
+        parser.add_argument(
+            '-d', '--days', type=int,
+            help='Days of sales, LOW_STOCK_SALES_DAYS by default')
+        parser.add_argument(
+            '-s', '--subcategory', action='append',
+            help='Slug of a subcategory, can be repeated')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        rows = low_stock_products(
+            kwargs['threshold'], kwargs['days'], subcategories=kwargs['subcategory']
+        ).values_list(
+            'id', 'name', 'available_quantity_value', 'low_stock_threshold_value',
+            'sales_per_day', 'days_of_cover')
+        count = 0
+        for product_id, name, quantity, threshold, sales_per_day, days_of_cover in rows:
+            count += 1
+            cover = '-' if days_of_cover is None else f'{days_of_cover:.1f} days'
+            print(f'{product_id}\t{name}\t{quantity}/{threshold}\t{sales_per_day:.2f}/day\t{cover}')
+        print(f'Low in stock: {count}')
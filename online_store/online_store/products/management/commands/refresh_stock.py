@@ -0,0 +1,27 @@
+"""
+Manage command to recalculate the stored stock of products
+"""
+
+from django.core.management.base import BaseCommand
+
+from online_store.products.models import Product
+
+
+class Command(BaseCommand):
+    """
+    This manage command recalculates Product.stock from invoices
+    and orders, for all products or the given ones, e.g. after
+    changes of invoices or orders by SQL
+    """
+    help = """Recalculate the available quantity of products."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument('ids', nargs='*', type=int, help='Ids of products, all by default')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        products = Product.all_objects.all()
+        if kwargs['ids']:
+            products = products.filter(pk__in=kwargs['ids'])
+        print(f'Products updated: {products.refresh_stock()}')
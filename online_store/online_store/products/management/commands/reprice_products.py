@@ -0,0 +1,45 @@
+"""
+Manage command to set prices of products from CSV
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from online_store.products.service import (
+    BULK_BATCH_SIZE, bulk_set_prices, parse_currency, parse_price)
+
+
+class Command(BaseCommand):
+    """
+    This manage command sets prices of products from a CSV file
+    with columns id,price[,currency] in one transaction,
+    products are updated in batches and price events are published
+    once at the end
+    """
+    help = """Set prices of products from a CSV file (id,price[,currency])."""
+
+    def add_arguments(self, parser):
+        """add arguments"""
+        parser.add_argument('file', help='CSV file with columns id,price[,currency]')
+        parser.add_argument(
+            '-b', '--batch-size', type=int, default=BULK_BATCH_SIZE,
+            help='Count of products in one UPDATE')
+
+    def handle(self, *args, **kwargs):
+        """handler"""
+        prices = {}
+        with open(kwargs['file'], newline='', encoding='utf-8') as prices_file:
+            for line, row in enumerate(csv.DictReader(prices_file), start=2):
+                try:
+                    product_id = int(row['id'])
+                    price = parse_price(row['price'])
+                    currency = parse_currency(row.get('currency'))
+                except (KeyError, TypeError, ValueError) as exc:
+                    raise CommandError(f'Invalid row {line}: {row}') from exc
+                prices[product_id] = (price, currency)
+
+        updated, not_found = bulk_set_prices(prices, kwargs['batch_size'])
+        print(f'Updated: {len(updated)}, not found: {len(not_found)}')
+        if not_found:
+            print('Not found:', ', '.join(str(product_id) for product_id in not_found[:100]))
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_price_base(apps, schema_editor):
+    """prices in the base currency are the prices"""
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(price_currency=settings.BASE_CURRENCY).update(
+        price_base=models.F('price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_priceaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3, unique=True, verbose_name='currency')),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='rate')),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Exchange rate',
+                'verbose_name_plural': 'Exchange rates',
+                'db_table': 'products_exchange_rate',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='price_base',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='price in the base currency'),
+        ),
+        migrations.RunPython(set_price_base, migrations.RunPython.noop),
+    ]
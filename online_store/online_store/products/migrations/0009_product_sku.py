@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_exchangerate_product_price_base'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='SKU'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productpricehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='low stock threshold'),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='low stock threshold'),
+        ),
+    ]
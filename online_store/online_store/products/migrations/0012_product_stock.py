@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_stock(apps, schema_editor):
+    """available quantity from invoices and new and paid orders"""
+    Product = apps.get_model('products', 'Product')
+    InvoiceItem = apps.get_model('products', 'InvoiceItem')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    purchased = InvoiceItem.objects.filter(
+        product=OuterRef('pk')
+    ).order_by().values('product').annotate(total=Sum('amount')).values('total')
+    sold = OrderItem.objects.filter(
+        product=OuterRef('pk'), order__moderation_status__in=('new', 'paid'),
+    ).order_by().values('product').annotate(total=Sum('count')).values('total')
+    Product.objects.update(stock=Greatest(
+        Coalesce(Subquery(purchased), Value(0)) - Coalesce(Subquery(sold), Value(0)),
+        Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_low_stock_threshold'),
+        ('orders', '0004_alter_order_moderation_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock',
+            field=models.IntegerField(db_index=True, default=0, editable=False, verbose_name='available quantity'),
+        ),
+        migrations.RunPython(fill_stock, migrations.RunPython.noop),
+    ]
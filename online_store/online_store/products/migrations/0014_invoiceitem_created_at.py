@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:20
+
+from django.db import migrations, models
+
+
+def set_created_at(apps, schema_editor):
+    """items created before are created with their invoice"""
+    InvoiceItem = apps.get_model('products', 'InvoiceItem')
+    Invoice = apps.get_model('products', 'Invoice')
+    InvoiceItem.objects.filter(invoice__isnull=False).update(
+        created_at=models.Subquery(
+            Invoice.objects.filter(pk=models.OuterRef('invoice_id')).values('created_at')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(set_created_at, migrations.RunPython.noop),
+    ]
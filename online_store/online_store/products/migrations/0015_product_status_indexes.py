@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_invoiceitem_created_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_approved_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_approved_stock_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['moderation_status', 'price_base'], name='product_status_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['moderation_status', 'stock'], name='product_status_stock_idx'),
+        ),
+    ]
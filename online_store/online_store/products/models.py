@@ -5,8 +5,10 @@ products models
 import logging
 import uuid
 
-from django.db.models import Sum
-from django.db import models
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from djmoney.models.fields import MoneyField
@@ -15,6 +17,15 @@ from djmoney.models.validators import MinMoneyValidator
 logger = logging.getLogger(__name__)
 
 
+class CategoryQuerySet(models.QuerySet):
+    """categories queryset"""
+
+    def with_subcategories(self):
+        """prefetch subcategories ordered by slug"""
+        return self.prefetch_related(models.Prefetch(
+            'sub_categories', queryset=SubCategory.objects.order_by('slug')))
+
+
 class Category(models.Model):
     """
     Product Category
@@ -25,6 +36,8 @@ class Category(models.Model):
     description = models.CharField(
         _("description"), max_length=256, null=True, blank=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
@@ -36,6 +49,9 @@ class Category(models.Model):
     @property
     def subcategories(self):
         """list of subcategories"""
+        if 'sub_categories' in getattr(self, '_prefetched_objects_cache', {}):
+            # prefetched by Category.objects.with_subcategories()
+            return self.sub_categories.all()
         return self.sub_categories.all().order_by('slug')
 
 
@@ -52,6 +68,9 @@ class SubCategory(models.Model):
         Category, verbose_name=_("category"),
         related_name='sub_categories',
         on_delete=models.SET_NULL, null=True)
+    # products of the subcategory are low in stock below it
+    low_stock_threshold = models.PositiveIntegerField(
+        _("low stock threshold"), null=True, blank=True)
 
     def __str__(self) -> str:
         return self.name
@@ -62,6 +81,31 @@ class SubCategory(models.Model):
         db_table = 'products_subcategory'
 
 
+# products in one UPDATE of the stock recalculation
+STOCK_BATCH_SIZE = 1000
+
+
+def available_quantity_expression():
+    """
+    available quantity of the product of the query: purchased by invoices
+    minus ordered by new and paid orders, not less than 0
+    """
+    from online_store.orders.models import Order, OrderItem
+
+    purchased = InvoiceItem.objects.filter(
+        product=OuterRef('pk')
+    ).order_by().values('product').annotate(total=Sum('amount')).values('total')
+    sold = OrderItem.objects.filter(
+        product=OuterRef('pk'),
+        order__moderation_status__in=(Order.Statuses.NEW, Order.Statuses.PAID),
+    ).order_by().values('product').annotate(total=Sum('count')).values('total')
+
+    return Greatest(
+        Coalesce(Subquery(purchased), Value(0))
+        - Coalesce(Subquery(sold), Value(0)),
+        Value(0))
+
+
 class CustomProductQuerySet(models.QuerySet):
     """custom queryset"""
 
@@ -69,6 +113,60 @@ class CustomProductQuerySet(models.QuerySet):
         """method visible"""
         return self.filter(moderation_status="approved")
 
+    def with_available_quantity(self):
+        """
+        annotate available quantity by subqueries,
+        so the property available_quantity needs no queries
+        """
+        return self.annotate(available_quantity_value=available_quantity_expression())
+
+    def refresh_stock(self):
+        """
+        recalculate Product.stock of the products from invoices and orders.
+        The products are locked first, so the recalculation sees changes
+        of concurrent transactions committed before the lock.
+        Return count of updated products
+        """
+        updated = 0
+        with transaction.atomic():
+            ids = list(self.order_by('pk').select_for_update().values_list('pk', flat=True))
+            for start in range(0, len(ids), STOCK_BATCH_SIZE):
+                updated += Product.all_objects.filter(
+                    pk__in=ids[start:start + STOCK_BATCH_SIZE]
+                ).update(stock=available_quantity_expression())
+        return updated
+
+    def low_stock(self, default_threshold, since, days):
+        """
+        approved products with the available quantity below the threshold
+        of the product, of its subcategory or the default one, by one query.
+        Annotated with the count ordered since the moment, sales per day
+        for the period of days and days of cover of the stock
+        (empty without sales), the shortest cover goes first
+        """
+        from online_store.orders.models import Order, OrderItem
+
+        sold = OrderItem.objects.filter(
+            product=OuterRef('pk'), order__created_at__gte=since,
+            order__moderation_status__in=(Order.Statuses.NEW, Order.Statuses.PAID),
+        ).order_by().values('product').annotate(total=Sum('count')).values('total')
+
+        return self.visible().with_available_quantity().annotate(
+            low_stock_threshold_value=Coalesce(
+                'low_stock_threshold', 'subcategory__low_stock_threshold',
+                Value(default_threshold)),
+            sold_recently=Coalesce(Subquery(sold), Value(0)),
+        ).filter(
+            available_quantity_value__lt=F('low_stock_threshold_value'),
+        ).annotate(
+            sales_per_day=ExpressionWrapper(
+                F('sold_recently') * 1.0 / days, output_field=FloatField()),
+            days_of_cover=ExpressionWrapper(
+                F('available_quantity_value') * float(days) / NullIf(F('sold_recently'), 0),
+                output_field=FloatField()),
+        ).order_by(
+            F('days_of_cover').asc(nulls_last=True), 'available_quantity_value', 'id')
+
 
 class ProductManager(models.Manager):
     """
@@ -83,6 +181,24 @@ class ProductManager(models.Manager):
         """visible"""
         return self.get_queryset().visible()
 
+    def with_available_quantity(self):
+        """with annotated available quantity"""
+        return self.get_queryset().with_available_quantity()
+
+    def low_stock(self, default_threshold, since, days):
+        """products low in stock"""
+        return self.get_queryset().low_stock(default_threshold, since, days)
+
+
+class LiveProductManager(ProductManager):
+    """
+    manager of products which are not deleted
+    """
+
+    def get_queryset(self):
+        """get queryset without deleted products"""
+        return super().get_queryset().exclude(moderation_status=Product.Statuses.DELETED)
+
 
 class Product(models.Model):
     """
@@ -105,6 +221,8 @@ class Product(models.Model):
         null=True, blank=True,
         related_name='products', verbose_name=_('subcategory'))
     name = models.CharField(_('name'), max_length=255)
+    # stock keeping unit, the key of the catalogue import
+    sku = models.CharField(_('SKU'), max_length=64, unique=True, null=True, blank=True)
     description = models.TextField(_('description'), blank=True, null=True)
     details = models.JSONField(_('details'), blank=True, null=True)
     features = models.JSONField(_('features'), blank=True, null=True)
@@ -113,29 +231,94 @@ class Product(models.Model):
         _('price'), max_digits=14, decimal_places=2,
         default_currency='USD', validators=[MinMoneyValidator(0)],
         null=True, blank=True)
+    # price in settings.BASE_CURRENCY for filtering and ordering,
+    # empty if there is no exchange rate for the currency of the price
+    price_base = models.DecimalField(
+        _('price in the base currency'), max_digits=14, decimal_places=2,
+        null=True, blank=True, editable=False)
 
     moderation_status = models.CharField(
         _("moderation status"), choices=Statuses.choices,
         max_length=30, default=Statuses.PENDING, db_index=True)
+    # available quantity stored to filter and order the catalogue by it,
+    # kept by CustomProductQuerySet.refresh_stock after changes of the stock
+    stock = models.IntegerField(_('available quantity'), default=0, editable=False)
+    # low in stock below it, the threshold of the subcategory by default
+    low_stock_threshold = models.PositiveIntegerField(
+        _("low stock threshold"), null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+    # deleted products are moved to ArchivedProduct PRODUCTS_ARCHIVE_DAYS later
+    deleted_at = models.DateTimeField(null=True, blank=True)
 
+    # default manager of Django: admin, unique checks and relations,
+    # the code of the apps reads by live or all_objects
     objects = ProductManager()
+    # products which are not deleted: catalogue, carts, orders, prices
+    live = LiveProductManager()
+    # all products, deleted ones too: stock, rates, import, archive
+    all_objects = ProductManager()
 
     class Meta:
         verbose_name = _("Product")
         verbose_name_plural = _("Products")
         db_table = 'products_product'
+        # the catalogue filters approved products and orders or filters them
+        # by price and stock, MySQL has no partial indexes, so the status
+        # goes first in composite indexes
+        indexes = [
+            models.Index(
+                fields=['moderation_status', 'price_base'], name='product_status_price_idx'),
+            models.Index(
+                fields=['moderation_status', 'stock'], name='product_status_stock_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.name}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """remember the loaded price to find its changes"""
+        instance = super().from_db(db, field_names, values)
+        if 'price' in field_names:
+            instance._loaded_price = instance.price
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        keep the price in the base currency,
+        append a changed price to the price history
+        """
+        from .rates import to_base
+
+        update_fields = kwargs.get('update_fields')
+        if 'price' in self.get_deferred_fields() or (
+                update_fields is not None and 'price' not in update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        if self.price is None:
+            self.price_base = None
+        else:
+            self.price_base = to_base(self.price.amount, self.price_currency)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'price_base'}
+        super().save(*args, **kwargs)
+
+        if self.price is not None and self.price != getattr(self, '_loaded_price', None):
+            ProductPriceHistory.objects.create(
+                product=self, price=self.price, valid_from=timezone.now())
+        self._loaded_price = self.price
+
     @property
     def available_quantity(self):
         """
         available quantity for this product
         """
+        if hasattr(self, 'available_quantity_value'):
+            return self.available_quantity_value
+
         from online_store.orders.models import Order, OrderItem
 
         purchased = InvoiceItem.objects.filter(product=self).aggregate(Sum('amount'))
@@ -182,6 +365,8 @@ class InvoiceItem(models.Model):
         _('price'), max_digits=14, decimal_places=2,
         default_currency='USD', validators=[MinMoneyValidator(0)],
         null=True, blank=True)
+    # purchases are valued in the order of creation of the items
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True, db_index=True)
 
     def __str__(self) -> str:
         return f"{self.invoice.id}-{self.product.name}"
@@ -216,3 +401,112 @@ class PriceAction(models.Model):
         """
         return cls.objects.filter(active=True).order_by('date').last()
 
+
+class ExchangeRate(models.Model):
+    """
+    Price of a currency unit in the base currency (settings.BASE_CURRENCY)
+    """
+    currency = models.CharField(_('currency'), max_length=3, unique=True)
+    rate = models.DecimalField(_('rate'), max_digits=18, decimal_places=8)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.currency}-{self.rate}"
+
+    class Meta:
+        verbose_name = _("Exchange rate")
+        verbose_name_plural = _("Exchange rates")
+        db_table = 'products_exchange_rate'
+
+
+class PriceHistoryQuerySet(models.QuerySet):
+    """price history queryset"""
+
+    def at(self, product_ids, moment):
+        """
+        prices of the products at the moment, one row for a product,
+        by one query: the last row of each product is found by the index
+        (product, valid_from)
+        """
+        last_row = self.model.objects.filter(
+            product=OuterRef('pk'), valid_from__lte=moment).order_by(
+                '-valid_from', '-id').values('id')[:1]
+        return self.filter(id__in=Product.all_objects.filter(
+            pk__in=product_ids).values(history_id=Subquery(last_row)))
+
+
+class ProductPriceHistory(models.Model):
+    """
+    Price of a product from valid_from till the next row,
+    rows are only appended
+    """
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE,
+        related_name='price_history', verbose_name=_('product'))
+    price = MoneyField(
+        _('price'), max_digits=14, decimal_places=2, default_currency='USD')
+    valid_from = models.DateTimeField(_('valid from'))
+
+    objects = PriceHistoryQuerySet.as_manager()
+
+    def __str__(self) -> str:
+        return f"{self.product_id}-{self.valid_from}-{self.price}"
+
+    class Meta:
+        verbose_name = _("Product price history")
+        verbose_name_plural = _("Product price history")
+        db_table = 'products_price_history'
+        indexes = [models.Index(fields=['product', 'valid_from'])]
+
+
+class ArchivedProduct(models.Model):
+    """
+    Product deleted long ago, moved from Product by
+    products.service.archive_deleted_products with the same id
+    """
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(_("uuid"))
+    subcategory_id = models.BigIntegerField(_('subcategory'), null=True, blank=True)
+    name = models.CharField(_('name'), max_length=255)
+    sku = models.CharField(_('SKU'), max_length=64, null=True, blank=True)
+    description = models.TextField(_('description'), blank=True, null=True)
+    details = models.JSONField(_('details'), blank=True, null=True)
+    features = models.JSONField(_('features'), blank=True, null=True)
+    technical_features = models.JSONField(_('technical features'), blank=True, null=True)
+    price = MoneyField(
+        _('price'), max_digits=14, decimal_places=2, default_currency='USD',
+        null=True, blank=True)
+
+    created_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'{self.name}'
+
+    class Meta:
+        verbose_name = _("Archived product")
+        verbose_name_plural = _("Archived products")
+        db_table = 'products_archived_product'
+
+
+class ArchivedProductPriceHistory(models.Model):
+    """
+    Price history of an archived product
+    """
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(
+        ArchivedProduct, on_delete=models.CASCADE,
+        related_name='price_history', verbose_name=_('product'))
+    price = MoneyField(
+        _('price'), max_digits=14, decimal_places=2, default_currency='USD')
+    valid_from = models.DateTimeField(_('valid from'))
+
+    def __str__(self) -> str:
+        return f"{self.product_id}-{self.valid_from}-{self.price}"
+
+    class Meta:
+        verbose_name = _("Archived product price history")
+        verbose_name_plural = _("Archived product price history")
+        db_table = 'products_archived_price_history'
@@ -0,0 +1,70 @@
+"""
+exchange rates
+
+Rates are prices of currency units in settings.BASE_CURRENCY,
+they are stored in the table ExchangeRate and kept in memory
+of the process for settings.EXCHANGE_RATES_SECONDS.
+Product.price_base is the price converted by these rates,
+it is indexed and used to filter and order products in any currency.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+import time
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Round
+
+from .models import ExchangeRate, Product
+
+CENT = Decimal('0.01')
+
+_cache = {'rates': None, 'loaded_at': 0.0}
+
+
+def get_rates():
+    """
+    rates {currency: rate} from memory, they are reloaded after
+    EXCHANGE_RATES_SECONDS
+    """
+    rates = _cache['rates']
+    if rates is None or time.monotonic() - _cache['loaded_at'] > settings.EXCHANGE_RATES_SECONDS:
+        rates = dict(ExchangeRate.objects.values_list('currency', 'rate'))
+        rates[settings.BASE_CURRENCY] = Decimal(1)
+        _cache.update(rates=rates, loaded_at=time.monotonic())
+    return rates
+
+
+def reset():
+    """reload the rates on the next call"""
+    _cache['rates'] = None
+
+
+def to_base(amount, currency):
+    """
+    amount in the base currency rounded half up to cents,
+    None if there is no rate for the currency
+    """
+    rate = get_rates().get(str(currency))
+    if amount is None or rate is None:
+        return None
+    return (amount * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def set_rates(rates):
+    """
+    save rates {currency: rate} and recalculate prices
+    in the base currency of the products in these currencies.
+    Return count of updated products
+    """
+    updated = 0
+    with transaction.atomic():
+        for currency, rate in rates.items():
+            ExchangeRate.objects.update_or_create(
+                currency=currency, defaults={'rate': rate})
+            updated += Product.all_objects.filter(price_currency=currency).update(
+                price_base=Round(models.ExpressionWrapper(
+                    models.F('price') * models.Value(Decimal(rate)),
+                    output_field=models.DecimalField()), 2))
+        transaction.on_commit(reset)
+    return updated
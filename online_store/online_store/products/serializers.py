@@ -1,16 +1,52 @@
 """
 products serializers
 """
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from functools import partial
 # from pprint import pprint
 
+from django.conf import settings
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
 from djmoney.money import Money
+from djmoney.settings import CURRENCY_CHOICES
 
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish
+from online_store.general.serializers import (
+    SparseFieldsMixin, ValuesListSerializer, defer_heavy_fields, datetime_representation)
 from .models import Category, SubCategory, Product, Invoice, InvoiceItem, PriceAction
+from .rates import CENT
+from .service import publish_price_changed
+
+
+def actual_price(amount, action):
+    """
+    price with the discount of the price action,
+    exact decimal rounded half up to cents, None for a product without price
+    """
+    if amount is None:
+        return None
+    if action:
+        new_price = amount * (100 - Decimal(action.discount)) / 100
+        return new_price.quantize(CENT, rounding=ROUND_HALF_UP)
+    return amount
+
+
+class CurrencyField(serializers.ChoiceField):
+    """
+    Code of a currency known to djmoney, case-insensitive
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(CURRENCY_CHOICES, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.strip().upper()
+        return super().to_internal_value(data)
 
 
 class SubCategorySerializer(serializers.ModelSerializer):
@@ -34,7 +70,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'slug', 'name', 'description', 'subcategories']
 
 
-class ProductListItemSerializer(serializers.ModelSerializer):
+class ProductListItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Product data
     """
@@ -47,19 +83,50 @@ class ProductListItemSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'uuid', 'name', 'price', 'actual_price', 'subcategory',
             'available_quantity']
+        expandable = {'subcategory': partial(SubCategorySerializer, read_only=True)}
+        field_sources = {
+            'subcategory': ('subcategory__slug',),
+            'actual_price': ('price', 'price_currency'),
+        }
+        field_annotations = {'available_quantity': 'with_available_quantity'}
 
     @staticmethod
     def get_subcategory(obj):
         return obj.subcategory.slug if obj.subcategory else None
 
     def get_actual_price(self, obj):
-        if self.context.get('action'):
-            action = self.context['action']
-            amount = obj.price.amount
-            discount = action.discount
-            new_price = amount * Decimal((100.0 - discount) / 100.0)
-            return round(new_price, 2)
-        return obj.price.amount
+        price = obj.price.amount if obj.price is not None else None
+        return actual_price(price, self.context.get('action'))
+
+
+class ProductListItemValuesSerializer(ValuesListSerializer):
+    """
+    Product data like ProductListItemSerializer
+    """
+    fields = {
+        'id': ('id',),
+        'uuid': ('uuid',),
+        'name': ('name',),
+        'price': ('price',),
+        'actual_price': ('price',),
+        'subcategory': ('subcategory__slug',),
+        'available_quantity': ('available_quantity_value',),
+    }
+    annotations = {'available_quantity': 'with_available_quantity'}
+
+    @staticmethod
+    def get_uuid(row):
+        """getter for uuid"""
+        return str(row['uuid'])
+
+    def get_actual_price(self, row):
+        """getter for actual price"""
+        return actual_price(row['price'], self.context.get('action'))
+
+    @staticmethod
+    def get_available_quantity(row):
+        """getter for available quantity"""
+        return int(row['available_quantity_value'])
 
 
 class ProductShortSerializer(serializers.ModelSerializer):
@@ -78,7 +145,16 @@ class ProductShortSerializer(serializers.ModelSerializer):
         return obj.subcategory.slug if obj.subcategory else None
 
 
-class ProductFullSerializer(serializers.ModelSerializer):
+def with_short_products(queryset):
+    """
+    items (order items, invoice items) with products for ProductShortSerializer,
+    heavy product columns are not loaded
+    """
+    return defer_heavy_fields(
+        queryset.select_related('product__subcategory'), ProductShortSerializer, 'product__')
+
+
+class ProductFullSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Product data
     """
@@ -88,7 +164,14 @@ class ProductFullSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = '__all__'
+        fields = [
+            'id', 'uuid', 'name', 'description', 'details', 'features',
+            'technical_features', 'price', 'price_currency', 'actual_price',
+            'subcategory', 'available_quantity', 'moderation_status',
+            'created_at', 'updated_at']
+        expandable = ProductListItemSerializer.Meta.expandable
+        field_sources = ProductListItemSerializer.Meta.field_sources
+        field_annotations = ProductListItemSerializer.Meta.field_annotations
 
     @staticmethod
     def get_subcategory(obj):
@@ -96,13 +179,94 @@ class ProductFullSerializer(serializers.ModelSerializer):
         return obj.subcategory.slug if obj.subcategory else None
 
     def get_actual_price(self, obj):
-        if self.context.get('action'):
-            action = self.context['action']
-            amount = obj.price.amount
-            discount = action.discount
-            new_price = amount * Decimal((100.0 - discount) / 100.0)
-            return round(new_price, 2)
-        return obj.price.amount
+        price = obj.price.amount if obj.price is not None else None
+        return actual_price(price, self.context.get('action'))
+
+
+class ProductBatchSerializer(serializers.Serializer):
+    """
+    Ids of products to get by one request
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, value):
+        """not more than PRODUCTS_BATCH_MAX_SIZE unique ids"""
+        value = list(dict.fromkeys(value))
+        if len(value) > settings.PRODUCTS_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Not more than {settings.PRODUCTS_BATCH_MAX_SIZE} products')
+        return value
+
+
+class ProductPricesAtSerializer(serializers.Serializer):
+    """
+    Ids of products and the moment of their prices, now by default
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+    at = serializers.DateTimeField(required=False)
+
+    def validate_ids(self, value):
+        """not more than PRODUCTS_BULK_MAX_SIZE unique ids"""
+        value = list(dict.fromkeys(value))
+        if len(value) > settings.PRODUCTS_BULK_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Not more than {settings.PRODUCTS_BULK_MAX_SIZE} products')
+        return value
+
+
+class LowStockQuerySerializer(serializers.Serializer):
+    """
+    Query params of the low stock report
+    """
+    threshold = serializers.IntegerField(min_value=0, required=False)
+    days = serializers.IntegerField(min_value=1, required=False)
+
+
+class LowStockValuesSerializer(ValuesListSerializer):
+    """
+    Product low in stock, its sales per day and days of cover
+    """
+    fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'subcategory': ('subcategory__slug',),
+        'available_quantity': ('available_quantity_value',),
+        'low_stock_threshold': ('low_stock_threshold_value',),
+        'sold': ('sold_recently',),
+        'sales_per_day': ('sales_per_day',),
+        'days_of_cover': ('days_of_cover',),
+    }
+
+    @staticmethod
+    def get_sales_per_day(row):
+        """getter for sales per day"""
+        return round(row['sales_per_day'], 2)
+
+    @staticmethod
+    def get_days_of_cover(row):
+        """getter for days of cover, empty without sales"""
+        if row['days_of_cover'] is None:
+            return None
+        return round(row['days_of_cover'], 1)
+
+
+class PriceHistoryValuesSerializer(ValuesListSerializer):
+    """
+    Price of a product from the price history
+    """
+    fields = {
+        'product': ('product_id',),
+        'price': ('price',),
+        'price_currency': ('price_currency',),
+        'valid_from': ('valid_from',),
+    }
+
+    @staticmethod
+    def get_valid_from(row):
+        """getter for valid from"""
+        return datetime_representation(row['valid_from'])
 
 
 class CreateProductSerializer(serializers.ModelSerializer):
@@ -128,10 +292,14 @@ class CreateProductSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         """custom updating"""
+        old_price = instance.price
 
-        product, created = Product.objects.update_or_create(
+        product, created = Product.live.update_or_create(
             id=instance.id, defaults=validated_data)
 
+        if 'price' in validated_data and validated_data['price'] != old_price:
+            publish_price_changed(product)
+
         return instance
 
     def validate(self, attrs):
@@ -148,6 +316,36 @@ class CreateProductSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ProductImportRowSerializer(serializers.Serializer):
+    """
+    Product data to create or update the product by SKU
+    """
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=255)
+    subcategory = serializers.CharField(required=False, allow_null=True)
+    price = serializers.DecimalField(
+        max_digits=14, decimal_places=2, min_value=Decimal(0), required=False, allow_null=True)
+    price_currency = CurrencyField(required=False)
+    description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    details = serializers.JSONField(required=False, allow_null=True)
+    features = serializers.JSONField(required=False, allow_null=True)
+    technical_features = serializers.JSONField(required=False, allow_null=True)
+
+
+class ProductsBulkSerializer(serializers.Serializer):
+    """
+    Products to create or update, not more than PRODUCTS_BULK_MAX_SIZE
+    """
+    items = ProductImportRowSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        """not more than PRODUCTS_BULK_MAX_SIZE rows"""
+        if len(value) > settings.PRODUCTS_BULK_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Not more than {settings.PRODUCTS_BULK_MAX_SIZE} products')
+        return value
+
+
 class InvoiceItemSerializer(serializers.Serializer):
     """
     Invoice Item
@@ -178,17 +376,22 @@ class CreateInvoiceSerializer(serializers.Serializer):
 
             InvoiceItem.objects.create(
                 invoice=instance,
-                product=Product.objects.get(pk=item['product']),
+                product=Product.live.get(pk=item['product']),
                 amount=item['amount'],
                 price=Money(item['price'], item['price_currency'])
             )
 
+        product_ids = [item['product'] for item in validated_data['items']]
+        Product.all_objects.filter(pk__in=product_ids).refresh_stock()
+        publish(OutboxEvent.Topics.STOCK_CHANGED, instance.id, {
+            'product_ids': product_ids})
+
         return instance
 
     def validate(self, attrs):
         """custom validating"""
         for item in attrs['items']:
-            product = Product.objects.filter(pk=item['product']).first()
+            product = Product.live.filter(pk=item['product']).first()
             if product is None:
                 raise serializers.ValidationError(
                     {'product': f"Product {item['product']} does not exist"})
@@ -230,6 +433,37 @@ class InvoiceListItemSerializer(serializers.ModelSerializer):
 
 class ProductPriceSerializer(serializers.Serializer):
     price = serializers.FloatField()
+    # settings.BASE_CURRENCY by default
+    price_currency = CurrencyField(required=False)
+
+
+class ProductPriceRowSerializer(serializers.Serializer):
+    """
+    New price of a product, the currency is settings.BASE_CURRENCY by default
+    """
+    id = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal(0))
+    currency = CurrencyField(required=False)
+
+
+class ProductPricesBulkSerializer(serializers.Serializer):
+    """
+    New prices of products, not more than PRODUCTS_BULK_MAX_SIZE
+    """
+    items = ProductPriceRowSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        """not more than PRODUCTS_BULK_MAX_SIZE rows"""
+        if len(value) > settings.PRODUCTS_BULK_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Not more than {settings.PRODUCTS_BULK_MAX_SIZE} products')
+        return value
+
+    def prices(self):
+        """{product id: (price, currency)}, the last row of a product wins"""
+        return {
+            item['id']: (item['price'], item.get('currency', settings.BASE_CURRENCY))
+            for item in self.validated_data['items']}
 
 
 class CreateActionSerializer(serializers.Serializer):
@@ -251,6 +485,9 @@ class CreateActionSerializer(serializers.Serializer):
             active=True,
         )
 
+        publish(OutboxEvent.Topics.PRICE_ACTION_CHANGED, instance.id, {
+            'discount': instance.discount, 'active': instance.active})
+
         return instance
 
 
@@ -0,0 +1,294 @@
+"""
+products services
+"""
+
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from djmoney.money import Money
+from djmoney.settings import CURRENCY_CHOICES
+
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish, publish_many
+from .models import (
+    ArchivedProduct, ArchivedProductPriceHistory, InvoiceItem, Product, SubCategory,
+    ProductPriceHistory)
+from .rates import CENT, to_base
+
+# rows in one UPDATE of bulk operations
+BULK_BATCH_SIZE = 1000
+
+# codes of currencies known to djmoney
+CURRENCY_CODES = frozenset(code for code, _name in CURRENCY_CHOICES)
+# prices have 14 digits with 2 decimal places
+MAX_PRICE = Decimal(10) ** 12
+PRODUCT_JSON_FIELDS = ('details', 'features', 'technical_features')
+
+
+def parse_price(value):
+    """
+    price from a file rounded to cents, ValueError if it is not
+    a finite number from 0 to MAX_PRICE
+    """
+    try:
+        price = Decimal(str(value).strip())
+        if not price.is_finite() or not 0 <= price < MAX_PRICE:
+            raise ValueError(f'Invalid price {value}')
+        return price.quantize(CENT)
+    except InvalidOperation as exc:
+        raise ValueError(f'Invalid price {value}') from exc
+
+
+def parse_currency(value):
+    """
+    upper-cased code of a currency from a file, settings.BASE_CURRENCY
+    if it is empty, ValueError if djmoney doesn't know it
+    """
+    code = str(value or settings.BASE_CURRENCY).strip().upper()
+    if code not in CURRENCY_CODES:
+        raise ValueError(f'Invalid currency {value}')
+    return code
+
+
+def record_prices(prices, valid_from=None):
+    """
+    append prices [(product id, amount, currency)] to the price history
+    by one insert, for bulk changes which don't call Product.save
+    """
+    valid_from = valid_from or timezone.now()
+    ProductPriceHistory.objects.bulk_create([
+        ProductPriceHistory(
+            product_id=product_id, price=Money(amount, currency), valid_from=valid_from)
+        for product_id, amount, currency in prices])
+
+
+def publish_price_changed(product):
+    """
+    publish event about new price of the product
+    """
+    publish(OutboxEvent.Topics.PRICE_CHANGED, product.id, {
+        'price': str(product.price.amount),
+        'currency': product.price.currency.code})
+
+
+def bulk_set_prices(prices, batch_size=BULK_BATCH_SIZE):
+    """
+    set prices {product id: (amount, currency)} in one transaction:
+    products are updated by bulk_update in batches, price events
+    and the price history are written by one insert each at the end.
+    Return ids of updated products and ids which are not found
+    """
+    ids = list(prices)
+    updated = []
+    now = timezone.now()
+    with transaction.atomic():
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            products = []
+            for product_id in Product.live.filter(pk__in=batch).values_list('id', flat=True):
+                amount, currency = prices[product_id]
+                products.append(Product(
+                    id=product_id, price=Money(amount, currency),
+                    price_base=to_base(amount, currency), updated_at=now))
+            Product.live.bulk_update(
+                products, ['price', 'price_currency', 'price_base', 'updated_at'])
+            updated.extend(product.id for product in products)
+
+        publish_many(OutboxEvent.Topics.PRICE_CHANGED, [
+            (product_id, {'price': str(prices[product_id][0]),
+                          'currency': prices[product_id][1]})
+            for product_id in updated])
+        record_prices([(product_id, *prices[product_id]) for product_id in updated], now)
+
+    found = set(updated)
+    return updated, [product_id for product_id in ids if product_id not in found]
+
+
+def get_subcategories():
+    """subcategory ids by slugs by one query"""
+    return dict(SubCategory.objects.values_list('slug', 'id'))
+
+
+def product_from_row(row, subcategories):
+    """
+    unsaved product from an imported row: sku, name, subcategory (slug),
+    price, price_currency, description, details, features, technical_features
+    and the fields given by the row, only they are updated if the SKU exists.
+    The moderation status is not imported, new products are pending.
+    JSON fields may be JSON strings (CSV). ValueError if the row is invalid
+    """
+    if not isinstance(row, dict):
+        raise ValueError('row must be an object')
+    sku = str(row.get('sku') or '').strip()
+    name = str(row.get('name') or '').strip()
+    if not sku or not name:
+        raise ValueError('sku and name are required')
+    fields = ['name', 'updated_at']
+
+    subcategory_id = None
+    if row.get('subcategory'):
+        subcategory_id = subcategories.get(row['subcategory'])
+        if subcategory_id is None:
+            raise ValueError(f"Subcategory {row['subcategory']} does not exist")
+        fields.append('subcategory')
+
+    price = None
+    currency = parse_currency(row.get('price_currency'))
+    if row.get('price') not in (None, ''):
+        price = parse_price(row['price'])
+        fields.extend(['price', 'price_currency', 'price_base'])
+
+    description = row.get('description') or None
+    if description is not None:
+        fields.append('description')
+
+    data = {}
+    for field in PRODUCT_JSON_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = json.loads(value) if value.strip() else None
+        if value is not None:
+            data[field] = value
+            fields.append(field)
+
+    product = Product(
+        sku=sku, name=name, subcategory_id=subcategory_id,
+        description=description,
+        price=Money(price, currency) if price is not None else None,
+        price_currency=currency,
+        price_base=to_base(price, currency),
+        moderation_status=Product.Statuses.PENDING,
+        **data)
+    return product, tuple(sorted(fields))
+
+
+def upsert_products(products):
+    """
+    create products or update them by SKU, products are pairs
+    (product, fields) of product_from_row. New products are inserted
+    by bulk_create, existing ones get only the given fields by bulk_update,
+    one UPDATE per set of fields, their moderation status is kept.
+    It needs no INSERT ... ON CONFLICT, which MySQL can't do by a unique field.
+    Price events are published for changed prices,
+    new and changed prices are appended to the price history.
+    Return counts of created and updated products
+    """
+    # the last row of a SKU wins
+    products = list({product.sku: (product, fields) for product, fields in products}.values())
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            sku: (product_id, price, currency)
+            for sku, product_id, price, currency in Product.all_objects.select_for_update().filter(
+                sku__in=[product.sku for product, _fields in products]).values_list(
+                    'sku', 'id', 'price', 'price_currency')}
+
+        Product.all_objects.bulk_create(
+            [product for product, _fields in products if product.sku not in existing],
+            batch_size=BULK_BATCH_SIZE)
+        updates = {}
+        for product, fields in products:
+            if product.sku in existing:
+                product.pk = existing[product.sku][0]
+                product.updated_at = now
+                updates.setdefault(fields, []).append(product)
+        for fields, group in updates.items():
+            Product.all_objects.bulk_update(group, fields, batch_size=BULK_BATCH_SIZE)
+
+        changed = [
+            product for product, _fields in products if product.price is not None and (
+                product.sku not in existing
+                or existing[product.sku][1:] != (product.price.amount, product.price_currency))]
+        # MySQL doesn't return ids of inserted rows
+        ids = {sku: values[0] for sku, values in existing.items()}
+        new_skus = [product.sku for product in changed if product.sku not in existing]
+        if new_skus:
+            ids.update(Product.all_objects.filter(sku__in=new_skus).values_list('sku', 'id'))
+
+        publish_many(OutboxEvent.Topics.PRICE_CHANGED, [
+            (ids[product.sku], {
+                'price': str(product.price.amount), 'currency': product.price_currency})
+            for product in changed if product.sku in existing])
+        record_prices([
+            (ids[product.sku], product.price.amount, product.price_currency)
+            for product in changed], now)
+
+    return len(products) - len(existing), len(existing)
+
+
+def low_stock_products(threshold=None, days=None, categories=None, subcategories=None):
+    """
+    queryset of approved products low in stock with sales per day
+    and days of cover, by one query. The default threshold
+    and the days of sales are LOW_STOCK_THRESHOLD and LOW_STOCK_SALES_DAYS
+    """
+    if threshold is None:
+        threshold = settings.LOW_STOCK_THRESHOLD
+    days = days or settings.LOW_STOCK_SALES_DAYS
+    queryset = Product.live.low_stock(
+        threshold, timezone.now() - timedelta(days=days), days)
+    if categories:
+        queryset = queryset.filter(subcategory__category__slug__in=categories)
+    if subcategories:
+        queryset = queryset.filter(subcategory__slug__in=subcategories)
+    return queryset
+
+
+# fields copied to ArchivedProduct
+ARCHIVED_PRODUCT_FIELDS = (
+    'id', 'uuid', 'subcategory_id', 'name', 'sku', 'description', 'details', 'features',
+    'technical_features', 'price', 'price_currency', 'created_at', 'updated_at', 'deleted_at')
+
+
+def with_money(rows):
+    """rows of values() without price and price_currency and the price as Money"""
+    for row in rows:
+        amount, currency = row.pop('price'), row.pop('price_currency')
+        yield row, None if amount is None else Money(amount, currency)
+
+
+def archive_deleted_products(days=None, batch_size=BULK_BATCH_SIZE):
+    """
+    move products deleted more than days (PRODUCTS_ARCHIVE_DAYS) ago
+    and their price history to the archive tables, batch by batch
+    in separate transactions. Products of invoices and orders stay,
+    their items would lose the product.
+    Return count of archived products
+    """
+    from online_store.orders.models import OrderItem
+
+    days = settings.PRODUCTS_ARCHIVE_DAYS if days is None else days
+    queryset = Product.all_objects.filter(
+        moderation_status=Product.Statuses.DELETED,
+        deleted_at__lt=timezone.now() - timedelta(days=days),
+    ).exclude(
+        Exists(InvoiceItem.objects.filter(product=OuterRef('pk'))),
+    ).exclude(
+        Exists(OrderItem.objects.filter(product=OuterRef('pk'))),
+    ).order_by('pk')
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.select_for_update(skip_locked=True)[:batch_size].values(
+                *ARCHIVED_PRODUCT_FIELDS))
+            if not rows:
+                return archived
+            ids = [row['id'] for row in rows]
+            ArchivedProduct.objects.bulk_create([
+                ArchivedProduct(**row, price=money)
+                for row, money in with_money(rows)])
+            ArchivedProductPriceHistory.objects.bulk_create([
+                ArchivedProductPriceHistory(**row, price=money)
+                for row, money in with_money(ProductPriceHistory.objects.filter(
+                    product_id__in=ids).values(
+                        'id', 'product_id', 'price', 'price_currency', 'valid_from'))])
+            # the price history and cart items are deleted by cascade
+            Product.all_objects.filter(pk__in=ids).delete()
+        archived += len(rows)
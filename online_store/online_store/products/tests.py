@@ -2,20 +2,45 @@
 Test case to test models related to products
 """
 
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 import json
+import os
+import tempfile
 from faker import Faker
 from pprint import pprint
 import random
 import unittest
 
+from asgiref.sync import async_to_sync
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from .models import Category, SubCategory, Product, PriceAction
+from djmoney.money import Money
+
+from online_store.general.db_routers import ais_sticky, is_sticky, mark_sticky
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.serializers import get_heavy_fields
+from .models import (
+    Category, SubCategory, Product, PriceAction, InvoiceItem, ExchangeRate, ProductPriceHistory,
+    ArchivedProduct)
+from . import rates
+from .async_views import AsyncCatalogueView
+from .service import archive_deleted_products, bulk_set_prices, low_stock_products
+from .serializers import (
+    ProductListItemSerializer, ProductListItemValuesSerializer, ProductFullSerializer,
+    ProductShortSerializer, InvoiceItemOutSerializer, LowStockValuesSerializer,
+    with_short_products)
 from online_store.general.test_utils import (get_test_user, ApiTestCase)
 
 
@@ -65,6 +90,23 @@ class ProductTestCase(unittest.TestCase):
         products = Product.objects.visible()
         self.assertTrue(products.count())
 
+    def test_60_without_price(self):
+        """product without price has no actual price with or without action"""
+        product = Product.objects.create(name='Каска без ціни', subcategory=self.subcategory)
+        try:
+            for action in (None, PriceAction(discount=10)):
+                context = {'action': action}
+                queryset = Product.objects.with_available_quantity().filter(pk=product.pk)
+                for serializer_class in (ProductListItemSerializer, ProductFullSerializer):
+                    self.assertIsNone(
+                        serializer_class(queryset.get(), context=context).data['actual_price'])
+                rows = ProductListItemValuesSerializer(
+                    ProductListItemValuesSerializer.values_queryset(queryset),
+                    context=context, many=True).data
+                self.assertIsNone(rows[0]['actual_price'])
+        finally:
+            product.delete()
+
 
 class ApiProductsTestCase(ApiTestCase):
     """
@@ -218,8 +260,9 @@ class ApiProductsTestCase(ApiTestCase):
         self.assertTrue(item)
         self.assertTrue(item.moderation_status == 'deleted')
 
+    @override_settings(REPLICA_DATABASE='replica')
     def test_0050_invoice(self):
-        """end-point POST invoice"""
+        """end-point POST invoice, the manager reads own invoice from the primary"""
         self.user_manager = get_test_user(role='manager')
         self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
         self.set_headers()
@@ -243,6 +286,7 @@ class ApiProductsTestCase(ApiTestCase):
         # pprint(data)
         self.assertTrue(data['uuid'])
         self.assertTrue(len(data['items']))
+        self.assertTrue(is_sticky(self.user_manager))
 
     def test_0060_set_product_price(self):
         """
@@ -265,6 +309,10 @@ class ApiProductsTestCase(ApiTestCase):
         self.assertTrue(response_data['price'] > current_price)
         self.assertTrue(response_data['uuid'] == str(uuid))
 
+        data = {'price': current_price, 'price_currency': 'XYZ'}
+        response = self.client.post(reverse('product-price', args=[product.id]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_0070_action(self):
         """end-point POST actions"""
         self.user_manager = get_test_user(role='manager')
@@ -318,3 +366,554 @@ class ApiProductsTestCase(ApiTestCase):
         data = json.loads(response.content)
         # pprint(data)
         self.assertTrue(data['discount'])
+
+    def test_0100_async_catalogue(self):
+        """
+        async end-points return the same data as sync end-points
+        GET
+        """
+        params = "?ordering=-price&min_price=1000&category=alpinism&limit=5"
+        for sync_url, async_url in (
+                (reverse('categories'), reverse('async-categories')),
+                (reverse('products') + params, reverse('async-products') + params)):
+            response = self.client.get(sync_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = json.loads(response.content)
+            response = self.client.get(async_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)
+            self.assertEqual(data['results'], expected['results'])
+            self.assertEqual(data['count'], expected['count'])
+
+        product = Product.objects.visible().first()
+        response = self.client.get(reverse('get_product_by_id', args=[product.id]))
+        expected = json.loads(response.content)
+        for field in ('sku', 'stock', 'price_base', 'low_stock_threshold', 'deleted_at'):
+            self.assertNotIn(field, expected)
+        response = self.client.get(reverse('async-product-by-id', args=[product.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), expected)
+
+        response = self.client.get(reverse('async-product-by-id', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_0105_async_read_your_writes(self):
+        """async end-points read from the primary after own writes"""
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        view = AsyncCatalogueView()
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_AUTHORIZATION=f'Bearer {self.user_token}')
+        caches['shared'].clear()
+
+        self.assertEqual(async_to_sync(view.get_read_database)(request), 'replica')
+        mark_sticky(self.user_manager)
+        self.assertIsNone(async_to_sync(view.get_read_database)(request))
+        self.assertEqual(
+            async_to_sync(view.get_read_database)(factory.get('/')), 'replica')
+        invalid = factory.get('/', HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(async_to_sync(view.get_read_database)(invalid), 'replica')
+
+        # without replica the flag is not read
+        with override_settings(REPLICA_DATABASE=None):
+            self.assertFalse(is_sticky(self.user_manager))
+            self.assertFalse(async_to_sync(ais_sticky)(self.user_manager))
+        caches['shared'].clear()
+
+    def test_0110_values_serializer(self):
+        """values serializer gives the same JSON as the model serializer"""
+        renderer = JSONRenderer()
+        queryset = Product.objects.with_available_quantity().select_related(
+            'subcategory').order_by('id')
+        for action in (None, PriceAction(discount=15)):
+            context = {'action': action}
+            expected = ProductListItemSerializer(queryset, context=context, many=True).data
+            data = ProductListItemValuesSerializer(
+                ProductListItemValuesSerializer.values_queryset(queryset), context=context).data
+            self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_0120_sparse_fields(self):
+        """
+        end-points products and product by id
+        GET with ?fields= and ?expand=
+        """
+        response = self.client.get(reverse('products') + '?fields=id,name,price')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertTrue(data['max_price'])
+        self.assertEqual(set(data['results'][0]), {'id', 'name', 'price'})
+
+        response = self.client.get(reverse('products') + '?fields=id&expand=subcategory')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(set(data['results'][0]), {'id', 'subcategory'})
+        self.assertTrue(data['results'][0]['subcategory']['slug'])
+
+        product = Product.objects.visible().first()
+        url = reverse('get_product_by_id', args=[product.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '?fields=id,name,actual_price')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(set(data), {'id', 'name', 'actual_price'})
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'products_product' in query['sql'] and 'description' in query['sql']])
+
+        response = self.client.get(url + '?expand=subcategory')
+        data = json.loads(response.content)
+        self.assertTrue(data['description'])
+        self.assertTrue(data['available_quantity'] is not None)
+        self.assertTrue(data['subcategory']['slug'])
+
+    def test_0130_heavy_fields(self):
+        """heavy product columns are not loaded for short products"""
+        self.assertEqual(
+            set(get_heavy_fields(ProductShortSerializer)),
+            {'description', 'details', 'features', 'technical_features'})
+
+        queryset = with_short_products(InvoiceItem.objects.all())
+        self.assertNotIn('"products_product"."description"', str(queryset.query))
+        with CaptureQueriesContext(connection) as queries:
+            data = InvoiceItemOutSerializer(queryset, many=True).data
+        self.assertTrue(data[0]['product']['name'])
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_0140_products_batch(self):
+        """
+        end-point products batch
+        GET and POST
+        """
+        ids = list(Product.objects.visible().values_list('id', flat=True)[:5])
+        self.assertEqual(len(ids), 5)
+
+        queries_count = []
+        for count in (2, 5):
+            params = ','.join(str(pk) for pk in ids[:count])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('products-batch') + f'?ids={params},999999')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            queries_count.append(len(queries.captured_queries))
+            data = json.loads(response.content)
+            self.assertEqual([item['id'] for item in data['results']], ids[:count])
+            self.assertEqual(data['not_found'], [999999])
+        self.assertEqual(queries_count[0], queries_count[1])
+
+        response = self.client.get(reverse('get_product_by_id', args=[ids[0]]))
+        self.assertEqual(data['results'][0], json.loads(response.content))
+
+        response = self.client.post(
+            reverse('products-batch') + '?fields=id,name', {'ids': ids[::-1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual([item['id'] for item in data['results']], ids[::-1])
+        self.assertEqual(set(data['results'][0]), {'id', 'name'})
+
+        response = self.client.get(reverse('products-batch') + '?ids=a')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_0150_exchange_rates(self):
+        """
+        prices in other currencies are filtered and ordered
+        by the price in the base currency
+        """
+        subcategory = SubCategory.objects.get(slug='kaski')
+        product = Product.objects.create(
+            name='Каска USD', subcategory=subcategory, price=Money(100, 'USD'),
+            moderation_status=Product.Statuses.APPROVED)
+        try:
+            # no rate yet
+            self.assertIsNone(product.price_base)
+
+            call_command('load_exchange_rates', '--rate', 'USD=41.255')
+            product.refresh_from_db()
+            self.assertEqual(product.price_base, Decimal('4125.50'))
+            self.assertEqual(rates.to_base(Decimal('1.01'), 'USD'), Decimal('41.67'))
+            self.assertEqual(rates.to_base(Decimal('1.01'), 'UAH'), Decimal('1.01'))
+
+            product.price = Money(10, 'USD')
+            product.save(update_fields=['price'])
+            product.refresh_from_db()
+            self.assertEqual(product.price_base, Decimal('412.55'))
+
+            params = '?subcategory=kaski&min_price=400&max_price=413&limit=100'
+            response = self.client.get(reverse('products') + params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)
+            ids = [item['id'] for item in data['results']]
+            self.assertIn(product.id, ids)
+            self.assertTrue(all(
+                400 <= price <= 413
+                for price in Product.objects.filter(id__in=ids).values_list('price_base', flat=True)))
+
+            response = self.client.get(reverse('products') + '?ordering=price&limit=100')
+            data = json.loads(response.content)
+            products = Product.objects.in_bulk([item['id'] for item in data['results']])
+            prices = [products[item['id']].price_base for item in data['results']]
+            self.assertEqual(prices, sorted(prices))
+        finally:
+            product.delete()
+            ExchangeRate.objects.filter(currency='USD').delete()
+            rates.reset()
+
+    def test_0160_bulk_prices(self):
+        """
+        end-point products-prices-bulk
+        POST and the command reprice_products
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        products = list(Product.objects.visible().order_by('id')[:3])
+        old_prices = {
+            product.id: (product.price.amount, product.price_currency) for product in products}
+        events = OutboxEvent.objects.filter(topic=OutboxEvent.Topics.PRICE_CHANGED).count()
+        try:
+            data = {'items': [
+                {'id': product.id, 'price': str(product.price.amount + 1)}
+                for product in products] + [{'id': 999999, 'price': '1.00'}]}
+            response = self.client.post(reverse('products-prices-bulk'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                json.loads(response.content), {'updated': 3, 'not_found': [999999]})
+            for product in products:
+                new_product = Product.objects.get(pk=product.id)
+                self.assertEqual(new_product.price.amount, product.price.amount + 1)
+                self.assertEqual(new_product.price_base, product.price.amount + 1)
+            self.assertEqual(OutboxEvent.objects.filter(
+                topic=OutboxEvent.Topics.PRICE_CHANGED).count(), events + 3)
+
+            # batches of one product
+            with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+                csv_file.write('id,price,currency\n')
+                for product in products:
+                    csv_file.write(f'{product.id},{product.price.amount + 2},uah\n')
+            try:
+                call_command('reprice_products', csv_file.name, '--batch-size', '1')
+            finally:
+                os.unlink(csv_file.name)
+            for product in products:
+                self.assertEqual(
+                    Product.objects.get(pk=product.id).price.amount, product.price.amount + 2)
+
+            for item in ({'price': '-1'}, {'price': 'nan'}, {'price': '1', 'currency': 'XYZ'}):
+                data = {'items': [{'id': products[0].id, **item}]}
+                response = self.client.post(reverse('products-prices-bulk'), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            for row in ('nan,uah', 'inf,uah', '1,xyz'):
+                with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+                    csv_file.write(f'id,price,currency\n{products[0].id},{row}\n')
+                try:
+                    with self.assertRaises(CommandError):
+                        call_command('reprice_products', csv_file.name)
+                finally:
+                    os.unlink(csv_file.name)
+        finally:
+            bulk_set_prices(old_prices)
+
+    def test_0170_import_products(self):
+        """
+        end-point products-bulk
+        POST and the command import_catalogue
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        try:
+            queries_count = []
+            for count in (2, 20, 40):
+                data = {'items': [{
+                    'sku': f'TEST-{index}', 'name': f'Каска {index}', 'subcategory': 'kaski',
+                    'price': '100.50', 'features': {'Виробник': 'Test'},
+                } for index in range(count)]}
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.post(reverse('products-bulk'), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                queries_count.append(len(queries.captured_queries))
+            self.assertEqual(json.loads(response.content), {'created': 20, 'updated': 20})
+            self.assertEqual(queries_count[1], queries_count[2])
+
+            product = Product.objects.get(sku='TEST-1')
+            self.assertEqual(product.subcategory.slug, 'kaski')
+            self.assertEqual(product.price_base, Decimal('100.50'))
+            self.assertEqual(product.moderation_status, Product.Statuses.PENDING)
+
+            for row in ({'subcategory': 'unknown'}, {'price': 'nan'}, {'price_currency': 'XYZ'}):
+                data = {'items': [{'sku': 'TEST-1', 'name': 'Каска', **row}]}
+                response = self.client.post(reverse('products-bulk'), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            product.moderation_status = Product.Statuses.APPROVED
+            product.description = 'Опис'
+            product.save()
+            with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as jsonl_file:
+                jsonl_file.write(json.dumps(
+                    {'sku': 'TEST-1', 'name': 'Каска 1', 'price': 120, 'subcategory': 'kaski'}))
+                jsonl_file.write('\n{"sku": "TEST-X"}\n')
+                jsonl_file.write(json.dumps({
+                    'sku': 'TEST-NEW', 'name': 'Каска нова',
+                    'moderation_status': 'approved'}) + '\n')
+                jsonl_file.write(json.dumps({'sku': 'TEST-2', 'name': 'Каска 2 нова'}) + '\n')
+                for row in ({'price': 'nan'}, {'price': '-Infinity'}, {'price_currency': 'XYZ'}):
+                    jsonl_file.write(json.dumps({'sku': 'TEST-BAD', 'name': 'Каска', **row}) + '\n')
+            try:
+                call_command('import_catalogue', jsonl_file.name, '--batch-size', '1')
+            finally:
+                os.unlink(jsonl_file.name)
+
+            product.refresh_from_db()
+            self.assertEqual(product.price.amount, 120)
+            self.assertEqual(product.moderation_status, Product.Statuses.APPROVED)
+            self.assertEqual(product.description, 'Опис')
+            new_product = Product.objects.get(sku='TEST-NEW')
+            self.assertEqual(new_product.moderation_status, Product.Statuses.PENDING)
+            self.assertFalse(Product.objects.filter(sku__in=['TEST-X', 'TEST-BAD']).exists())
+
+            # a row without price and JSON fields keeps them
+            product = Product.objects.get(sku='TEST-2')
+            self.assertEqual(product.name, 'Каска 2 нова')
+            self.assertEqual(product.price.amount, Decimal('100.50'))
+            self.assertEqual(product.features, {'Виробник': 'Test'})
+            self.assertEqual(product.subcategory.slug, 'kaski')
+
+            # a new product without price is read without price
+            data = {'items': [{'sku': 'TEST-NO-PRICE', 'name': 'Каска без ціни'}]}
+            response = self.client.post(reverse('products-bulk'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            product = Product.objects.get(sku='TEST-NO-PRICE')
+            self.assertIsNone(product.price)
+            anonymous = APIClient()
+            for url in (
+                    reverse('get_product_by_id', args=[product.id]),
+                    reverse('async-product-by-id', args=[product.id])):
+                response = anonymous.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIsNone(json.loads(response.content)['actual_price'])
+            response = anonymous.get(reverse('products-batch') + f'?ids={product.id}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        finally:
+            Product.objects.filter(sku__startswith='TEST-').delete()
+
+    def test_0180_price_history(self):
+        """
+        end-point products-prices
+        GET and POST prices at a moment
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        products = list(Product.objects.visible().order_by('id')[:3])
+        old_prices = {
+            product.id: (product.price.amount, product.price_currency) for product in products}
+        before = timezone.now()
+        try:
+            # one product by the end-point, others in bulk
+            response = self.client.post(
+                reverse('product-price', args=[products[0].id]),
+                {'price': float(products[0].price.amount + 1)}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            bulk_set_prices({
+                product.id: (product.price.amount + 2, 'UAH') for product in products[1:]})
+
+            ids = [product.id for product in products]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(ProductPriceHistory.objects.at(ids, before).count(), 3)
+            self.assertEqual(len(queries.captured_queries), 1)
+
+            params = ','.join(str(pk) for pk in ids + [999999])
+            response = self.client.get(
+                reverse('products-prices') + f'?ids={params}&at={before.isoformat()}'.replace('+', '%2B'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)
+            self.assertEqual([item['product'] for item in data['results']], ids)
+            self.assertEqual(
+                [item['price'] for item in data['results']],
+                [float(product.price.amount) for product in products])
+            self.assertEqual(data['not_found'], [999999])
+
+            response = self.client.post(reverse('products-prices'), {'ids': ids}, format='json')
+            data = json.loads(response.content)
+            self.assertEqual(
+                [item['price'] for item in data['results']],
+                [float(product.price.amount + 1) for product in products[:1]]
+                + [float(product.price.amount + 2) for product in products[1:]])
+
+            # no price before the first row
+            response = self.client.post(reverse('products-prices'), {
+                'ids': ids, 'at': (products[0].created_at - timedelta(days=1)).isoformat()},
+                format='json')
+            self.assertEqual(json.loads(response.content)['not_found'], ids)
+
+            # an unchanged price is not appended
+            count = ProductPriceHistory.objects.filter(product=products[0]).count()
+            product = Product.objects.get(pk=products[0].id)
+            product.save()
+            self.assertEqual(
+                ProductPriceHistory.objects.filter(product=products[0]).count(), count)
+        finally:
+            bulk_set_prices(old_prices)
+
+    def test_0190_low_stock(self):
+        """
+        end-point products-low-stock
+        GET products below the threshold of the product or of its subcategory
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        product = Product.objects.visible().with_available_quantity().order_by('id').first()
+        subcategory = product.subcategory
+        try:
+            Product.objects.filter(pk=product.pk).update(
+                low_stock_threshold=product.available_quantity + 1)
+
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(LowStockValuesSerializer.values_queryset(
+                    low_stock_products(threshold=0)))
+            self.assertEqual(len(queries.captured_queries), 1)
+            self.assertEqual([row['id'] for row in rows], [product.id])
+
+            response = self.client.get(reverse('products-low-stock') + '?threshold=0')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)['results']
+            self.assertEqual([item['id'] for item in data], [product.id])
+            self.assertEqual(data[0]['available_quantity'], product.available_quantity)
+            self.assertEqual(data[0]['low_stock_threshold'], product.available_quantity + 1)
+
+            # the threshold of the subcategory, the product keeps its own one
+            SubCategory.objects.filter(pk=subcategory.pk).update(low_stock_threshold=10 ** 6)
+            response = self.client.get(
+                reverse('products-low-stock') + f'?threshold=0&days=7&subcategory={subcategory.slug}')
+            data = json.loads(response.content)['results']
+            self.assertEqual(
+                {item['id'] for item in data},
+                set(Product.objects.visible().filter(
+                    subcategory=subcategory).values_list('id', flat=True)))
+            for item in data:
+                # values are rounded to 2 and 1 places
+                self.assertAlmostEqual(item['sales_per_day'], item['sold'] / 7, delta=0.0051)
+                if item['sold']:
+                    self.assertAlmostEqual(
+                        item['days_of_cover'], item['available_quantity'] * 7 / item['sold'],
+                        delta=0.051)
+                else:
+                    self.assertIsNone(item['days_of_cover'])
+            covers = [item['days_of_cover'] for item in data if item['days_of_cover'] is not None]
+            self.assertEqual(covers, sorted(covers))
+
+            response = self.client.get(reverse('products-low-stock') + '?days=0')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        finally:
+            Product.objects.filter(pk=product.pk).update(low_stock_threshold=None)
+            SubCategory.objects.filter(pk=subcategory.pk).update(low_stock_threshold=None)
+
+    def test_0200_in_stock(self):
+        """
+        end-point products
+        GET ?in_stock=true and ?ordering=-stock by the stored available quantity
+        """
+        call_command('refresh_stock')
+        for product in Product.objects.with_available_quantity():
+            self.assertEqual(product.stock, product.available_quantity)
+
+        product = Product.objects.create(
+            name='Каска без остатка', subcategory=SubCategory.objects.get(slug='kaski'),
+            price=Money(100, 'UAH'), moderation_status=Product.Statuses.APPROVED)
+        try:
+            url = reverse('products') + '?subcategory=kaski&limit=100'
+            response = self.client.get(url + '&in_stock=true')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = json.loads(response.content)['results']
+            self.assertNotIn(product.id, [item['id'] for item in data])
+            self.assertTrue(all(item['available_quantity'] > 0 for item in data))
+
+            response = self.client.get(url + '&in_stock=false')
+            self.assertIn(product.id, [item['id'] for item in json.loads(response.content)['results']])
+
+            # the invoice adds the stock
+            self.user_manager = get_test_user(role='manager')
+            self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+            self.set_headers()
+            response = self.client.post(reverse('invoice'), {
+                'date': date.today().strftime('%Y-%m-%d'),
+                'items': [{'product': product.id, 'amount': 10 ** 6, 'price': 80, 'price_currency': 'UAH'}],
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            product.refresh_from_db()
+            self.assertEqual(product.stock, 10 ** 6)
+
+            response = self.client.get(url + '&in_stock=true&ordering=-stock')
+            data = json.loads(response.content)['results']
+            self.assertEqual(data[0]['id'], product.id)
+            quantities = [item['available_quantity'] for item in data]
+            self.assertEqual(quantities, sorted(quantities, reverse=True))
+        finally:
+            InvoiceItem.objects.filter(product=product).delete()
+            product.delete()
+
+    def test_0210_archive(self):
+        """
+        deleted products are hidden by Product.live and moved
+        to the archive with their price history
+        """
+        self.user_manager = get_test_user(role='manager')
+        self.user_token, self.refresh_token = self.get_jwt_token(role='manager')
+        self.set_headers()
+
+        subcategory = SubCategory.objects.get(slug='kaski')
+        products = [
+            Product.objects.create(
+                name=f'Каска в архив {index}', subcategory=subcategory, price=Money(100, 'UAH'),
+                moderation_status=Product.Statuses.APPROVED)
+            for index in range(2)]
+        product, purchased = products
+        invoice_item = InvoiceItem.objects.create(
+            product=purchased, amount=1, price=Money(80, 'UAH'))
+        try:
+            product.price = Money(120, 'UAH')
+            product.save()
+            for item in products:
+                response = self.client.delete(reverse('get_product_by_id', args=[item.id]))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            self.assertFalse(Product.live.filter(pk=product.id).exists())
+            self.assertTrue(Product.all_objects.get(pk=product.id).deleted_at)
+            response = self.client.delete(reverse('get_product_by_id', args=[product.id]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.post(
+                reverse('product-price', args=[product.id]), {'price': 1}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.post(reverse('invoice'), {
+                'date': date.today().strftime('%Y-%m-%d'),
+                'items': [{'product': product.id, 'amount': 1, 'price': 80, 'price_currency': 'UAH'}],
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(bulk_set_prices({product.id: (1, 'UAH')}), ([], [product.id]))
+
+            # not archived before PRODUCTS_ARCHIVE_DAYS
+            self.assertEqual(archive_deleted_products(), 0)
+            Product.all_objects.filter(pk__in=[item.id for item in products]).update(
+                deleted_at=timezone.now() - timedelta(days=365))
+            archived = archive_deleted_products(batch_size=1)
+            self.assertGreaterEqual(archived, 1)
+
+            self.assertFalse(Product.all_objects.filter(pk=product.id).exists())
+            self.assertFalse(ProductPriceHistory.objects.filter(product_id=product.id).exists())
+            archived_product = ArchivedProduct.objects.get(pk=product.id)
+            self.assertEqual(archived_product.name, product.name)
+            self.assertEqual(archived_product.price, Money(120, 'UAH'))
+            self.assertEqual(
+                sorted(archived_product.price_history.values_list('price', flat=True)),
+                [Decimal(100), Decimal(120)])
+            # products of invoices stay
+            self.assertTrue(Product.all_objects.filter(pk=purchased.id).exists())
+        finally:
+            invoice_item.delete()
+            ArchivedProduct.objects.filter(pk__in=[item.id for item in products]).delete()
+            Product.all_objects.filter(pk__in=[item.id for item in products]).delete()
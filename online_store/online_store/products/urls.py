@@ -4,8 +4,11 @@ products urls
 
 from django.urls import path
 
+from .async_views import AsyncCategoriesView, AsyncProductView, AsyncProductByIdView
 from .views import (
-    CategoriesView, ProductView, ProductByIdView, InvoiceView, ProductPriceView,
+    CategoriesView, ProductView, ProductByIdView, ProductBatchView, InvoiceView,
+    ProductPriceView, ProductPricesBulkView, ProductsBulkView, ProductPricesAtView,
+    LowStockView,
     PriceActionView, DisableActionView,
 )
 
@@ -13,8 +16,16 @@ urlpatterns = [
     path('categories', CategoriesView.as_view(), name='categories'),
     path('', ProductView.as_view(), name='products'),
     path('<int:pk>', ProductByIdView.as_view(), name='get_product_by_id'),
+    path('batch', ProductBatchView.as_view(), name='products-batch'),
+    path('bulk', ProductsBulkView.as_view(), name='products-bulk'),
+    path('async/categories', AsyncCategoriesView.as_view(), name='async-categories'),
+    path('async/', AsyncProductView.as_view(), name='async-products'),
+    path('async/<int:pk>', AsyncProductByIdView.as_view(), name='async-product-by-id'),
     path('invoice', InvoiceView.as_view(), name='invoice'),
+    path('low-stock', LowStockView.as_view(), name='products-low-stock'),
     path('<int:pk>/price', ProductPriceView.as_view(), name='product-price'),
+    path('prices', ProductPricesAtView.as_view(), name='products-prices'),
+    path('prices/bulk', ProductPricesBulkView.as_view(), name='products-prices-bulk'),
     path('action', PriceActionView.as_view(), name='actions'),
     path(
         'action/disable', DisableActionView.as_view(), name='disable-price-action'),
@@ -4,10 +4,11 @@ products views
 from decimal import Decimal
 from logging import getLogger
 # from pprint import pprint
-import math
 
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Min, Max
+from django.db.models import Prefetch
+from django.utils import timezone
 from django.utils.translation import gettext as _
 #
 from rest_framework.decorators import parser_classes
@@ -24,24 +25,40 @@ from rest_framework import status
 
 from djmoney.money import Money
 
+from online_store.accounts.authentication import JWTClaimsAuthentication
+from online_store.general.db_routers import ReplicaReadMixin, mark_sticky
 from online_store.general.error_messages import PRODUCT_NOT_FOUND, OBJECT_NOT_FOUND
+from online_store.general.jobs.service import enqueue
+from online_store.general.outbox.models import OutboxEvent
+from online_store.general.outbox.service import publish
 from online_store.general.permissions import (
     IsManager, IsManagerOrReadOnly)
-from .models import Category, Product, Invoice, PriceAction
-from .filters import ProductFilters
+from online_store.general.renderers import FastJSONRenderer
+from online_store.general.serializers import (
+    datetime_representation, get_query_list)
+from .models import (
+    Category, Product, Invoice, InvoiceItem, PriceAction, ProductPriceHistory)
+from .filters import PRICE_RANGE, filter_products, get_list, price_range
 from .serializers import (
-    CategorySerializer, ProductListItemSerializer, CreateProductSerializer,
+    CategorySerializer, ProductListItemSerializer, ProductListItemValuesSerializer,
+    CreateProductSerializer, ProductBatchSerializer,
     ProductFullSerializer, InvoiceSerializer, InvoiceListItemSerializer,
-    CreateInvoiceSerializer, ProductPriceSerializer,
+    CreateInvoiceSerializer, ProductPriceSerializer, ProductPricesBulkSerializer,
+    ProductsBulkSerializer, ProductPricesAtSerializer, PriceHistoryValuesSerializer,
+    LowStockQuerySerializer, LowStockValuesSerializer,
     PriceActionSerializer, PriceActionListItemSerializer,
-    CreateActionSerializer, DisableActionSerializer
+    CreateActionSerializer, DisableActionSerializer, with_short_products
 )
+from .service import (
+    publish_price_changed, bulk_set_prices, get_subcategories, low_stock_products,
+    product_from_row, upsert_products)
 
 logger = getLogger(__name__)
 
 
-class CategoriesView(ListAPIView):
+class CategoriesView(ReplicaReadMixin, ListAPIView):
     """List of categories"""
+    authentication_classes = [JWTClaimsAuthentication]
     permission_classes = [AllowAny]
     serializer_class = CategorySerializer
     queryset = Category.objects.all().order_by('id')
@@ -53,16 +70,18 @@ class CategoriesView(ListAPIView):
         """
         get list of categories
         """
-        queryset = Category.objects.all().order_by('id')
+        queryset = Category.objects.with_subcategories().order_by('id')
 
         return queryset
 
 
-class ProductView(APIView, LimitOffsetPagination):
+class ProductView(ReplicaReadMixin, APIView, LimitOffsetPagination):
     """
     GET and POST products
     """
+    authentication_classes = [JWTClaimsAuthentication]
     permission_classes = [IsManagerOrReadOnly]
+    renderer_classes = [FastJSONRenderer]
     serializer_type_class = {
         'get': ProductListItemSerializer,
         'post': CreateProductSerializer,
@@ -78,101 +97,43 @@ class ProductView(APIView, LimitOffsetPagination):
 
     def get_queryset(self):
         """get queryset"""
-        queryset = Product.objects.visible().select_related('subcategory')
-
-        return queryset
+        # the columns are chosen by values_queryset or optimize_queryset
+        return Product.live.visible().select_related('subcategory')
 
     def get(self, request, *args, **kwargs):
         """
         GET list of products with filtration
         """
-        def get_list(params, field_name):
-            items = params.get(field_name)
-            if items:
-                if items == 'undefined':
-                    items = []
-                else:
-                    items = [s.strip() for s in items.split(',') if s]
-            else:
-                items = []
-            return items
-
         user = request.user
 
-        filters_from_request = request.query_params.dict()
-
-        categories = get_list(request.query_params, 'category')
-        subcategories = get_list(request.query_params, 'subcategory')
-
-        query_params_without_price_filters = filters_from_request.copy()
-        query_params_without_price_filters.pop('min_price', None)
-        query_params_without_price_filters.pop('max_price', None)
-
-        queryset = self.get_queryset()
-
-        f_qs = ProductFilters(query_params_without_price_filters, queryset=queryset).qs
-
-        # calculate min and max prices for the queryset, filtered without price filters
-        min_price = max_price = None
-        min_max_prices_data = f_qs.aggregate(
-            min_price=Min('price'), max_price=Max('price'),
-        )
-        min_price = min_max_prices_data['min_price']
-        max_price = min_max_prices_data['max_price']
-
-        if min_price:
-            min_price = math.ceil(min_price)
-        if max_price:
-            max_price = math.ceil(max_price)
-
-        # filter queryset again, but with price filters
-        filtered_queryset = ProductFilters(filters_from_request, queryset=queryset).qs
-        if categories:
-            filtered_queryset = filtered_queryset.filter(
-                subcategory__category__slug__in=categories)
-
-        if subcategories:
-            filtered_queryset = filtered_queryset.filter(
-                subcategory__slug__in=subcategories)
-
-        # order the filtered queryset if ordering param was provided
-        non_default_ordering = False
-        order_by = request.query_params.get('ordering')
-        # убрать неизвестный порядок сортировки
-        if order_by not in ('price', '-price'):
-            order_by = ''
-        if order_by:
-            try:
-                filtered_queryset = filtered_queryset.order_by(order_by)
-            except Exception:
-                non_default_ordering = True
+        filtered_queryset, price_queryset = filter_products(
+            self.get_queryset(), request.query_params)
 
-        filtered_queryset = filtered_queryset.distinct()
-        # paginate the filtered queryset
-        filtered_queryset = self.paginate_queryset(
-            filtered_queryset, request, view=self)
+        # min and max prices for the queryset, filtered without price filters
+        prices = price_range(price_queryset.aggregate(**PRICE_RANGE))
 
-        # serialize the filtered queryset
+        # ?fields=id,name,price&expand=subcategory
+        fields = get_query_list(request, 'fields')
+        expand = get_query_list(request, 'expand')
         context = {'user': user, 'action': PriceAction.actual_action()}
-        data = ProductListItemSerializer(
-            filtered_queryset, context=context, many=True).data
 
-        if order_by and non_default_ordering:
-            from operator import itemgetter
-            descending = False  # whether to sort in descending order
-            if order_by.startswith('-'):
-                order_by = order_by[1:]
-                descending = True
-            data = sorted(data, key=itemgetter(order_by), reverse=descending)
+        # paginate and serialize the filtered queryset
+        if expand:
+            products = self.paginate_queryset(
+                ProductListItemSerializer.optimize_queryset(
+                    filtered_queryset, fields, expand),
+                request, view=self)
+            data = ProductListItemSerializer(
+                products, context=context, many=True, fields=fields, expand=expand).data
+        else:
+            # rows are dicts, not models
+            rows = self.paginate_queryset(
+                ProductListItemValuesSerializer.values_queryset(filtered_queryset, fields),
+                request, view=self)
+            data = ProductListItemValuesSerializer(rows, context=context, fields=fields).data
 
         response = self.get_paginated_response(data)
-
-        response.data['min_price'] = min_price
-        response.data['max_price'] = max_price
-        if isinstance(min_price, Money):
-            response.data['min_price'] = min_price.amount
-        if isinstance(max_price, Money):
-            response.data['max_price'] = max_price.amount
+        response.data.update(prices)
 
         return response
 
@@ -191,6 +152,7 @@ class ProductView(APIView, LimitOffsetPagination):
         product = None
         with transaction.atomic():
             product = serializer.save()
+        mark_sticky(request.user)
 
         if product:
             return Response(ProductFullSerializer(product).data, status=status.HTTP_201_CREATED)
@@ -199,17 +161,18 @@ class ProductView(APIView, LimitOffsetPagination):
                 _("Something went wrong"), status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProductByIdView(RetrieveUpdateDestroyAPIView):
+class ProductByIdView(ReplicaReadMixin, RetrieveUpdateDestroyAPIView):
     """
     get: Retrieve product by id
     put: Update product by id (available only to manager)
     delete: Delete product by id (available only to manager)
     """
+    authentication_classes = [JWTClaimsAuthentication]
     permission_classes = [IsManagerOrReadOnly]
 
     def get_queryset(self):
         """get queryset"""
-        return Product.objects.exclude(moderation_status='deleted')
+        return Product.live.all()
 
     def get_serializer_class(self):
         """get serializer class"""
@@ -226,29 +189,34 @@ class ProductByIdView(RetrieveUpdateDestroyAPIView):
     def get(self, request, *args, **kwargs):
         """GET one product by id"""
 
-        product = Product.objects.filter(
-            pk=kwargs['pk']).exclude(
-                moderation_status=Product.Statuses.DELETED).first()
+        # ?fields=id,name,price&expand=subcategory
+        fields = get_query_list(request, 'fields')
+        expand = get_query_list(request, 'expand')
+        serializer_class = self.get_serializer_class()
+
+        product = serializer_class.optimize_queryset(
+            Product.live.filter(pk=kwargs['pk']), fields, expand).first()
         if product is None:
             return Response(PRODUCT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
 
-        serializer_class = self.get_serializer_class()
         context = self.get_serializer_context()
-        return Response(serializer_class(product, context=context).data)
+        return Response(serializer_class(
+            product, context=context, fields=fields, expand=expand).data)
 
     def delete(self, request, *args, **kwargs):
         """delete one product by id (set status)"""
-        from online_store.orders.service import cancel_orders_by_product
         product_id = kwargs.get('pk')
 
-        product = Product.objects.filter(pk=product_id).first()
+        product = Product.live.filter(pk=product_id).first()
         if product is None:
             return Response(PRODUCT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
 
         product.moderation_status = Product.Statuses.DELETED
+        product.deleted_at = timezone.now()
         product.save()
+        mark_sticky(request.user)
 
-        cancel_orders_by_product(product)
+        enqueue('orders.cancel_orders_by_product', {'product_id': product.id})
 
         return Response("Success")
 
@@ -277,6 +245,7 @@ class ProductByIdView(RetrieveUpdateDestroyAPIView):
         with transaction.atomic():
             product = product_srl.save()
             context['product'] = product
+        mark_sticky(request.user)
 
         if product:
             return Response(
@@ -284,6 +253,125 @@ class ProductByIdView(RetrieveUpdateDestroyAPIView):
                 status=status.HTTP_200_OK)
 
 
+class ProductBatchView(ReplicaReadMixin, APIView):
+    """
+    get: Retrieve products by ids, ?ids=1,2,3
+    post: Retrieve products by ids in the body {"ids": [1, 2, 3]}, for long lists
+    """
+    authentication_classes = [JWTClaimsAuthentication]
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request, *args, **kwargs):
+        """GET products by ids"""
+        return self.get_products(request, {'ids': get_list(request.query_params, 'ids')})
+
+    def post(self, request, *args, **kwargs):
+        """POST with ids of products"""
+        return self.get_products(request, request.data)
+
+    @staticmethod
+    def get_products(request, data):
+        """
+        products in the order of ids, with one price action lookup
+        and one query for the products and their stock
+        """
+        serializer = ProductBatchSerializer(data=data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+
+        # ?fields=id,name,price&expand=subcategory
+        fields = get_query_list(request, 'fields')
+        expand = get_query_list(request, 'expand')
+
+        products = ProductFullSerializer.optimize_queryset(
+            Product.live.filter(pk__in=ids), fields, expand).in_bulk()
+
+        context = {'user': request.user, 'action': PriceAction.actual_action()}
+        data = ProductFullSerializer(
+            [products[pk] for pk in ids if pk in products],
+            context=context, many=True, fields=fields, expand=expand).data
+
+        return Response({
+            'results': data,
+            'not_found': [pk for pk in ids if pk not in products],
+        })
+
+
+class ProductPricesAtView(ReplicaReadMixin, APIView):
+    """
+    get: Prices of products at a moment from the price history,
+    ?ids=1,2,3&at=2024-06-01T00:00:00Z (now by default)
+    post: The same for long lists {"ids": [1, 2, 3], "at": "2024-06-01T00:00:00Z"}
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request, *args, **kwargs):
+        """GET prices"""
+        data = {'ids': get_list(request.query_params, 'ids')}
+        if request.query_params.get('at'):
+            data['at'] = request.query_params['at']
+        return self.get_prices(data)
+
+    def post(self, request, *args, **kwargs):
+        """POST with ids of products"""
+        return self.get_prices(request.data)
+
+    @staticmethod
+    def get_prices(data):
+        """prices in the order of ids by one query"""
+        serializer = ProductPricesAtSerializer(data=data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        moment = serializer.validated_data.get('at') or timezone.now()
+
+        rows = {
+            row['product_id']: row
+            for row in PriceHistoryValuesSerializer.values_queryset(
+                ProductPriceHistory.objects.at(ids, moment))}
+
+        return Response({
+            'at': datetime_representation(moment),
+            'results': PriceHistoryValuesSerializer(
+                [rows[pk] for pk in ids if pk in rows]).data,
+            'not_found': [pk for pk in ids if pk not in rows],
+        })
+
+
+class LowStockView(ReplicaReadMixin, APIView, LimitOffsetPagination):
+    """
+    GET approved products with the stock below the threshold
+    of the product, of its subcategory or ?threshold=5,
+    with sales per day for ?days=30 and days of cover,
+    ?category=alpinism&subcategory=kaski
+    """
+    permission_classes = [IsManager]
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        """GET products low in stock"""
+        serializer = LowStockQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = low_stock_products(
+            categories=get_query_list(request, 'category'),
+            subcategories=get_query_list(request, 'subcategory'),
+            **serializer.validated_data)
+        rows = self.paginate_queryset(
+            LowStockValuesSerializer.values_queryset(queryset), request, view=self)
+
+        return self.get_paginated_response(LowStockValuesSerializer(rows).data)
+
+
 class InvoiceView(APIView, LimitOffsetPagination):
     """
     GET and POST invoices
@@ -337,6 +425,10 @@ class InvoiceView(APIView, LimitOffsetPagination):
             invoice = serializer.save()
 
         if invoice:
+            mark_sticky(request.user)
+            invoice = Invoice.objects.prefetch_related(Prefetch(
+                'items', queryset=with_short_products(InvoiceItem.objects.all())
+            )).get(pk=invoice.pk)
             return Response(
                 InvoiceSerializer(invoice).data,
                 status=status.HTTP_201_CREATED)
@@ -367,17 +459,83 @@ class ProductPriceView(APIView):
             serializer.validate(request_data)
             return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
 
-        product = Product.objects.filter(pk=pk).first()
+        product = Product.live.filter(pk=pk).first()
         if product is None:
             return Response(OBJECT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
 
-        product.price = Money(Decimal(serializer.data['price']), 'UAH')
-        product.save()
+        with transaction.atomic():
+            product.price = Money(
+                Decimal(serializer.data['price']),
+                serializer.validated_data.get('price_currency', settings.BASE_CURRENCY))
+            product.save()
+            publish_price_changed(product)
+        mark_sticky(request.user)
 
         return Response(
             ProductFullSerializer(product).data, status=status.HTTP_201_CREATED)
 
 
+class ProductsBulkView(APIView):
+    """
+    post: Create or update products by SKU {"items": [{"sku": "A-1", "name": "...", ...}]}
+    """
+    permission_classes = [IsManager]
+    http_method_names = ['post']
+
+    def get_serializer_class(self):
+        """get serializer class"""
+        return ProductsBulkSerializer
+
+    def post(self, request, *args, **kwargs):
+        """create or update products"""
+        serializer = ProductsBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        subcategories = get_subcategories()
+        products = []
+        errors = []
+        for index, row in enumerate(serializer.validated_data['items']):
+            try:
+                products.append(product_from_row(row, subcategories))
+            except ValueError as exc:
+                errors.append(f'{index}: {exc}')
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = upsert_products(products)
+        mark_sticky(request.user)
+
+        return Response({'created': created, 'updated': updated})
+
+
+class ProductPricesBulkView(APIView):
+    """
+    post: Set prices of many products {"items": [{"id": 1, "price": 10.5, "currency": "UAH"}]}
+    """
+    permission_classes = [IsManager]
+    http_method_names = ['post']
+
+    def get_serializer_class(self):
+        """get serializer class"""
+        return ProductPricesBulkSerializer
+
+    def post(self, request, *args, **kwargs):
+        """set prices"""
+        serializer = ProductPricesBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            error_msg = _("Data is invalid, please check these fields:") + " "
+            error_msg += ", ".join([_(f"{key}") for key in serializer.errors.keys()])
+            return Response(error_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        updated, not_found = bulk_set_prices(serializer.prices())
+        mark_sticky(request.user)
+
+        return Response({'updated': len(updated), 'not_found': not_found})
+
+
 class PriceActionView(APIView, LimitOffsetPagination):
     """
     GET and POST price actions
@@ -464,8 +622,11 @@ class DisableActionView(APIView):
         if action is None:
             return Response(OBJECT_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
 
-        action.active = False
-        action.save()
+        with transaction.atomic():
+            action.active = False
+            action.save()
+            publish(OutboxEvent.Topics.PRICE_ACTION_CHANGED, action.id, {
+                'discount': action.discount, 'active': action.active})
 
         return Response(
             PriceActionSerializer(action).data, status=status.HTTP_201_CREATED)
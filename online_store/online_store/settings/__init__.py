@@ -0,0 +1,15 @@
+"""
+Django settings for online_store project.
+
+The profile is selected by the environment variable DJANGO_ENV:
+dev (default) or prod.
+"""
+
+import os
+
+from .base import *  # noqa: F401,F403
+
+if os.environ.get('DJANGO_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
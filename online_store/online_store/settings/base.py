@@ -0,0 +1,318 @@
+"""
+Django settings for online_store project, common for all profiles.
+
+Generated by 'django-admin startproject' using Django 4.1.7.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.1/ref/settings/
+"""
+
+import os
+from pathlib import Path
+from datetime import timedelta
+from dotenv import load_dotenv
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+load_dotenv(os.path.join(BASE_DIR, 'online_store/.env'))
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('SECRET_KEY')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# turned on in the dev profile
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+CORS_ALLOW_ALL_ORIGINS = True
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+
+    'rest_framework',
+    'rest_framework_simplejwt',
+    'django_filters',
+    'djmoney',
+    'drf_yasg',
+
+    'online_store.accounts',
+    'online_store.general',
+    'online_store.general.jobs',
+    'online_store.general.outbox',
+    'online_store.products',
+    'online_store.orders',
+    'online_store.carts',
+
+    'drf_spectacular',
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "online_store.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "online_store.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/4.1/ref/settings/#databases
+
+# DATABASES = {
+#     "default": {
+#         "ENGINE": "django.db.backends.sqlite3",
+#         "NAME": BASE_DIR / "db.sqlite3",
+#     }
+# }
+
+# DB_POOL_SIZE > 0 turns on the backend with a pool of connections per worker
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+
+DATABASES = {
+    'default': {
+        'ENGINE': (
+            'online_store.general.db_backends.mysql_pool' if DB_POOL_SIZE
+            else 'django.db.backends.mysql'),
+        'NAME': os.getenv('MYSQL_DATABASE'),
+        'USER': os.getenv('MYSQL_USER'),
+        'PASSWORD': os.getenv('MYSQL_PASSWORD'),
+        'HOST': os.getenv('DB_HOST'),
+        'PORT': os.getenv('DB_PORT'),
+        # persistent connections, seconds (0 - connection per request)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_RECYCLE': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    },
+}
+
+# read replica for catalogue and reports, see online_store.general.db_routers
+REPLICA_DATABASE = None
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+if os.getenv('DB_REPLICA_HOST'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT')),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['online_store.general.db_routers.ReplicaRouter']
+
+
+# DRF settings
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'online_store.accounts.authentication.JWTProfileAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_FILTER_BACKENDS': (
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'PAGE_SIZE': 10,
+    # 'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # 'EXCEPTION_HANDLER': 'config.utils.exceptions.core_exception_handler',
+    'NON_FIELD_ERRORS_KEY': 'detail',
+    'COERCE_DECIMAL_TO_STRING': False,
+    # number of trusted proxies before the application, X-Forwarded-For
+    # is ignored by the throttles while it is 0
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES') or 0),
+    # token buckets, see online_store.general.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'signin_ip': os.environ.get('THROTTLE_SIGNIN_IP', '30/m'),
+        'signin_username': os.environ.get('THROTTLE_SIGNIN_USERNAME', '10/m'),
+        'signup_ip': os.environ.get('THROTTLE_SIGNUP_IP', '10/h'),
+        'token_refresh_ip': os.environ.get('THROTTLE_TOKEN_REFRESH_IP', '30/m'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # state of throttling, use a shared cache (memcached, redis) for several workers
+    'throttle': {
+        'BACKEND': os.environ.get(
+            'THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+    # state seen by all workers: replica stickiness, carts,
+    # use a shared cache (memcached, redis) for several workers
+    'shared': {
+        'BACKEND': os.environ.get(
+            'SHARED_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('SHARED_CACHE_LOCATION', 'shared'),
+    },
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('ACCESS_TOKEN_LIFETIME', 3))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('REFRESH_TOKEN_LIFETIME', 30))),
+    'UPDATE_LAST_LOGIN': False,  # set to True later, but add throttle TokenObtainPairView
+}
+
+# catalogue GET requests use the user from token claims without a query
+JWT_STATELESS_READS = os.environ.get('JWT_STATELESS_READS', 'True') == 'True'
+
+# max count of products in GET/POST /products/batch
+PRODUCTS_BATCH_MAX_SIZE = int(os.environ.get('PRODUCTS_BATCH_MAX_SIZE', 100))
+# max count of rows in bulk changes of products
+PRODUCTS_BULK_MAX_SIZE = int(os.environ.get('PRODUCTS_BULK_MAX_SIZE', 10000))
+# deleted products are moved to the archive tables after these days
+PRODUCTS_ARCHIVE_DAYS = int(os.environ.get('PRODUCTS_ARCHIVE_DAYS', 180))
+
+# currency of Product.price_base, exchange rates are prices in it
+BASE_CURRENCY = os.environ.get('BASE_CURRENCY', 'UAH')
+# seconds to keep exchange rates in memory of a process
+EXCHANGE_RATES_SECONDS = int(os.environ.get('EXCHANGE_RATES_SECONDS', 300))
+
+# purchases and sales of the last seconds are valued by the next run
+VALUATION_DELAY_SECONDS = int(os.environ.get('VALUATION_DELAY_SECONDS', 60))
+
+# products are low in stock below the threshold of the product,
+# of its subcategory or this one
+LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', 5))
+# days of orders to estimate sales per day of low stock products
+LOW_STOCK_SALES_DAYS = int(os.environ.get('LOW_STOCK_SALES_DAYS', 30))
+
+# seconds to keep the hot copy of a cart in the cache
+CART_CACHE_SECONDS = int(os.environ.get('CART_CACHE_SECONDS', 3600))
+
+# Background jobs
+JOBS_BATCH_SIZE = int(os.environ.get('JOBS_BATCH_SIZE', 20))
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1))
+JOBS_RETRY_BACKOFF = int(os.environ.get('JOBS_RETRY_BACKOFF', 10))  # seconds
+JOBS_LOCK_TIMEOUT = int(os.environ.get('JOBS_LOCK_TIMEOUT', 600))  # seconds
+
+# Outbox events
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 1))
+# a failed event blocks the next ones till it is skipped after these attempts
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+# dispatched events are deleted by the command prune_events after these days
+OUTBOX_RETENTION_DAYS = int(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+
+# Password validation
+# https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Password hashing: pbkdf2, scrypt or argon2 (requires argon2-cffi).
+# Hashes made by other hashers are verified and upgraded on the next login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'online_store.accounts.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'online_store.accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'online_store.accounts.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 870000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', 1))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 65536))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.1/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+USE_L10N = True
+
+LOCALE_PATHS = [
+    BASE_DIR / 'locale/',
+]
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.1/howto/static-files/
+
+STATIC_URL = "static/"
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# API tests
+API_TEST_MANAGER_USERNAME = os.environ.get('API_TEST_MANAGER_USERNAME')
+API_TEST_MANAGER_PASSWORD = os.environ.get('API_TEST_MANAGER_PASSWORD')
+API_TEST_CLIENT_USERNAME = os.environ.get('API_TEST_CLIENT_USERNAME')
+API_TEST_CLIENT_PASSWORD = os.environ.get('API_TEST_CLIENT_PASSWORD')
+API_TEST_ADMIN_USERNAME = os.environ.get('API_TEST_ADMIN_USERNAME')
+API_TEST_ADMIN_PASSWORD = os.environ.get('API_TEST_ADMIN_PASSWORD')
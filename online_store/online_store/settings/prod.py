@@ -0,0 +1,33 @@
+"""
+Production settings: no debug instrumentation,
+cached templates, persistent connections, compact JSON
+"""
+
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, REST_FRAMEWORK, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host.strip() for host in os.environ.get('ALLOWED_HOSTS', '').split(',')
+    if host.strip()]
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 600))
+    database['CONN_HEALTH_CHECKS'] = True
+
+# orjson renderer, the same output as JSONRenderer
+REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+    'online_store.general.renderers.FastJSONRenderer',
+]
+REST_FRAMEWORK['COMPACT_JSON'] = True